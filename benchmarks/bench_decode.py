@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+'''
+Decode throughput for plain Ethernet/IPv4/UDP frames, along with the
+cost of turning header field values into enumerated types both through
+the Enum constructor and through the lookup tables the packet library
+uses.
+
+Run from the top of the source tree:
+
+    PYTHONPATH=. python3 benchmarks/bench_decode.py [-n count]
+'''
+
+import sys
+import argparse
+from timeit import repeat
+
+from switchyard.lib.packet import *
+from switchyard.lib.packet.common import _to_enum
+
+
+def make_frames(count):
+    frames = []
+    for i in range(count):
+        p = Ethernet(src="11:22:33:44:55:66", dst="66:55:44:33:22:11") + \
+            IPv4(src="10.0.{}.{}".format(i // 250 % 250, i % 250 + 1), 
+                 dst="192.168.1.1", protocol=IPProtocol.UDP, ttl=64) + \
+            UDP(src=1024 + i % 1000, dst=53) + bytes(i % 64)
+        frames.append(p.to_bytes())
+    return frames
+
+
+def best(stmt, number, repeats):
+    return min(repeat(stmt, number=number, repeat=repeats)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-n', dest='count', type=int, default=10000,
+        help="Number of frames to decode per round (default: 10000)")
+    parser.add_argument('-r', dest='repeats', type=int, default=5,
+        help="Number of rounds; the best is reported (default: 5)")
+    args = parser.parse_args()
+
+    values = [ p.value for p in IPProtocol ] * 10
+    ctor = best(lambda: [IPProtocol(v) for v in values], 200, args.repeats)
+    table = best(lambda: [_to_enum(IPProtocol, v) for v in values], 200, 
+        args.repeats)
+    print("IPProtocol(value):           {:8.1f} ns/value".format(ctor/len(values)*1e9))
+    print("_to_enum(IPProtocol, value): {:8.1f} ns/value".format(table/len(values)*1e9))
+
+    frames = make_frames(args.count)
+    def decode():
+        for f in frames:
+            Packet(raw=f)
+    elapsed = best(decode, 1, args.repeats)
+    print("Ethernet/IPv4/UDP decode:    {:8.0f} frames/s ({:.2f} us/frame)".format(
+        len(frames)/elapsed, elapsed/len(frames)*1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
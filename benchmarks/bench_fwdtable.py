@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+'''
+Build time and lookup rate for ForwardingTable with a large, randomly
+generated set of IPv4 routes (prefix lengths between 8 and 32, most of
+them /24s, roughly as in a full Internet routing table).
+
+Run from the top of the source tree:
+
+    PYTHONPATH=. python3 benchmarks/bench_fwdtable.py [-n routes]
+'''
+
+import sys
+import argparse
+import random
+from time import perf_counter
+from ipaddress import IPv4Network
+
+from switchyard.lib.forwarding import ForwardingTable
+
+
+def make_routes(count, rand):
+    lengths = [24] * 60 + [22, 23] * 10 + list(range(8, 22)) + \
+        list(range(25, 33))
+    routes = []
+    for i in range(count):
+        length = rand.choice(lengths)
+        bits = rand.getrandbits(32) >> (32 - length) << (32 - length)
+        routes.append((IPv4Network((bits, length)), i))
+    return routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-n', dest='count', type=int, default=500000,
+        help="Number of routes (default: 500000)")
+    parser.add_argument('-l', dest='lookups', type=int, default=200000,
+        help="Number of lookups (default: 200000)")
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    routes = make_routes(args.count, rand)
+    start = perf_counter()
+    table = ForwardingTable(routes)
+    elapsed = perf_counter() - start
+    print("Inserted {} routes in {:.2f}s ({:.2f} us/route)".format(
+        len(table), elapsed, elapsed/args.count*1e6))
+
+    addrs = [ rand.getrandbits(32) for _ in range(args.lookups) ]
+    lookup = table.lookup
+    start = perf_counter()
+    found = sum(1 for a in addrs if lookup(a) is not None)
+    elapsed = perf_counter() - start
+    print("{} lookups in {:.2f}s ({:.2f} us/lookup, {} matched)".format(
+        args.lookups, elapsed, elapsed/args.lookups*1e6, found))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+'''
+Classification rate for PacketFilter with a large, randomly generated
+rule set, compared with a linear first-match scan over the same rules.
+Rules use a mix of prefix lengths (any, /8, /16, /24 and /32),
+protocols and well-known ports, roughly as in real firewall rule sets,
+with more specific rules ahead of more general ones.
+
+Run from the top of the source tree:
+
+    PYTHONPATH=. python3 benchmarks/bench_packetfilter.py [-n rules]
+'''
+
+import sys
+import argparse
+import random
+from time import perf_counter
+from ipaddress import IPv4Network
+
+from switchyard.lib.packetfilter import PacketFilter, FilterRule
+from switchyard.lib.packet import IPProtocol
+
+
+def make_rules(count, rand):
+    lengths = [0] * 2 + [8] * 2 + [16] * 4 + [24] * 6 + [32] * 6
+    protocols = [None, IPProtocol.ICMP] + [IPProtocol.TCP] * 4 + \
+        [IPProtocol.UDP] * 2
+    ports = [None] * 6 + [22, 25, 53, 80, 123, 443, 8000, 8080]
+    nets = {}
+    for l in set(lengths):
+        nets[l] = [ IPv4Network((rand.getrandbits(32) >> (32-l) << (32-l), l))
+            for _ in range(max(1, count // 20)) ]
+    rules = []
+    for i in range(count):
+        proto = rand.choice(protocols)
+        sport = dport = None
+        if proto in (IPProtocol.TCP, IPProtocol.UDP):
+            sport, dport = rand.choice(ports), rand.choice(ports)
+        rules.append(FilterRule(rand.choice(['permit', 'deny']), proto,
+            rand.choice(nets[rand.choice(lengths)]), sport,
+            rand.choice(nets[rand.choice(lengths)]), dport, None, False))
+    # as in most real rule sets, more specific rules come first
+    rules.sort(key=lambda r: -(r.src.prefixlen + r.dst.prefixlen +
+        16 * (r.protocol is not None) + 16 * (r.srcport is not None) +
+        16 * (r.dstport is not None)))
+    rules.append(FilterRule('deny', None, IPv4Network('0.0.0.0/0'), None,
+        IPv4Network('0.0.0.0/0'), None, None, False))
+    return rules
+
+
+def linear_match(rules, src, dst, protocol, srcport, dstport):
+    for idx, (smask, snet, dmask, dnet, proto, sport, dport) in \
+            enumerate(rules):
+        if src & smask == snet and dst & dmask == dnet and \
+           (proto is None or proto == protocol) and \
+           (sport is None or sport == srcport) and \
+           (dport is None or dport == dstport):
+            return idx
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-n', dest='count', type=int, default=10000,
+        help="Number of rules (default: 10000)")
+    parser.add_argument('-p', dest='packets', type=int, default=20000,
+        help="Number of packets to classify (default: 20000)")
+    parser.add_argument('-l', dest='linear', type=int, default=500,
+        help="Number of packets to classify with the linear scan "
+             "(default: 500)")
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    rules = make_rules(args.count, rand)
+    start = perf_counter()
+    pf = PacketFilter(rules)
+    elapsed = perf_counter() - start
+    print("Compiled {} rules into {} tuples in {:.2f}s".format(
+        len(pf), sum(len(g) for g in pf._tuples.values()), elapsed))
+
+    # packets are aimed at randomly chosen rules so that they exercise
+    # more than just the catch-all rules
+    packets = []
+    for _ in range(args.packets):
+        rule = rand.choice(rules)
+        src = int(rule.src.network_address) | \
+            rand.randrange(1 << (32 - rule.src.prefixlen))
+        dst = int(rule.dst.network_address) | \
+            rand.randrange(1 << (32 - rule.dst.prefixlen))
+        proto = int(rule.protocol or rand.choice([1, 6, 17]))
+        sport = dport = None
+        if proto != 1:
+            sport = rule.srcport or rand.randrange(1024, 65536)
+            dport = rule.dstport or rand.randrange(1, 1024)
+        packets.append((src, dst, proto, sport, dport))
+
+    match = pf.match
+    start = perf_counter()
+    results = [ match(*p) for p in packets ]
+    elapsed = perf_counter() - start
+    print("Tuple space search: {} packets in {:.2f}s ({:.2f} us/packet)".format(
+        len(packets), elapsed, elapsed/len(packets)*1e6))
+
+    linear = [ ((0xffffffff << (32-r.src.prefixlen)) & 0xffffffff,
+                int(r.src.network_address),
+                (0xffffffff << (32-r.dst.prefixlen)) & 0xffffffff,
+                int(r.dst.network_address), r.protocol, r.srcport, r.dstport)
+               for r in rules ]
+    sample = packets[:args.linear]
+    start = perf_counter()
+    expected = [ linear_match(linear, *p) for p in sample ]
+    elapsed = perf_counter() - start
+    print("Linear first match: {} packets in {:.2f}s ({:.2f} us/packet)".format(
+        len(sample), elapsed, elapsed/len(sample)*1e6))
+    if expected != results[:len(sample)]:
+        print("Results differ!")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
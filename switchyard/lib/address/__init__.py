@@ -25,6 +25,11 @@ import socket
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# addresses handed out by EthAddr.from_raw, keyed by their raw bytes.
+# Once full, new addresses are still created but no longer remembered.
+_ETHADDR_INTERN_MAX = 65536
+_ethaddr_intern = {}
+
 class EthAddr (object):
     """
     An Ethernet (MAC) address type.
@@ -39,7 +44,9 @@ class EthAddr (object):
       # Always stores as a bytes object of length 6
       self.__value = None
 
-      if isinstance(addr, bytes):
+      if type(addr) is bytes and len(addr) == 6:
+          self.__value = addr
+      elif isinstance(addr, bytes):
           self.__value = bytes(addr[:6])
       elif isinstance(addr, EthAddr):
           self.__value = addr.raw
@@ -55,6 +62,34 @@ class EthAddr (object):
       if not self.__value:
           raise RuntimeError("Expected ethernet address string to be 6 raw " 
                                "bytes or some hex")
+
+    @classmethod
+    def from_raw(cls, raw):
+        """
+        Return an EthAddr for raw, which must be a 6-long bytes object.
+        Skips the argument checking done by the constructor, and hands
+        back a shared instance for addresses that have been seen before
+        (EthAddr objects are immutable, so sharing them is safe).
+        """
+        addr = _ethaddr_intern.get(raw, None)
+        if addr is None:
+            addr = object.__new__(cls)
+            addr.__value = raw
+            if len(_ethaddr_intern) < _ETHADDR_INTERN_MAX:
+                _ethaddr_intern[raw] = addr
+        return addr
+
+    @classmethod
+    def coerce(cls, addr):
+        """
+        Return addr if it is already an EthAddr, otherwise construct
+        one from it.
+        """
+        if isinstance(addr, EthAddr):
+            return addr
+        if type(addr) is bytes and len(addr) == 6:
+            return cls.from_raw(addr)
+        return cls(addr)
   
     def isBridgeFiltered (self):
         """
@@ -137,16 +172,29 @@ class EthAddr (object):
         return self.toStr()
 
     def __eq__(self, other):
+        if isinstance(other, EthAddr):
+            return self.__value == other.__value
+        if type(other) is bytes and len(other) == 6:
+            return self.__value == other
         other = EthAddr(other)
-        return self.raw == other.raw
+        return self.__value == other.__value
 
     def __lt__(self, other):
+        if isinstance(other, EthAddr):
+            return self.__value < other.__value
         other = EthAddr(other)
-        return self.raw < other.raw
+        return self.__value < other.__value
 
     def __hash__ (self):
         return hash(self.__value)
 
+    def __copy__ (self):
+        # EthAddr objects are immutable, so copies can just share them
+        return self
+
+    def __deepcopy__ (self, memo):
+        return self
+
     def __repr__ (self):
         return self.__class__.__name__ + "('" + self.toStr() + "')"
 
@@ -158,6 +206,23 @@ ethaddr = EthAddr
 macaddr = EthAddr
 
 
+def _ipv4_to_int(addr):
+    """
+    Return the 32-bit integer value of an IPv4 address given as an int,
+    IPv4Address, 4 raw bytes, or anything else IPv4Address accepts.
+    Header classes keep addresses in this form and only build an
+    IPv4Address object when one is asked for.
+    """
+    if type(addr) is int:
+        if 0 <= addr <= 0xffffffff:
+            return addr
+    elif isinstance(addr, IPv4Address):
+        return int(addr)
+    elif type(addr) is bytes and len(addr) == 4:
+        return int.from_bytes(addr, 'big')
+    return int(IPv4Address(addr))
+
+
 class SpecialIPv6Addr(Enum):
     UNDEFINED = ip_address('::')
     ALL_NODES_LINK_LOCAL = ip_address('ff02::1')
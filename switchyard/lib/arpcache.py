@@ -0,0 +1,228 @@
+import time
+from collections import deque
+from ipaddress import ip_address, IPv4Address, IPv6Address
+
+from .address import EthAddr, _ipv4_to_int
+from .timerwheel import TimerWheel
+
+'''
+An ARP (or IPv6 neighbor) cache for routers and hosts built on
+Switchyard.
+'''
+
+class _PendingResolution(object):
+    __slots__ = ['context', 'requests', 'interval', 'queue']
+
+    def __init__(self, context, interval, queuelen):
+        self.context = context
+        self.requests = 1
+        self.interval = interval
+        self.queue = deque(maxlen=queuelen)
+
+
+class ArpCache(object):
+    '''
+    A cache of IP address to Ethernet address mappings, along with the
+    packets waiting for addresses that are being resolved.
+
+    Entries expire timeout seconds after they were last updated.  When
+    a packet needs to go to an address that isn't in the cache, hand it
+    to enqueue, which says whether to send an ARP request for the
+    address.  Requests that aren't answered are repeated after
+    request_interval seconds, with the interval multiplied by backoff
+    after each one, until max_requests have been sent; then the
+    resolution fails and the packets waiting on it are handed back.
+    At most queue_limit packets are kept for each address being resolved
+    (the oldest ones are dropped first).
+
+    Expiry and retransmission are driven by a timer wheel, so their cost
+    depends on the number of timers that fire rather than on the size of
+    the cache.  A program's main loop can look like this::
+
+        while True:
+            try:
+                timestamp,dev,pkt = net.recv_packet(timeout=cache.next_timeout())
+            except NoPackets:
+                pass
+            else:
+                ...  # handle the packet, including ARP replies
+            retransmit, failed = cache.expire()
+            ...  # send ARP requests again; handle failures
+
+    Addresses may be given as IPv4Address or IPv6Address objects, as
+    strings, or (for IPv4) as integers.  Times are seconds from clock,
+    which defaults to time.time; every method also accepts an explicit
+    time as now.
+    '''
+    def __init__(self, timeout=300.0, request_interval=1.0, max_requests=5,
+                 backoff=2.0, queue_limit=64, resolution=0.1,
+                 clock=time.time):
+        self._timeout = timeout
+        self._request_interval = request_interval
+        self._max_requests = max_requests
+        self._backoff = backoff
+        self._queue_limit = queue_limit
+        self._clock = clock
+        # address key -> [ethaddr, expiry time]
+        self._entries = {}
+        # address key -> _PendingResolution
+        self._pending = {}
+        self._wheel = TimerWheel(resolution, start=clock())
+        self._dropped = 0
+
+    @staticmethod
+    def _key(addr):
+        # IPv4 addresses are keyed by their integer value and IPv6
+        # addresses by the address object
+        if type(addr) is int:
+            return addr
+        if isinstance(addr, str):
+            addr = ip_address(addr)
+        if isinstance(addr, IPv6Address):
+            return addr
+        return _ipv4_to_int(addr)
+
+    @staticmethod
+    def _address(key):
+        return IPv4Address(key) if type(key) is int else key
+
+    @property
+    def dropped(self):
+        '''
+        The number of queued packets that have been dropped because too
+        many were waiting on the same address.
+        '''
+        return self._dropped
+
+    def lookup(self, addr, now=None):
+        '''
+        Return the EthAddr for addr, or None if it isn't in the cache
+        (or its entry has expired).
+        '''
+        entry = self._entries.get(self._key(addr), None)
+        if entry is None:
+            return None
+        if now is None:
+            now = self._clock()
+        if entry[1] <= now:
+            return None
+        return entry[0]
+
+    def update(self, addr, ethaddr, now=None):
+        '''
+        Add or refresh the entry for addr.  Returns a list of (packet,
+        context) tuples for the packets that were queued waiting for
+        addr, which can now be sent.
+        '''
+        if now is None:
+            now = self._clock()
+        key = self._key(addr)
+        expires = now + self._timeout
+        self._entries[key] = [EthAddr.coerce(ethaddr), expires]
+        self._wheel.schedule(('expire', key), expires)
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return []
+        self._wheel.cancel(('request', key))
+        return list(pending.queue)
+
+    def process_arp(self, arp, now=None):
+        '''
+        Update the cache from the sender addresses in an Arp header
+        (from either a request or a reply).  Returns the packets that
+        were waiting on the sender's address, as for update.
+        '''
+        return self.update(arp.senderprotoaddr, arp.senderhwaddr, now)
+
+    def remove(self, addr):
+        '''
+        Remove the entry for addr.  Raises KeyError if there isn't one.
+        '''
+        key = self._key(addr)
+        del self._entries[key]
+        self._wheel.cancel(('expire', key))
+
+    def enqueue(self, addr, packet, context=None, now=None):
+        '''
+        Queue packet until addr is resolved.  context can be anything
+        that's needed to send the packet or the ARP requests for addr
+        (e.g., the outgoing interface); it's handed back along with the
+        packet.  Returns True if this is the first packet waiting on
+        addr, in which case the caller should send an ARP request for
+        it now, and False if a request is already outstanding.
+        '''
+        key = self._key(addr)
+        pending = self._pending.get(key, None)
+        if pending is not None:
+            if len(pending.queue) == pending.queue.maxlen:
+                self._dropped += 1
+            pending.queue.append((packet, context))
+            return False
+        if now is None:
+            now = self._clock()
+        pending = _PendingResolution(context, self._request_interval,
+                                     self._queue_limit)
+        pending.queue.append((packet, context))
+        self._pending[key] = pending
+        self._wheel.schedule(('request', key), now + pending.interval)
+        return True
+
+    def pending(self, addr):
+        '''
+        Return True if addr is being resolved.
+        '''
+        return self._key(addr) in self._pending
+
+    def expire(self, now=None):
+        '''
+        Remove expired entries and handle unanswered ARP requests.
+        Returns two lists: (address, context) tuples for the addresses
+        that need another ARP request sent now, and (address, packets)
+        tuples for the addresses whose resolution has failed, where
+        packets is a list of (packet, context) tuples that were waiting
+        on the address.
+        '''
+        if now is None:
+            now = self._clock()
+        retransmit = []
+        failed = []
+        for kind, key in self._wheel.expire(now):
+            if kind == 'expire':
+                del self._entries[key]
+                continue
+            pending = self._pending[key]
+            if pending.requests >= self._max_requests:
+                del self._pending[key]
+                failed.append((self._address(key), list(pending.queue)))
+                continue
+            pending.requests += 1
+            pending.interval *= self._backoff
+            self._wheel.schedule(('request', key), now + pending.interval)
+            retransmit.append((self._address(key), pending.context))
+        return retransmit, failed
+
+    def next_timeout(self, now=None):
+        '''
+        Return the number of seconds until expire next has something to
+        do, or None if no entries or requests are outstanding.  This is
+        meant to be used as the timeout for net.recv_packet.
+        '''
+        deadline = self._wheel.next_deadline()
+        if deadline is None:
+            return None
+        if now is None:
+            now = self._clock()
+        return max(0.0, deadline - now)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, addr):
+        return self.lookup(addr) is not None
+
+    def __iter__(self):
+        '''
+        Yield (address, EthAddr) tuples for the entries in the cache.
+        '''
+        for key, entry in list(self._entries.items()):
+            yield self._address(key), entry[0]
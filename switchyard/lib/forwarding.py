@@ -0,0 +1,324 @@
+from ipaddress import ip_address, ip_network, IPv4Address, IPv6Address, \
+    IPv4Network, IPv6Network
+from collections import namedtuple
+
+'''
+A longest-prefix-match forwarding table for IPv4 and IPv6.
+
+Routes are kept in a multibit trie with controlled prefix expansion, in
+the style of the DIR-24-8 scheme used in hardware routers: IPv4
+addresses are split into strides of 16, 8 and 8 bits (IPv6 into a 16
+bit stride followed by 8 bit strides), and each route is expanded into
+every slot it covers in the trie node for its stride.  A lookup is then
+one dict probe per stride (at most three for IPv4) no matter how many
+routes are in the table.  Trie nodes are sparse dicts, so memory use
+grows with the number of routes rather than with the address space.
+
+References:
+    Gupta, Lin, and McKeown.  "Routing Lookups in Hardware at Memory
+        Access Speeds", IEEE INFOCOM 1998.
+    Srinivasan and Varghese.  "Fast Address Lookups Using Controlled
+        Prefix Expansion", ACM TOCS 17(1), 1999.
+'''
+
+ForwardingEntry = namedtuple('ForwardingEntry', ['nexthop', 'interface'])
+
+
+class _TrieNode(object):
+    # slots maps an index within the node's stride to a list of
+    # [prefixlen, value, child node], where prefixlen is the length of
+    # the longest route in this node covering the index, or -1 if none
+    # does.  routes maps (first index, prefixlen) to the value of each
+    # route stored in this node, so that slots can be repainted when a
+    # route is deleted.
+    __slots__ = ['slots', 'routes']
+
+    def __init__(self):
+        self.slots = {}
+        self.routes = {}
+
+
+def _make_levels(width, strides):
+    # return the (shift, mask) used to index each level of the trie, and
+    # a map from prefix length to (level, shift, mask, end) for the
+    # node that holds routes of that length, where end is the number of
+    # leading address bits that have been used up after that level.
+    levels = []
+    placement = {}
+    end = 0
+    for level, stride in enumerate(strides):
+        start, end = end, end + stride
+        shift, mask = width - end, (1 << stride) - 1
+        levels.append((shift, mask))
+        for length in range(start + 1, end + 1):
+            placement[length] = (level, shift, mask, end)
+    return levels, placement
+
+
+class ForwardingTable(object):
+    '''
+    A longest-prefix-match table mapping IPv4 and IPv6 network prefixes
+    to arbitrary values (for example, a ForwardingEntry holding a next
+    hop address and interface name).
+
+    Prefixes can be given as IPv4Network/IPv6Network objects or anything
+    else ip_network accepts (e.g., "10.0.0.0/8" or "10.0.0.0/255.0.0.0");
+    host bits are ignored.  Addresses to look up can be IPv4Address or
+    IPv6Address objects, strings, or integers (e.g., IPv4.dst_int), which
+    are taken to be IPv4 addresses unless version=6 is given.
+    '''
+    __slots__ = ['_roots', '_defaults', '_count']
+
+    _levels = {}
+    _placement = {}
+    _levels[4], _placement[4] = _make_levels(32, (16, 8, 8))
+    _levels[6], _placement[6] = _make_levels(128, (16,) + (8,) * 14)
+
+    def __init__(self, routes=None):
+        self._roots = { 4: _TrieNode(), 6: _TrieNode() }
+        # zero-length prefixes, stored as [0, value, None] like a slot
+        self._defaults = { 4: None, 6: None }
+        self._count = 0
+        if routes is not None:
+            self.update(routes)
+
+    @staticmethod
+    def _prefix(prefix):
+        if not isinstance(prefix, (IPv4Network, IPv6Network)):
+            prefix = ip_network(prefix, strict=False)
+        return prefix.version, int(prefix.network_address), prefix.prefixlen
+
+    @staticmethod
+    def _network(version, bits, length):
+        if version == 4:
+            return IPv4Network("{}/{}".format(IPv4Address(bits), length))
+        return IPv6Network("{}/{}".format(IPv6Address(bits), length))
+
+    def _descend(self, version, bits, level, create):
+        # return the node at the given level on the way to bits, along
+        # with the (node, index) pairs leading to it.  If create is
+        # False and there's no such node, the node returned is None.
+        node = self._roots[version]
+        path = []
+        for shift, mask in self._levels[version][:level]:
+            idx = (bits >> shift) & mask
+            slot = node.slots.get(idx, None)
+            if slot is None or slot[2] is None:
+                if not create:
+                    return None, path
+                if slot is None:
+                    slot = node.slots[idx] = [-1, None, None]
+                slot[2] = _TrieNode()
+            path.append((node, idx))
+            node = slot[2]
+        return node, path
+
+    def _find(self, version, bits, length):
+        # return the node holding the route for a non-zero length
+        # prefix, the route's key in the node, and the path to the node
+        level, shift, mask, end = self._placement[version][length]
+        node, path = self._descend(version, bits, level, False)
+        key = ((bits >> shift) & mask, length)
+        if node is None or key not in node.routes:
+            return None, key, path
+        return node, key, path
+
+    def insert(self, prefix, value):
+        '''
+        Add a route for prefix, or replace the value stored for it.
+        '''
+        version, bits, length = self._prefix(prefix)
+        if length == 0:
+            if self._defaults[version] is None:
+                self._count += 1
+            self._defaults[version] = [0, value, None]
+            return
+
+        level, shift, mask, end = self._placement[version][length]
+        node, _ = self._descend(version, bits, level, True)
+        first = (bits >> shift) & mask
+        if (first, length) not in node.routes:
+            self._count += 1
+        node.routes[(first, length)] = value
+        slots = node.slots
+        for idx in range(first, first + (1 << (end - length))):
+            slot = slots.get(idx, None)
+            if slot is None:
+                slots[idx] = [length, value, None]
+            elif slot[0] <= length:
+                slot[0] = length
+                slot[1] = value
+
+    def update(self, routes):
+        '''
+        Insert each (prefix, value) pair from the iterable routes.
+        '''
+        for prefix, value in routes:
+            self.insert(prefix, value)
+
+    def delete(self, prefix):
+        '''
+        Remove the route for prefix.  Raises KeyError if there is no
+        route for exactly that prefix.
+        '''
+        version, bits, length = self._prefix(prefix)
+        if length == 0:
+            if self._defaults[version] is None:
+                raise KeyError(prefix)
+            self._defaults[version] = None
+            self._count -= 1
+            return
+
+        node, key, path = self._find(version, bits, length)
+        if node is None:
+            raise KeyError(prefix)
+        del node.routes[key]
+        self._count -= 1
+
+        # the slots covered by the route fall back to the longest
+        # shorter route in the same node, which covers all of them
+        level, shift, mask, end = self._placement[version][length]
+        first = key[0]
+        fallback = (-1, None)
+        for shorter in range(length - 1, end - mask.bit_length(), -1):
+            span = end - shorter
+            shorterkey = (first >> span << span, shorter)
+            if shorterkey in node.routes:
+                fallback = (shorter, node.routes[shorterkey])
+                break
+        slots = node.slots
+        for idx in range(first, first + (1 << (end - length))):
+            slot = slots[idx]
+            if slot[0] != length:
+                continue
+            if fallback[0] < 0 and slot[2] is None:
+                del slots[idx]
+            else:
+                slot[0], slot[1] = fallback
+
+        # remove nodes that have been left empty
+        while path and not node.slots:
+            node, idx = path.pop()
+            slot = node.slots[idx]
+            slot[2] = None
+            if slot[0] < 0:
+                del node.slots[idx]
+
+    def _match(self, addr, version):
+        # return the slot for the longest matching prefix (or None), and
+        # the address as an int along with its version
+        if type(addr) is not int:
+            if not isinstance(addr, (IPv4Address, IPv6Address)):
+                addr = ip_address(addr)
+            version = addr.version
+            addr = int(addr)
+        best = self._defaults[version]
+        node = self._roots[version]
+        for shift, mask in self._levels[version]:
+            slot = node.slots.get((addr >> shift) & mask, None)
+            if slot is None:
+                break
+            if slot[0] >= 0:
+                best = slot
+            node = slot[2]
+            if node is None:
+                break
+        return best, addr, version
+
+    def lookup(self, addr, version=4):
+        '''
+        Return the value stored for the longest prefix that matches
+        addr, or None if no route matches.
+        '''
+        best = self._match(addr, version)[0]
+        return None if best is None else best[1]
+
+    def longest_match(self, addr, version=4):
+        '''
+        Return a (network, value) tuple for the longest prefix that
+        matches addr, or None if no route matches.
+        '''
+        best, addr, version = self._match(addr, version)
+        if best is None:
+            return None
+        width = 32 if version == 4 else 128
+        length = best[0]
+        bits = addr >> (width - length) << (width - length) if length else 0
+        return self._network(version, bits, length), best[1]
+
+    def load(self, source):
+        '''
+        Add routes from a forwarding table file in the format used in
+        the Switchyard router exercises: each line holds a network
+        address, subnet mask, next hop address and interface name,
+        separated by whitespace.  Blank lines and lines starting with
+        # are skipped.  Each route is stored as a ForwardingEntry.
+        source may be a filename or an iterable of lines (e.g., an open
+        file).
+        '''
+        if isinstance(source, str):
+            with open(source) as infile:
+                return self.load(infile)
+        for lineno, line in enumerate(source, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split()
+            if len(fields) != 4:
+                raise ValueError("Line {} of forwarding table should have "
+                    "4 fields, not {}: {}".format(lineno, len(fields), line))
+            net, mask, nexthop, intf = fields
+            self.insert("{}/{}".format(net, mask),
+                ForwardingEntry(ip_address(nexthop), intf))
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, prefix):
+        version, bits, length = self._prefix(prefix)
+        if length == 0:
+            return self._defaults[version] is not None
+        return self._find(version, bits, length)[0] is not None
+
+    def __getitem__(self, prefix):
+        version, bits, length = self._prefix(prefix)
+        if length == 0:
+            if self._defaults[version] is None:
+                raise KeyError(prefix)
+            return self._defaults[version][1]
+        node, key, _ = self._find(version, bits, length)
+        if node is None:
+            raise KeyError(prefix)
+        return node.routes[key]
+
+    def __setitem__(self, prefix, value):
+        self.insert(prefix, value)
+
+    def __delitem__(self, prefix):
+        self.delete(prefix)
+
+    def __iter__(self):
+        '''
+        Yield a (network, value) tuple for each route: IPv4 routes
+        before IPv6, and otherwise ordered by prefix length.
+        '''
+        for version, width in ((4, 32), (6, 128)):
+            if self._defaults[version] is not None:
+                yield self._network(version, 0, 0), \
+                    self._defaults[version][1]
+            routes = []
+            stack = [(self._roots[version], 0, 0)]
+            while stack:
+                node, bits, level = stack.pop()
+                shift, _ = self._levels[version][level]
+                for (first, length), value in node.routes.items():
+                    routes.append((length, bits | first << shift, value))
+                for idx, slot in node.slots.items():
+                    if slot[2] is not None:
+                        stack.append((slot[2], bits | idx << shift, level+1))
+            routes.sort(key=lambda r: (r[0], r[1]))
+            for length, bits, value in routes:
+                yield self._network(version, bits, length), value
+
+    def __str__(self):
+        return '\n'.join("{} {}".format(net, value) for net, value in self)
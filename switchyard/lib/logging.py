@@ -25,6 +25,13 @@ def log_debug(s):
     '''Convenience function for debugging message.'''
     logging.debug("{}".format(s))
 
+def log_debug_enabled():
+    '''
+    Return True if debugging messages are being logged, so that
+    expensive ones can be skipped otherwise.
+    '''
+    return logging.getLogger().isEnabledFor(logging.DEBUG)
+
 def log_warn(s):
     '''Convenience function for warning message.'''
     with magenta():
@@ -0,0 +1,170 @@
+import time
+from collections import OrderedDict, namedtuple
+
+from .address import EthAddr
+
+'''
+A MAC address learning table for Ethernet switches built on Switchyard.
+'''
+
+MacTableStats = namedtuple('MacTableStats',
+    ['hits', 'misses', 'evictions', 'expirations'])
+
+
+class MacLearningTable(object):
+    '''
+    A table mapping Ethernet addresses (optionally along with a VLAN id)
+    to the port on which each was last seen as a source address.
+
+    Entries are kept in the order they were last learned, so both
+    eviction of the least recently learned entry when the table is at
+    capacity and removal of entries that haven't been learned again
+    within timeout seconds take constant time per entry removed.  A
+    timeout of None means entries don't age out.
+
+    The table counts lookup hits and misses, entries evicted to make
+    room for new ones, and entries removed because they aged out (see
+    the stats property).
+
+    Addresses may be given as EthAddr objects, 6 raw bytes, or strings.
+    Times are seconds from clock, which defaults to time.time; learn,
+    lookup and age also accept an explicit time as now (e.g., the
+    timestamp returned by net.recv_packet).
+    '''
+    def __init__(self, capacity=4096, timeout=300.0, clock=time.time):
+        if capacity < 1:
+            raise ValueError("MAC table capacity must be at least 1")
+        self._capacity = capacity
+        self._timeout = timeout
+        self._clock = clock
+        # key -> [port, time last learned]
+        self._table = OrderedDict()
+        self.reset_stats()
+
+    @staticmethod
+    def _key(mac, vlan):
+        if type(mac) is bytes and len(mac) == 6:
+            raw = mac
+        elif isinstance(mac, EthAddr):
+            raw = mac.raw
+        else:
+            raw = EthAddr(mac).raw
+        return raw if vlan is None else (raw, vlan)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def stats(self):
+        '''
+        A MacTableStats named tuple of hits, misses, evictions and
+        expirations counted since the table was created (or since
+        reset_stats was called).
+        '''
+        return MacTableStats(self._hits, self._misses, self._evictions,
+                             self._expirations)
+
+    def reset_stats(self):
+        self._hits = self._misses = 0
+        self._evictions = self._expirations = 0
+
+    def learn(self, mac, port, vlan=None, now=None):
+        '''
+        Record that mac (on vlan, if given) was seen on port.
+        '''
+        if now is None:
+            now = self._clock()
+        key = self._key(mac, vlan)
+        table = self._table
+        entry = table.get(key, None)
+        if entry is not None:
+            entry[0] = port
+            entry[1] = now
+            table.move_to_end(key)
+            return
+        if len(table) >= self._capacity:
+            table.popitem(last=False)
+            self._evictions += 1
+        table[key] = [port, now]
+
+    def lookup(self, mac, vlan=None, now=None):
+        '''
+        Return the port mac (on vlan, if given) was last seen on, or
+        None if it isn't in the table or its entry has aged out.
+        '''
+        entry = self._table.get(self._key(mac, vlan), None)
+        if entry is not None and self._timeout is not None:
+            if now is None:
+                now = self._clock()
+            if entry[1] + self._timeout <= now:
+                entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return entry[0]
+
+    def age(self, now=None):
+        '''
+        Remove all entries that haven't been learned within the timeout.
+        Only the entries removed are looked at.  Returns the number of
+        entries removed.
+        '''
+        if self._timeout is None:
+            return 0
+        if now is None:
+            now = self._clock()
+        cutoff = now - self._timeout
+        table = self._table
+        removed = 0
+        while table:
+            key = next(iter(table))
+            if table[key][1] > cutoff:
+                break
+            del table[key]
+            removed += 1
+        self._expirations += removed
+        return removed
+
+    def remove(self, mac, vlan=None):
+        '''
+        Remove the entry for mac (on vlan, if given).  Raises KeyError
+        if there isn't one.
+        '''
+        del self._table[self._key(mac, vlan)]
+
+    def remove_port(self, port):
+        '''
+        Remove all entries for port, e.g., when its link goes down.
+        Returns the number of entries removed.
+        '''
+        keys = [ key for key, entry in self._table.items() if entry[0] == port ]
+        for key in keys:
+            del self._table[key]
+        return len(keys)
+
+    def clear(self):
+        self._table.clear()
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, mac):
+        return self._key(mac, None) in self._table
+
+    def __iter__(self):
+        '''
+        Yield (EthAddr, vlan, port) tuples for the entries in the table,
+        least recently learned first.  vlan is None for entries learned
+        without one.
+        '''
+        for key, entry in list(self._table.items()):
+            if isinstance(key, tuple):
+                yield EthAddr(key[0]), key[1], entry[0]
+            else:
+                yield EthAddr(key), None, entry[0]
@@ -3,7 +3,6 @@ import ssl
 from threading import Thread
 import time
 from heapq import heappush, heappop, heapreplace
-from copy import deepcopy
 
 from switchyard.lib.packet import *
 from switchyard.lib.openflow import openflow10 as of10
@@ -11,6 +10,7 @@ from switchyard.lib.openflow import openflow13 as of13
 from switchyard.lib.address import *
 from switchyard.lib.logging import *
 from switchyard.lib.exceptions import *
+from switchyard.lib.ratelimit import TokenBucket
 
 
 class ControllerConnection(object):
@@ -106,7 +106,7 @@ class PacketBufferManager(object):
         if id > self._buffsize:
             raise FullBuffer()
 
-        self._buffer[id] = (port, deepcopy(pkt))
+        self._buffer[id] = (port, pkt.clone())
         return id
 
     def pop(self, id):
@@ -259,6 +259,53 @@ class FlowTable(object):
                 i += 1
         return expired
 
+class MeterTable(object):
+    '''
+    OpenFlow 1.3 meters.  Each meter has a single drop band, implemented
+    as a token bucket: packets beyond the band's rate are dropped.  As
+    in meter mod messages, rates are in kb/s (or packets/s if pktps is
+    True) and burst sizes are in kilobits (or packets); the default
+    burst size is one second's worth at the band's rate.
+    '''
+    def __init__(self, clock=time.monotonic):
+        self._meters = {}
+        self._clock = clock
+
+    def __len__(self):
+        return len(self._meters)
+
+    def __contains__(self, meter_id):
+        return meter_id in self._meters
+
+    def _band(self, rate, burst, pktps):
+        # kilobits -> bytes, since packets are charged their length
+        scale = 1 if pktps else 125
+        if burst is None:
+            burst = rate
+        return TokenBucket(rate * scale, burst * scale, self._clock), pktps
+
+    def add(self, meter_id, rate, burst=None, pktps=False):
+        if meter_id in self._meters:
+            raise ValueError("Meter {} already exists".format(meter_id))
+        self._meters[meter_id] = self._band(rate, burst, pktps)
+
+    def modify(self, meter_id, rate, burst=None, pktps=False):
+        if meter_id not in self._meters:
+            raise KeyError(meter_id)
+        self._meters[meter_id] = self._band(rate, burst, pktps)
+
+    def delete(self, meter_id):
+        del self._meters[meter_id]
+
+    def apply(self, meter_id, pkt, now=None):
+        '''
+        Return True if pkt gets through meter meter_id, and False if
+        it should be dropped.
+        '''
+        bucket, pktps = self._meters[meter_id]
+        return bucket.conforms(1 if pktps else len(pkt), now)
+
+
 class OpenflowSwitch(object):
     '''
     An Openflow v1.0 or v1.3 switch.
@@ -283,7 +330,7 @@ class OpenflowSwitch(object):
         self._flags = self._oflib.OpenflowConfigFlags.FragNormal
         self._tables = [ FlowTable(callbacks) ]
         self._group_table = FlowTable(callbacks)
-        self._meter_table = None # not supported yet
+        self._meter_table = MeterTable()
         self._action_callbacks = callbacks
 
     def add_controller(self, host, port, usetls=True):
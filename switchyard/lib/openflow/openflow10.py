@@ -1,11 +1,11 @@
 from enum import IntEnum
 import struct
 from math import ceil
-from ipaddress import ip_network, ip_address
+from ipaddress import ip_address
 
 from ..packet import PacketHeaderBase, Packet, IPProtocol, \
     EtherType, Ethernet, Vlan, IPv6, IPv4, ICMP, ICMPv6, TCP, UDP, Arp
-from ..address import EthAddr, IPv4Address
+from ..address import EthAddr, IPv4Address, _ipv4_to_int
 from ..logging import log_debug
 
 def _make_bitmap(xset):
@@ -148,7 +148,8 @@ class OpenflowPhysicalPort(OpenflowStruct):
     __slots__ = ['_portnum', '_hwaddr', '_name', '_config',
                  '_state', '_curr', '_advertised', '_supported', '_peer']
     _PACKFMT = '!H6s16sIIIIII'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, portnum=0, hwaddr='', name=''):
         OpenflowStruct.__init__(self)
@@ -166,7 +167,7 @@ class OpenflowPhysicalPort(OpenflowStruct):
         self._peer = set()
 
     def to_bytes(self):
-        return struct.pack(OpenflowPhysicalPort._PACKFMT,
+        return OpenflowPhysicalPort._STRUCT.pack(
                            self._portnum, self._hwaddr.raw, self._name.encode(
                                'utf8'),
                            _make_bitmap(self._config), _make_bitmap(self._state), 
@@ -177,8 +178,7 @@ class OpenflowPhysicalPort(OpenflowStruct):
         if len(raw) < OpenflowPhysicalPort._MINLEN:
             raise Exception(
                 "Not enough raw data to unpack OpenflowPhysicalPort object")
-        fields = struct.unpack(
-            OpenflowPhysicalPort._PACKFMT, raw[:OpenflowPhysicalPort._MINLEN])
+        fields = OpenflowPhysicalPort._STRUCT.unpack_from(raw)
         self.portnum = fields[0]
         self.hwaddr = fields[1]
         self.name = fields[2].decode('utf8')
@@ -308,7 +308,8 @@ class OpenflowQueuePropertyTypes(IntEnum):
 class OpenflowQueueMinRateProperty(OpenflowStruct):
     __slots__ = ['_rate']
     _PACKFMT = '!HH4xH6x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, rate=0):
         self._rate = int(rate)
@@ -325,15 +326,14 @@ class OpenflowQueueMinRateProperty(OpenflowStruct):
         return OpenflowQueueMinRateProperty._MINLEN
 
     def to_bytes(self):
-        return struct.pack(OpenflowQueueMinRateProperty._PACKFMT,
+        return OpenflowQueueMinRateProperty._STRUCT.pack(
             OpenflowQueuePropertyTypes.MinRate.value, OpenflowQueueMinRateProperty._MINLEN,
             self._rate)
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowQueueMinRateProperty._MINLEN:
             raise Exception("Not enough data to unpack OpenflowQueueMinRateProperty")
-        fields = struct.unpack(OpenflowQueueMinRateProperty._PACKFMT, 
-            raw[:OpenflowQueueMinRateProperty._MINLEN])
+        fields = OpenflowQueueMinRateProperty._STRUCT.unpack_from(raw)
         assert(fields[0] == OpenflowQueuePropertyTypes.MinRate.value)
         assert(fields[1] == OpenflowQueueMinRateProperty._MINLEN)
         self.rate = fields[2]
@@ -347,7 +347,8 @@ _QueuePropertyTypeClassMap = {
 class OpenflowPacketQueue(OpenflowStruct):
     __slots__ = ['_queue_id', '_properties']
     _PACKFMT = '!IHxx'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, queue_id=0):
         OpenflowStruct.__init__(self)
@@ -371,13 +372,13 @@ class OpenflowPacketQueue(OpenflowStruct):
 
     def to_bytes(self):
         rawprops = b''.join(p.to_bytes() for p in self._properties)
-        return struct.pack(OpenflowPacketQueue._PACKFMT, self._queue_id,
+        return OpenflowPacketQueue._STRUCT.pack(self._queue_id,
             len(rawprops) + OpenflowPacketQueue._MINLEN) + rawprops
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowPacketQueue._MINLEN:
             raise Exception("Not enough data to unpack OpenflowPacketQueue")
-        fields = struct.unpack(OpenflowPacketQueue._PACKFMT, raw[:OpenflowPacketQueue._MINLEN])
+        fields = OpenflowPacketQueue._STRUCT.unpack_from(raw)
         self.queue_id = fields[0]
         raw = raw[OpenflowPacketQueue._MINLEN:]
         self._properties = []
@@ -396,8 +397,9 @@ class OpenflowMatch(OpenflowStruct):
                  '_dl_vlan', '_dl_vlan_pcp', '_dl_type',
                  '_nw_tos', '_nw_proto', '_nw_src', '_nw_dst',
                  '_tp_src', '_tp_dst']
-    _PACKFMT = '!IH6s6sHBxHBB2x4s4sHH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _PACKFMT = '!IH6s6sHBxHBB2xIIHH'
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     _match_field_to_packet = {
         'dl_src': ((Ethernet, 'src'),),
@@ -425,8 +427,8 @@ class OpenflowMatch(OpenflowStruct):
         self._nw_proto = IPProtocol.ICMP
         self._nw_src_wildcard = 0
         self._nw_dst_wildcard = 0
-        self._nw_src = IPv4Address(0)
-        self._nw_dst = IPv4Address(0)
+        self._nw_src = 0
+        self._nw_dst = 0
         self._tp_src = 0
         self._tp_dst = 0
         OpenflowStruct.__init__(self, **kwargs)
@@ -437,17 +439,16 @@ class OpenflowMatch(OpenflowStruct):
 
     def to_bytes(self):
         wildbits = _make_bitmap(self._wildcards)
-        return struct.pack(OpenflowMatch._PACKFMT,
+        return OpenflowMatch._STRUCT.pack(
                            wildbits, self.in_port,  self.dl_src.raw, self.dl_dst.raw,
                            self.dl_vlan, self.dl_vlan_pcp, self.dl_type.value,
-                           self.nw_tos, self.nw_proto.value, self.nw_src.packed,
-                           self.nw_dst.packed, self.tp_src, self.tp_dst)
+                           self.nw_tos, self.nw_proto.value, self._nw_src,
+                           self._nw_dst, self.tp_src, self.tp_dst)
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowMatch._MINLEN:
             raise Exception("Not enough data to unpack OpenflowMatch")
-        fields = struct.unpack(
-            OpenflowMatch._PACKFMT, raw[:OpenflowMatch._MINLEN])
+        fields = OpenflowMatch._STRUCT.unpack_from(raw)
         self._wildcards = set()
         if fields[0] == OpenflowWildcard.All.value:
             self.wildcard_all()
@@ -522,11 +523,11 @@ class OpenflowMatch(OpenflowStruct):
             other = getattr(othermatch, a)
 
             if a == '_nw_src' or a == '_nw_dst':
-                # FIXME: clean this up
+                # addresses are kept as ints; compare the network bits
                 wattr = "{}_wildcard".format(a)
                 otherbits = 32 - getattr(othermatch, wattr)
-                othernet = ip_network("{}/{}".format(getattr(othermatch, a), otherbits), strict=False)
-                iswildcarded = curr in othernet
+                mask = (0xffffffff << (32 - otherbits)) & 0xffffffff
+                iswildcarded = (curr & mask) == (other & mask)
             else:
                 wc = _wildcard_attr_map[a].name
                 iswildcarded = wc in othermatch.wildcards
@@ -548,21 +549,25 @@ class OpenflowMatch(OpenflowStruct):
                 # FIXME: clean me up.  lots of dup w/above and below :(
                 wattr = "{}_wildcard".format(mf)
                 bits = 32 - getattr(self, wattr)
-                if bits < 32:
-                    netaddr = ip_network("{}/{}".format(getattr(self, mf), bits), strict=False)
-                    for pktcls,field in pkttuple: 
-                        if pkt.has_header(pktcls):
-                            match.append(getattr(pkt[pktcls], field) in netaddr)
-                    continue
+                mask = (0xffffffff << (32 - bits)) & 0xffffffff
+                value = getattr(self, mf) & mask
+                for pktcls,field in pkttuple: 
+                    if pkt.has_header(pktcls):
+                        # IPv4 addresses in headers are available as
+                        # ints (IPv6 ones aren't, and never match)
+                        addr = getattr(pkt[pktcls], "{}_int".format(field), None)
+                        match.append(addr is not None and addr & mask == value)
+                continue
 
             # if attribute is simple wildcard, just ignore the attr
             elif _wildcard_attr_map[mf].value & wildbits:
                 continue
 
             # compare concrete values in packet with match object value
+            value = getattr(self, mf[1:])
             for pktcls,field in pkttuple:
                 if pkt.has_header(pktcls):
-                    match.append(getattr(pkt[pktcls], field) == getattr(self, mf))
+                    match.append(getattr(pkt[pktcls], field) == value)
         return all(match)
 
     @staticmethod
@@ -697,19 +702,19 @@ class OpenflowMatch(OpenflowStruct):
 
     @property
     def nw_src(self):
-        return self._nw_src
+        return IPv4Address(self._nw_src)
 
     @nw_src.setter
     def nw_src(self, value):
-        self._nw_src = IPv4Address(value)
+        self._nw_src = _ipv4_to_int(value)
 
     @property
     def nw_dst(self):
-        return self._nw_dst
+        return IPv4Address(self._nw_dst)
 
     @nw_dst.setter
     def nw_dst(self, value):
-        self._nw_dst = ip_address(value)
+        self._nw_dst = _ipv4_to_int(value)
 
     @property
     def tp_src(self):
@@ -799,7 +804,8 @@ class OpenflowActionType(IntEnum):
 class OpenflowAction(OpenflowStruct):
     __slots__ = ['_type','_len']
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         super().__init__()
@@ -823,12 +829,11 @@ class OpenflowAction(OpenflowStruct):
         self._len = int(value)    
 
     def from_bytes(self, raw):
-        self.type, self.len = struct.unpack(OpenflowAction._PACKFMT, 
-            raw[:OpenflowAction._MINLEN]) 
+        self.type, self.len = OpenflowAction._STRUCT.unpack_from(raw)
         return raw[OpenflowAction._MINLEN:]
 
     def to_bytes(self):
-        return struct.pack(OpenflowAction._PACKFMT, self._type.value, 
+        return OpenflowAction._STRUCT.pack(self._type.value, 
                            self._len)
 
     def size(self):
@@ -848,7 +853,8 @@ class ActionStripVlan(OpenflowAction):
 class ActionOutput(OpenflowAction):
     __slots__ = ['_port', '_maxlen']
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, port=OpenflowPort.NoPort):
         super().__init__()
@@ -875,11 +881,11 @@ class ActionOutput(OpenflowAction):
 
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        self.port, self.maxlen = struct.unpack(ActionOutput._PACKFMT, raw[:ActionOutput._MINLEN])
+        self.port, self.maxlen = ActionOutput._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
         return super().to_bytes() + \
-            struct.pack(ActionOutput._PACKFMT, self._port, self._maxlen)
+            ActionOutput._STRUCT.pack(self._port, self._maxlen)
 
     def __call__(self, **kwargs):
         net = kwargs['net']
@@ -912,7 +918,8 @@ class ActionOutput(OpenflowAction):
 class ActionEnqueue(OpenflowAction):
     __slots__ = ['_port', '_queue_id']
     _PACKFMT = '!H6xI'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, port=OpenflowPort.NoPort, queue_id=0):
         super().__init__()
@@ -939,11 +946,10 @@ class ActionEnqueue(OpenflowAction):
 
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        self.port, self.queue_id = struct.unpack(ActionEnqueue._PACKFMT, 
-            raw[:ActionEnqueue._MINLEN]) 
+        self.port, self.queue_id = ActionEnqueue._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionEnqueue._PACKFMT, 
+        return super().to_bytes() + ActionEnqueue._STRUCT.pack(
             self._port, self._queue_id)
 
     def __call__(self, **kwargs):
@@ -952,7 +958,8 @@ class ActionEnqueue(OpenflowAction):
 class ActionVlanVid(OpenflowAction):
     __slots__ = ['_vlan_vid']
     _PACKFMT = '!H2x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, vlan_vid=0):
         super().__init__()
@@ -970,11 +977,10 @@ class ActionVlanVid(OpenflowAction):
     
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        (self.vlan_vid,) = struct.unpack(ActionVlanVid._PACKFMT, 
-            raw[:ActionVlanVid._MINLEN])
+        (self.vlan_vid,) = ActionVlanVid._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionVlanVid._PACKFMT, 
+        return super().to_bytes() + ActionVlanVid._STRUCT.pack(
             self._vlan_vid)
 
     def __call__(self, **kwargs):
@@ -984,7 +990,8 @@ class ActionVlanVid(OpenflowAction):
 class ActionVlanPcp(OpenflowAction):
     __slots__ = ['_vlan_pcp']
     _PACKFMT = '!B3x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, vlan_pcp=0):
         super().__init__()
@@ -1002,11 +1009,10 @@ class ActionVlanPcp(OpenflowAction):
     
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        (self.vlan_pcp,) = struct.unpack(ActionVlanPcp._PACKFMT, 
-            raw[:ActionVlanPcp._MINLEN]) 
+        (self.vlan_pcp,) = ActionVlanPcp._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionVlanPcp._PACKFMT, 
+        return super().to_bytes() + ActionVlanPcp._STRUCT.pack(
             self._vlan_pcp)
 
     def __call__(self, **kwargs):
@@ -1015,7 +1021,8 @@ class ActionVlanPcp(OpenflowAction):
 class ActionDlAddr(OpenflowAction):
     __slots__ = ['_dl_addr']
     _PACKFMT = '!6s6x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, srcdst=OpenflowActionType.SetDlSrc, dl_addr="00:00:00:00:00:00"):
         super().__init__()
@@ -1035,11 +1042,10 @@ class ActionDlAddr(OpenflowAction):
 
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        (self.dl_addr,) = struct.unpack(ActionDlAddr._PACKFMT, 
-            raw[:ActionDlAddr._MINLEN]) 
+        (self.dl_addr,) = ActionDlAddr._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionDlAddr._PACKFMT, 
+        return super().to_bytes() + ActionDlAddr._STRUCT.pack(
             self._dl_addr.packed)
 
     def __call__(self, **kwargs):
@@ -1048,7 +1054,8 @@ class ActionDlAddr(OpenflowAction):
 class ActionNwAddr(OpenflowAction):
     __slots__ = ['_nw_addr']
     _PACKFMT = '!4s'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, srcdst=OpenflowActionType.SetNwSrc, nw_addr="0.0.0.0"):
         super().__init__()
@@ -1068,11 +1075,10 @@ class ActionNwAddr(OpenflowAction):
 
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        (self.nw_addr,) = struct.unpack(ActionNwAddr._PACKFMT, 
-            raw[:ActionNwAddr._MINLEN]) 
+        (self.nw_addr,) = ActionNwAddr._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionNwAddr._PACKFMT, 
+        return super().to_bytes() + ActionNwAddr._STRUCT.pack(
             self._nw_addr.packed)
 
     def __call__(self, **kwargs):
@@ -1082,7 +1088,8 @@ class ActionNwAddr(OpenflowAction):
 class ActionNwTos(OpenflowAction):
     __slots__ = ['_nw_tos']
     _PACKFMT = '!B3x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, tos=0x0):
         super().__init__()
@@ -1100,11 +1107,10 @@ class ActionNwTos(OpenflowAction):
 
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        (self.nw_tos,) = struct.unpack(ActionNwTos._PACKFMT, 
-            raw[:ActionNwTos._MINLEN]) 
+        (self.nw_tos,) = ActionNwTos._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionNwTos._PACKFMT, self._nw_tos)
+        return super().to_bytes() + ActionNwTos._STRUCT.pack(self._nw_tos)
 
     def __call__(self, **kwargs):
         raise Exception("Not implemented")
@@ -1113,7 +1119,8 @@ class ActionNwTos(OpenflowAction):
 class ActionTpPort(OpenflowAction):
     __slots__ = ['_tp_port']
     _PACKFMT = '!H2x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, srcdst=OpenflowActionType.SetTpSrc, port=0):
         super().__init__()
@@ -1133,10 +1140,10 @@ class ActionTpPort(OpenflowAction):
 
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        (self.tp_port,) = struct.unpack(ActionTpPort._PACKFMT, raw[:ActionTpPort._MINLEN])
+        (self.tp_port,) = ActionTpPort._STRUCT.unpack_from(raw)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(ActionTpPort._PACKFMT, self._tp_port)
+        return super().to_bytes() + ActionTpPort._STRUCT.pack(self._tp_port)
 
     def __call__(self, **kwargs):
         raise Exception("Not implemented")
@@ -1145,7 +1152,8 @@ class ActionTpPort(OpenflowAction):
 class ActionVendorHeader(OpenflowAction):
     __slots__ = ['_vendor', '_data']
     _PACKFMT = '!I'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, vendor=0xffffffff, data=b''):
         super().__init__()
@@ -1173,14 +1181,13 @@ class ActionVendorHeader(OpenflowAction):
         
     def from_bytes(self, raw):
         raw = super().from_bytes(raw)
-        fields = struct.unpack(ActionVendorHeader._PACKFMT, 
-            raw[:ActionVendorHeader._MINLEN]) 
+        fields = ActionVendorHeader._STRUCT.unpack_from(raw)
         self.vendor = fields[0]
         datalen = len(raw) - ActionVendorHeader._MINLEN
         self.data = raw[ActionVendorHeader._MINLEN:]
 
     def to_bytes(self):
-        raw = super().to_bytes() + struct.pack(ActionVendorHeader._PACKFMT, self.vendor) + \
+        raw = super().to_bytes() + ActionVendorHeader._STRUCT.pack(self.vendor) + \
             self.data
         padbytes = (self._calcdatalen() - len(self._data)) * b'\x00'
         return raw + padbytes
@@ -1268,7 +1275,8 @@ class OpenflowConfigFlags(IntEnum):
 class OpenflowSetConfig(OpenflowStruct):
     __slots__ = ['_flags', '_miss_send_len']
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         OpenflowStruct.__init__(self)
@@ -1276,14 +1284,13 @@ class OpenflowSetConfig(OpenflowStruct):
         self._miss_send_len = 1500
 
     def to_bytes(self):
-        return struct.pack(OpenflowSetConfig._PACKFMT, self._flags.value, self._miss_send_len)
+        return OpenflowSetConfig._STRUCT.pack(self._flags.value, self._miss_send_len)
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowSetConfig._MINLEN:
             raise Exception(
                 "Not enough bytes to unpack OpenflowSetConfig message")
-        fields = struct.unpack(
-            OpenflowSetConfig._PACKFMT, raw[:OpenflowSetConfig._MINLEN])
+        fields = OpenflowSetConfig._STRUCT.unpack_from(raw)
         self.flags = fields[0]
         self.miss_send_len = fields[1]
         return raw[OpenflowSetConfig._MINLEN:]
@@ -1339,7 +1346,8 @@ class OpenflowFlowMod(OpenflowStruct):
     # NB: packfmt doesn't include match struct or actions
     # those are defined within other structures
     _PACKFMT = '!QHHHHIHH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, match=None):
         OpenflowStruct.__init__(self)
@@ -1358,7 +1366,7 @@ class OpenflowFlowMod(OpenflowStruct):
 
     def to_bytes(self):
         return self._match.to_bytes() + \
-            struct.pack(OpenflowFlowMod._PACKFMT, self._cookie, self._command.value,
+            OpenflowFlowMod._STRUCT.pack(self._cookie, self._command.value,
                         self._idle_timeout, self._hard_timeout, self._priority, self._buffer_id,
                         self._out_port, self.flags) + \
             b''.join(a.to_bytes() for a in self._actions)
@@ -1369,7 +1377,7 @@ class OpenflowFlowMod(OpenflowStruct):
         self._match = OpenflowMatch()
         self.match.from_bytes(raw[:OpenflowMatch.size()])
         raw = raw[OpenflowMatch.size():] 
-        fields = struct.unpack(OpenflowFlowMod._PACKFMT, raw[:OpenflowFlowMod._MINLEN])
+        fields = OpenflowFlowMod._STRUCT.unpack_from(raw)
         self.cookie = fields[0]
         self.command = fields[1]
         self.idle_timeout = fields[2]
@@ -1469,7 +1477,8 @@ class OpenflowSwitchFeaturesReply(OpenflowStruct):
     __slots__ = ['_dpid', '_nbuffers', '_ntables', '_capabilities',
                  '_actions', '_ports']
     _PACKFMT = '!8sIBxxxII'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         OpenflowStruct.__init__(self)
@@ -1481,7 +1490,7 @@ class OpenflowSwitchFeaturesReply(OpenflowStruct):
         self._ports = []
 
     def to_bytes(self):
-        rawpkt = struct.pack(OpenflowSwitchFeaturesReply._PACKFMT,
+        rawpkt = OpenflowSwitchFeaturesReply._STRUCT.pack(
                              self._dpid, self._nbuffers, self._ntables,
                              self.capabilities, self.actions)
         for p in self._ports:
@@ -1492,8 +1501,7 @@ class OpenflowSwitchFeaturesReply(OpenflowStruct):
         if len(raw) < OpenflowSwitchFeaturesReply._MINLEN:
             raise Exception(
                 "Not enough data to unpack OpenflowSwitchFeaturesReply message")
-        fields = struct.unpack(OpenflowSwitchFeaturesReply._PACKFMT,
-                               raw[:OpenflowSwitchFeaturesReply._MINLEN])
+        fields = OpenflowSwitchFeaturesReply._STRUCT.unpack_from(raw)
         self.dpid = fields[0]
         self.nbuffers = fields[1]
         self.ntables = fields[2]
@@ -1705,7 +1713,8 @@ OpenflowErrorTypeCodes = {
 class OpenflowError(OpenflowStruct):
     __slots__ = ('_type', '_code', '_data')
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         OpenflowStruct.__init__(self)
@@ -1717,12 +1726,11 @@ class OpenflowError(OpenflowStruct):
         return OpenflowError._MINLEN + len(self.data)
 
     def to_bytes(self):
-        return struct.pack(OpenflowError._PACKFMT, self.errortype.value,
+        return OpenflowError._STRUCT.pack(self.errortype.value,
                            self.errorcode.value) + self.data
 
     def from_bytes(self, raw):
-        xtype, xcode = struct.unpack(OpenflowError._PACKFMT,
-                                     raw[:OpenflowError._MINLEN])
+        xtype, xcode = OpenflowError._STRUCT.unpack_from(raw)
         self.errortype = xtype
         self.errorcode = xcode
         self.data = raw[OpenflowError._MINLEN:]
@@ -1758,7 +1766,8 @@ class OpenflowError(OpenflowStruct):
 class OpenflowVendor(OpenflowStruct):
     __slots__ = ('_vendor', '_data')
     _PACKFMT = '!I'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         OpenflowStruct.__init__(self)
@@ -1769,11 +1778,10 @@ class OpenflowVendor(OpenflowStruct):
         return OpenflowVendor._MINLEN + len(self.data)
 
     def to_bytes(self):
-        return struct.pack(OpenflowVendor._PACKFMT, self.vendor) + self.data
+        return OpenflowVendor._STRUCT.pack(self.vendor) + self.data
 
     def from_bytes(self, raw):
-        fields = struct.unpack(OpenflowVendor._PACKFMT,
-                               raw[:OpenflowVendor._MINLEN])
+        fields = OpenflowVendor._STRUCT.unpack_from(raw)
         self.vendor = fields[0]
         self.data = raw[OpenflowVendor._MINLEN:]
 
@@ -1797,7 +1805,8 @@ class OpenflowVendor(OpenflowStruct):
 class OpenflowPortMod(OpenflowStruct):
     __slots__ = ('_port_no', '_ethaddr', '_config', '_mask', '_advertise')
     _PACKFMT = '!H6sIII4x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         OpenflowStruct.__init__(self)
@@ -1811,13 +1820,13 @@ class OpenflowPortMod(OpenflowStruct):
         return OpenflowPortMod._MINLEN
 
     def to_bytes(self):
-        return struct.pack(OpenflowPortMod._PACKFMT, self.port, self.ethaddr.raw,
+        return OpenflowPortMod._STRUCT.pack(self.port, self.ethaddr.raw,
             self.config, self.mask, self.advertise)
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowPortMod._MINLEN:
             raise Exception("Not enough bytes to unpack PortMod")
-        fields = struct.unpack(OpenflowPortMod._PACKFMT, raw)
+        fields = OpenflowPortMod._STRUCT.unpack(raw)
         self.port = fields[0]
         self.ethaddr = fields[1]
         self._config = _unpack_bitmap(fields[2], OpenflowPortConfig)
@@ -1905,6 +1914,7 @@ class PortStatusReason(IntEnum):
 class OpenflowPortStatus(OpenflowStruct):
     __slots__ = ('_reason', '_port')
     _PACKFMT = '!B7x'
+    _STRUCT = struct.Struct(_PACKFMT)
     _MINLEN = 8 + OpenflowPhysicalPort._MINLEN
 
     def __init__(self):
@@ -1916,13 +1926,13 @@ class OpenflowPortStatus(OpenflowStruct):
         return OpenflowPortStatus._MINLEN
 
     def to_bytes(self):
-        return struct.pack(OpenflowPortStatus._PACKFMT, self._reason.value) + \
+        return OpenflowPortStatus._STRUCT.pack(self._reason.value) + \
             self._port.to_bytes()
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowPortStatus._MINLEN:
             raise Exception("Not enough bytes to unpack PortStatus")
-        fields = struct.unpack(OpenflowPortStatus._PACKFMT, raw[:8])
+        fields = OpenflowPortStatus._STRUCT.unpack_from(raw)
         self.reason = fields[0]
         self._port = OpenflowPhysicalPort()
         self._port.from_bytes(raw[8:])
@@ -1954,7 +1964,8 @@ class OpenflowStatsType(IntEnum):
 class _OpenflowStatsRequest(OpenflowStruct):
     __slots__ = ('_type', '_flags')
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, xtype=OpenflowStatsType.NoStatsType, **kwargs):
         OpenflowStruct.__init__(self, **kwargs)
@@ -1973,12 +1984,12 @@ class _OpenflowStatsRequest(OpenflowStruct):
         return _OpenflowStatsRequest._MINLEN
 
     def to_bytes(self):
-        return struct.pack(_OpenflowStatsRequest._PACKFMT, self._type.value, 0)
+        return _OpenflowStatsRequest._STRUCT.pack(self._type.value, 0)
 
     def from_bytes(self, raw):
         if len(raw) < _OpenflowStatsRequest._MINLEN:
             raise Exception("Not enough data to unpack _OpenflowStatsRequest")
-        fields = struct.unpack(_OpenflowStatsRequest._PACKFMT, raw[:_OpenflowStatsRequest._MINLEN])
+        fields = _OpenflowStatsRequest._STRUCT.unpack_from(raw)
         self.type = fields[0]
 
 
@@ -1991,7 +2002,8 @@ class SwitchDescriptionStatsRequest(_OpenflowStatsRequest):
 class IndividualFlowStatsRequest(_OpenflowStatsRequest):
     __slots__ = ('_match', '_table_id', '_out_port')
     _PACKFMT = '!BxH'
-    _MINLEN = OpenflowMatch.size() + _OpenflowStatsRequest._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = OpenflowMatch.size() + _OpenflowStatsRequest._MINLEN + _STRUCT.size
 
     def __init__(self, **kwargs):
         _OpenflowStatsRequest.__init__(self, OpenflowStatsType.IndividualFlow, **kwargs)
@@ -2024,7 +2036,7 @@ class IndividualFlowStatsRequest(_OpenflowStatsRequest):
 
     def to_bytes(self):
         return super().to_bytes() + self._match.to_bytes() + \
-            struct.pack(IndividualFlowStatsRequest._PACKFMT, self._table_id, self._out_port)
+            IndividualFlowStatsRequest._STRUCT.pack(self._table_id, self._out_port)
 
     def from_bytes(self, raw):
         if len(raw) < IndividualFlowStatsRequest._MINLEN:
@@ -2033,7 +2045,7 @@ class IndividualFlowStatsRequest(_OpenflowStatsRequest):
         raw = raw[_OpenflowStatsRequest._MINLEN:]
         self.match.from_bytes(raw[:OpenflowMatch.size()])
         raw = raw[OpenflowMatch.size():]
-        fields = struct.unpack(IndividualFlowStatsRequest._PACKFMT, raw)
+        fields = IndividualFlowStatsRequest._STRUCT.unpack(raw)
         self.table_id = fields[0]
         self.out_port = fields[1]
 
@@ -2052,7 +2064,8 @@ class TableStatsRequest(_OpenflowStatsRequest):
 class PortStatsRequest(_OpenflowStatsRequest):
     __slots__ = ('_port_no')
     _PACKFMT = '!H6x'
-    _MINLEN = _OpenflowStatsRequest._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsRequest._MINLEN + _STRUCT.size
 
     def __init__(self, **kwargs):
         _OpenflowStatsRequest.__init__(self, OpenflowStatsType.Port, **kwargs)
@@ -2078,21 +2091,22 @@ class PortStatsRequest(_OpenflowStatsRequest):
         return PortStatsRequest._MINLEN
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(PortStatsRequest._PACKFMT, self.port)
+        return super().to_bytes() + PortStatsRequest._STRUCT.pack(self.port)
 
     def from_bytes(self, raw):
         if len(raw) < PortStatsRequest._MINLEN:
             raise Exception("Not enough data to unpack PortStatsRequest")
         super().from_bytes(raw[:_OpenflowStatsRequest._MINLEN])
         raw = raw[_OpenflowStatsRequest._MINLEN:]
-        fields = struct.unpack(PortStatsRequest._PACKFMT, raw)
+        fields = PortStatsRequest._STRUCT.unpack(raw)
         self.port = fields[0]
 
 
 class QueueStatsRequest(_OpenflowStatsRequest):
     __slots__ = ('_port_no', '_queue_id')
     _PACKFMT = '!H2xI'
-    _MINLEN = _OpenflowStatsRequest._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsRequest._MINLEN + _STRUCT.size
 
     def __init__(self, **kwargs):
         _OpenflowStatsRequest.__init__(self, OpenflowStatsType.Queue, **kwargs)
@@ -2128,14 +2142,14 @@ class QueueStatsRequest(_OpenflowStatsRequest):
 
     def to_bytes(self):
         return super().to_bytes() + \
-            struct.pack(QueueStatsRequest._PACKFMT, self.port, self.queue_id)
+            QueueStatsRequest._STRUCT.pack(self.port, self.queue_id)
 
     def from_bytes(self, raw):
         if len(raw) < QueueStatsRequest._MINLEN:
             raise Exception("Not enough data to unpack QueueStatsRequest")
         super().from_bytes(raw[:_OpenflowStatsRequest._MINLEN])
         raw = raw[_OpenflowStatsRequest._MINLEN:]
-        fields = struct.unpack(QueueStatsRequest._PACKFMT, raw)
+        fields = QueueStatsRequest._STRUCT.unpack(raw)
         self.port = fields[0]
         self.queue_id = fields[1]
 
@@ -2143,6 +2157,7 @@ class QueueStatsRequest(_OpenflowStatsRequest):
 class VendorStatsRequest(_OpenflowStatsRequest):
     __slots__ = ('_vendor_id', '_data')
     _PACKFMT = '!I'
+    _STRUCT = struct.Struct(_PACKFMT)
     _MINLEN = _OpenflowStatsRequest._MINLEN + 4
 
     def __init__(self, **kwargs):
@@ -2170,7 +2185,7 @@ class VendorStatsRequest(_OpenflowStatsRequest):
         return 4 + len(self._data)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(VendorStatsRequest._PACKFMT, self._vendor_id) + \
+        return super().to_bytes() + VendorStatsRequest._STRUCT.pack(self._vendor_id) + \
             self._data
 
     def from_bytes(self, raw):
@@ -2178,7 +2193,7 @@ class VendorStatsRequest(_OpenflowStatsRequest):
             raise Exception("Not enough data to unpack VendorStatsRequest")
         super().from_bytes(raw[:_OpenflowStatsRequest._MINLEN])
         raw = raw[_OpenflowStatsRequest._MINLEN:]
-        fields = struct.unpack(VendorStatsRequest._PACKFMT, raw[:4])
+        fields = VendorStatsRequest._STRUCT.unpack_from(raw)
         self.vendor_id = fields[0]
         self.data = raw[4:]
 
@@ -2191,7 +2206,8 @@ class _OpenflowStatsReply(_OpenflowStatsRequest):
 class SwitchDescriptionStatsReply(_OpenflowStatsReply):
     __slots__ = ('_mfr_desc', '_hw_desc', '_sw_desc', '_serial_num', '_dp_desc')
     _PACKFMT = '!256s256s256s32s256s'
-    _MINLEN = _OpenflowStatsReply._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsReply._MINLEN + _STRUCT.size
 
     def __init__(self, **kwargs):
         self._mfr_desc = '' 
@@ -2246,7 +2262,7 @@ class SwitchDescriptionStatsReply(_OpenflowStatsReply):
 
     def to_bytes(self):
         return super().to_bytes() + \
-            struct.pack(SwitchDescriptionStatsReply._PACKFMT, 
+            SwitchDescriptionStatsReply._STRUCT.pack(
                 self.mfr_desc.encode(), self.hw_desc.encode(), 
                 self.sw_desc.encode(), self.serial_num.encode(), 
                 self._dp_desc.encode())
@@ -2256,7 +2272,7 @@ class SwitchDescriptionStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack SwitchDescriptionStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        fields = struct.unpack(SwitchDescriptionStatsReply._PACKFMT, raw)
+        fields = SwitchDescriptionStatsReply._STRUCT.unpack(raw)
         self.mfr_desc = fields[0].decode()
         self.hw_desc = fields[1].decode()
         self.sw_desc = fields[2].decode()
@@ -2269,8 +2285,10 @@ class IndividualFlowStatsReply(_OpenflowStatsReply):
         '_priority', '_idle_timeout', '_hard_timeout', '_cookie', '_packet_count',
         '_byte_count', '_actions')
     _PACKFMT1 = '!HBx'
+    _STRUCT1 = struct.Struct(_PACKFMT1)
     _PACKFMT2 = '!IIHHH6xQQQ'
-    _MINLEN = struct.calcsize(_PACKFMT1) + struct.calcsize(_PACKFMT2) + \
+    _STRUCT2 = struct.Struct(_PACKFMT2)
+    _MINLEN = _STRUCT1.size + _STRUCT2.size + \
         OpenflowMatch.size() + _OpenflowStatsReply._MINLEN
 
     def __init__(self, **kwargs):
@@ -2291,12 +2309,12 @@ class IndividualFlowStatsReply(_OpenflowStatsReply):
     def to_bytes(self):
         part0 = super().to_bytes()
         part2 = self.match.to_bytes()
-        part3 = struct.pack(IndividualFlowStatsReply._PACKFMT2, self.duration_sec, self.duration_nsec,
+        part3 = IndividualFlowStatsReply._STRUCT2.pack(self.duration_sec, self.duration_nsec,
             self.priority, self.idle_timeout, self.hard_timeout, self.cookie, self.packet_count,
             self._byte_count)
         part4 = b''.join([a.to_bytes() for a in self._actions])
         xlen = IndividualFlowStatsReply._MINLEN + len(part4)
-        part1 = struct.pack(IndividualFlowStatsReply._PACKFMT1, xlen, self.table_id)
+        part1 = IndividualFlowStatsReply._STRUCT1.pack(xlen, self.table_id)
         return part0 + part1 + part2 + part3 + part4
 
     def from_bytes(self, raw):
@@ -2304,16 +2322,16 @@ class IndividualFlowStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack IndividualFlowStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        part0size = struct.calcsize(IndividualFlowStatsReply._PACKFMT1)
-        part2size = struct.calcsize(IndividualFlowStatsReply._PACKFMT2)
-        fields0 = struct.unpack(IndividualFlowStatsReply._PACKFMT1, raw[:part0size])
+        part0size = IndividualFlowStatsReply._STRUCT1.size
+        part2size = IndividualFlowStatsReply._STRUCT2.size
+        fields0 = IndividualFlowStatsReply._STRUCT1.unpack_from(raw)
         xlen = fields0[0]
         self.table_id = fields0[1]
         raw = raw[part0size:]
         self.match = OpenflowMatch()
         self.match.from_bytes(raw[:OpenflowMatch.size()])
         raw = raw[OpenflowMatch.size():]
-        fields1 = struct.unpack(IndividualFlowStatsReply._PACKFMT2, raw[:part2size])
+        fields1 = IndividualFlowStatsReply._STRUCT2.unpack_from(raw)
         self.duration_sec = fields1[0]
         self.duration_nsec = fields1[1]
         self.priority = fields1[2]
@@ -2423,7 +2441,8 @@ class IndividualFlowStatsReply(_OpenflowStatsReply):
 class AggregateFlowStatsReply(_OpenflowStatsReply):
     __slots__ = ('_byte_count', '_packet_count', '_flow_count')
     _PACKFMT = '!QQI'
-    _MINLEN = _OpenflowStatsReply._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsReply._MINLEN + _STRUCT.size
 
     def __init__(self, **kwargs):
         _OpenflowStatsReply.__init__(self, OpenflowStatsType.AggregateFlow, **kwargs)
@@ -2433,7 +2452,7 @@ class AggregateFlowStatsReply(_OpenflowStatsReply):
         return AggregateFlowStatsReply._MINLEN
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(AggregateFlowStatsReply._PACKFMT,
+        return super().to_bytes() + AggregateFlowStatsReply._STRUCT.pack(
             self.byte_count, self.packet_count, self.flow_count)
 
     def from_bytes(self, raw):
@@ -2441,7 +2460,7 @@ class AggregateFlowStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack AggregateFlowStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        fields = struct.unpack(AggregateFlowStatsReply._PACKFMT, raw)
+        fields = AggregateFlowStatsReply._STRUCT.unpack(raw)
         self.byte_count = fields[0]
         self.packet_count = fields[1]
         self.flow_count = fields[2]
@@ -2475,7 +2494,8 @@ class TableStatsReply(_OpenflowStatsReply):
     __slots__ = ('_table_id', '_name', '_wildcards', '_max_entries', 
         '_active_count', '_lookup_count', '_matched_count')
     _PACKFMT = '!B3x32sIIIQQ'
-    _MINLEN = _OpenflowStatsReply._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsReply._MINLEN + _STRUCT.size
 
     def __init__(self):
         _OpenflowStatsReply.__init__(self, OpenflowStatsType.Table)
@@ -2491,7 +2511,7 @@ class TableStatsReply(_OpenflowStatsReply):
     def to_bytes(self):
         wildbits = _make_bitmap(self._wildcards)
         return super().to_bytes() + \
-            struct.pack(TableStatsReply._PACKFMT, self.table_id, self.name.encode(),
+            TableStatsReply._STRUCT.pack(self.table_id, self.name.encode(),
                 wildbits, self.max_entries, self.active_count, 
                 self.lookup_count, self.matched_count)
 
@@ -2500,7 +2520,7 @@ class TableStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack TableStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        fields = struct.unpack(TableStatsReply._PACKFMT, raw)
+        fields = TableStatsReply._STRUCT.unpack(raw)
         self._wildcards = set()
         wildbits = fields[2]
         if fields[1] == OpenflowWildcard.All.value:
@@ -2602,7 +2622,8 @@ class PortStatsReply(_OpenflowStatsReply):
         '_tx_bytes', '_rx_dropped', '_tx_dropped', '_rx_errors', '_tx_errors',
         '_rx_frame_errors', '_rx_over_errors', '_rx_crc_errors', '_collisions')
     _PACKFMT = '!H6x12Q'
-    _MINLEN = _OpenflowStatsReply._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsReply._MINLEN + _STRUCT.size
 
     def __init__(self):
         _OpenflowStatsReply.__init__(self, OpenflowStatsType.Port)
@@ -2619,7 +2640,7 @@ class PortStatsReply(_OpenflowStatsReply):
 
     def to_bytes(self):
         return super().to_bytes() + \
-            struct.pack(PortStatsReply._PACKFMT, self.port_no, self.rx_packets,
+            PortStatsReply._STRUCT.pack(self.port_no, self.rx_packets,
                 self.tx_packets, self.rx_bytes, self.tx_bytes, self.rx_dropped,
                 self.tx_dropped, self.rx_errors, self.tx_errors, self.rx_frame_errors,
                 self.rx_over_errors, self.rx_crc_errors, self.collisions)
@@ -2629,7 +2650,7 @@ class PortStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack PortStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        fields = struct.unpack(PortStatsReply._PACKFMT, raw)
+        fields = PortStatsReply._STRUCT.unpack(raw)
         self.port_no = fields[0]
         self.rx_packets = fields[1]
         self.tx_packets = fields[2]
@@ -2752,7 +2773,8 @@ class PortStatsReply(_OpenflowStatsReply):
 class QueueStatsReply(_OpenflowStatsReply):
     __slots__ = ('_port_no', '_queue_id', '_tx_bytes', '_tx_packets', '_tx_errors')
     _PACKFMT = '!H2xIQQQ'
-    _MINLEN = _OpenflowStatsReply._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsReply._MINLEN + _STRUCT.size
 
     def __init__(self):
         _OpenflowStatsReply.__init__(self, OpenflowStatsType.Queue)
@@ -2763,7 +2785,7 @@ class QueueStatsReply(_OpenflowStatsReply):
         return PortStatsReply._MINLEN
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(QueueStatsReply._PACKFMT,
+        return super().to_bytes() + QueueStatsReply._STRUCT.pack(
             self.port_no, self.queue_id, self.tx_bytes, self.tx_packets, self.tx_errors)
 
     def from_bytes(self, raw):
@@ -2771,7 +2793,7 @@ class QueueStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack QueueStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        fields = struct.unpack(QueueStatsReply._PACKFMT, raw)
+        fields = QueueStatsReply._STRUCT.unpack(raw)
         self.port_no = fields[0]
         self.queue_id = fields[1]
         self.tx_bytes = fields[2]
@@ -2822,7 +2844,8 @@ class QueueStatsReply(_OpenflowStatsReply):
 class VendorStatsReply(_OpenflowStatsReply):
     __slots__ = ('_vendor_id', '_data')
     _PACKFMT = '!I'
-    _MINLEN = _OpenflowStatsReply._MINLEN + struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _OpenflowStatsReply._MINLEN + _STRUCT.size
 
     def __init__(self):
         _OpenflowStatsReply.__init__(self, OpenflowStatsType.Vendor)
@@ -2833,7 +2856,7 @@ class VendorStatsReply(_OpenflowStatsReply):
         return VendorStatsReply._MINLEN + len(self._data)
 
     def to_bytes(self):
-        return super().to_bytes() + struct.pack(VendorStatsReply._PACKFMT, self.vendor_id) + \
+        return super().to_bytes() + VendorStatsReply._STRUCT.pack(self.vendor_id) + \
             self.data
 
     def from_bytes(self, raw):
@@ -2841,7 +2864,7 @@ class VendorStatsReply(_OpenflowStatsReply):
             raise Exception("Not enough data to unpack VendorStatsReply")
         super().from_bytes(raw[:_OpenflowStatsReply._MINLEN])
         raw = raw[_OpenflowStatsReply._MINLEN:]
-        fields = struct.unpack(VendorStatsReply._PACKFMT, raw[:4])
+        fields = VendorStatsReply._STRUCT.unpack_from(raw)
         self.vendor_id = fields[0]
         self.data = raw[4:]
 
@@ -2886,7 +2909,8 @@ _OpenflowStatsReplyClassMap = {
 class OpenflowQueueGetConfigRequest(OpenflowStruct):
     __slots__ = ('_port')
     _PACKFMT = '!H2x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, port=0):
         OpenflowStruct.__init__(self)
@@ -2904,20 +2928,21 @@ class OpenflowQueueGetConfigRequest(OpenflowStruct):
         return OpenflowQueueGetConfigRequest._MINLEN
 
     def to_bytes(self):
-        return struct.pack(OpenflowQueueGetConfigRequest._PACKFMT, 
+        return OpenflowQueueGetConfigRequest._STRUCT.pack(
             int(self._port))
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowQueueGetConfigRequest._MINLEN:
             raise Exception("Not enough data to unpack OpenflowQueueGetConfigRequest")
-        fields = struct.unpack(OpenflowQueueGetConfigRequest._PACKFMT, raw)
+        fields = OpenflowQueueGetConfigRequest._STRUCT.unpack(raw)
         self.port = fields[0]
 
 
 class OpenflowQueueGetConfigReply(OpenflowStruct):
     __slots__ = ('_port', '_queues')
     _PACKFMT = '!H6x'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, port=0):
         OpenflowStruct.__init__(self)
@@ -2941,15 +2966,14 @@ class OpenflowQueueGetConfigReply(OpenflowStruct):
         return OpenflowQueueGetConfigReply._MINLEN + len(rawqueues)
 
     def to_bytes(self):
-        return struct.pack(OpenflowQueueGetConfigReply._PACKFMT, 
+        return OpenflowQueueGetConfigReply._STRUCT.pack(
             int(self._port)) + \
             b''.join([q.to_bytes() for q in self._queues])
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowQueueGetConfigReply._MINLEN:
             raise Exception("Not enough data to unpack OpenflowQueueGetConfigReply")
-        fields = struct.unpack(OpenflowQueueGetConfigReply._PACKFMT, 
-            raw[:OpenflowQueueGetConfigReply._MINLEN])
+        fields = OpenflowQueueGetConfigReply._STRUCT.unpack_from(raw)
         self.port = fields[0]
         raw = raw[OpenflowQueueGetConfigReply._MINLEN:]
         while len(raw) > 0:
@@ -2970,7 +2994,8 @@ class OpenflowPacketInReason(IntEnum):
 class OpenflowPacketIn(OpenflowStruct):
     __slots__ = ('_buffer_id', '_in_port', '_reason', '_packet_data')
     _PACKFMT = '!IHHBx'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         OpenflowStruct.__init__(self)
@@ -2984,15 +3009,14 @@ class OpenflowPacketIn(OpenflowStruct):
 
     def to_bytes(self):
         totallen = len(self.packet) + OpenflowPacketIn._MINLEN 
-        return struct.pack(OpenflowPacketIn._PACKFMT, self.buffer_id,
+        return OpenflowPacketIn._STRUCT.pack(self.buffer_id,
                            totallen, self.in_port,
                            self.reason.value) + self.packet
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowPacketIn._MINLEN:
             raise Exception("Not enough data to unpack OpenflowPacketIn")
-        fields = struct.unpack(
-            OpenflowPacketIn._PACKFMT, raw[:OpenflowPacketIn._MINLEN])
+        fields = OpenflowPacketIn._STRUCT.unpack_from(raw)
         self.buffer_id = fields[0]
         xlen = fields[1]
         self.in_port = fields[2]
@@ -3037,6 +3061,7 @@ class OpenflowPacketIn(OpenflowStruct):
 class OpenflowPacketOut(OpenflowStruct):
     __slots__ = ('_buffer_id', '_in_port', '_actions', '_packet_data')
     _PACKFMT = '!IHH'
+    _STRUCT = struct.Struct(_PACKFMT)
     _MINLEN = 8
 
     def __init__(self):
@@ -3082,14 +3107,13 @@ class OpenflowPacketOut(OpenflowStruct):
 
     def to_bytes(self):
         actions = b''.join(a.to_bytes() for a in self._actions)
-        return struct.pack(OpenflowPacketOut._PACKFMT, self.buffer_id,
+        return OpenflowPacketOut._STRUCT.pack(self.buffer_id,
                            self.in_port, len(actions)) + actions + self.packet
 
     def from_bytes(self, raw):
         if len(raw) < OpenflowPacketOut._MINLEN:
             raise Exception("Not enough data to unpack OpenflowPacketOut")
-        fields = struct.unpack(
-            OpenflowPacketOut._PACKFMT, raw[:OpenflowPacketOut._MINLEN])
+        fields = OpenflowPacketOut._STRUCT.unpack_from(raw)
         self.buffer_id = fields[0]
         self.in_port = fields[1]
         actionlen = fields[2]
@@ -3110,7 +3134,8 @@ class OpenflowFlowRemoved(OpenflowStruct):
                  '_duration_sec', '_duration_nsec', '_idle_timeout',
                  '_packet_count', '_byte_count')
     _PACKFMT = '!QHBxIIH2xQQ'
-    _MINLEN = struct.calcsize(_PACKFMT) + OpenflowMatch.size()
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size + OpenflowMatch.size()
 
     def __init__(self, reason=FlowRemovedReason.Unknown, match=None):
         OpenflowStruct.__init__(self)
@@ -3130,7 +3155,7 @@ class OpenflowFlowRemoved(OpenflowStruct):
 
     def to_bytes(self):
         return self._match.to_bytes() + \
-            struct.pack(OpenflowFlowRemoved._PACKFMT, self._cookie, self._priority,
+            OpenflowFlowRemoved._STRUCT.pack(self._cookie, self._priority,
                 self._reason.value, self._duration_sec, self._duration_nsec,
                 self._idle_timeout, self._packet_count, self._byte_count)
 
@@ -3140,7 +3165,7 @@ class OpenflowFlowRemoved(OpenflowStruct):
 
         self._match = OpenflowMatch()
         self._match.from_bytes(raw[:OpenflowMatch.size()])
-        fields = struct.unpack(OpenflowFlowRemoved._PACKFMT, raw[OpenflowMatch.size():self.size()])
+        fields = OpenflowFlowRemoved._STRUCT.unpack(raw[OpenflowMatch.size():self.size()])
         self.cookie = fields[0]
         self.priority = fields[1]
         self.reason = fields[2]
@@ -3256,7 +3281,8 @@ class OpenflowHeader(PacketHeaderBase):
     '''
     __slots__ = ['_version', '_type', '_length', '_xid', '_subtype']
     _PACKFMT = '!BBHI'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
     _OpenflowTypeClasses = {
         OpenflowType.Hello: None,
         OpenflowType.Error: OpenflowError,
@@ -3343,13 +3369,14 @@ class OpenflowHeader(PacketHeaderBase):
             raise Exception("Not enough bytes to unpack Openflow header;"
                             " need {}, only have {}".format(OpenflowHeader._MINLEN,
                                                             len(raw)))
-        fields = struct.unpack(
-            OpenflowHeader._PACKFMT, raw[:OpenflowHeader._MINLEN])
+        fields = OpenflowHeader._STRUCT.unpack_from(raw)
         self._version = fields[0]
         self.type = fields[1]
         self.length = fields[2]
         self.xid = fields[3]
-        raw = raw[OpenflowHeader._MINLEN:]
+        # OpenFlow message bodies keep slices of raw (e.g., packet data),
+        # so hand them an independent bytes object rather than a view.
+        raw = bytes(raw[OpenflowHeader._MINLEN:])
         if self.type == OpenflowType.StatsRequest or self.type == OpenflowType.StatsReply:
             if len(raw) >= 2: # JS??     
                 (statstype,) = struct.unpack('!H', raw[:2])
@@ -3357,7 +3384,7 @@ class OpenflowHeader(PacketHeaderBase):
         return raw
 
     def to_bytes(self):
-        return struct.pack(OpenflowHeader._PACKFMT, self._version,
+        return OpenflowHeader._STRUCT.pack(self._version,
                            self._type.value, self._length, self._xid)
 
     def size(self):
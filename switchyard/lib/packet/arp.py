@@ -1,7 +1,7 @@
 from .packet import PacketHeaderBase,Packet
-from ..address import EthAddr,IPAddr,SpecialIPv4Addr,SpecialEthAddr
+from ..address import EthAddr,IPAddr,SpecialIPv4Addr,SpecialEthAddr,_ipv4_to_int
 import struct
-from .common import EtherType, ArpHwType, ArpOperation
+from .common import EtherType, ArpHwType, ArpOperation, _to_enum
 from ..exceptions import *
 
 '''
@@ -17,8 +17,10 @@ class Arp(PacketHeaderBase):
     __slots__ = ['_hwtype','_prototype','_hwaddrlen','_protoaddrlen',
                  '_operation','_senderhwaddr','_senderprotoaddr',
                  '_targethwaddr','_targetprotoaddr']
-    _PACKFMT = '!HHBBH6s4s6s4s'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _cacheable = True
+    _PACKFMT = '!HHBBH6sI6sI'
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, **kwargs):
         self._hwtype = ArpHwType.Ethernet
@@ -27,13 +29,13 @@ class Arp(PacketHeaderBase):
         self._protoaddrlen = 4
         self.operation = ArpOperation.Request
         self.senderhwaddr = SpecialEthAddr.ETHER_ANY.value
-        self.senderprotoaddr = SpecialIPv4Addr.IP_ANY.value
+        self._senderprotoaddr = 0
         self.targethwaddr = SpecialEthAddr.ETHER_BROADCAST.value
-        self.targetprotoaddr = SpecialIPv4Addr.IP_ANY.value
+        self._targetprotoaddr = 0
         super().__init__(**kwargs)
 
     def size(self):
-        return struct.calcsize(Arp._PACKFMT)
+        return Arp._MINLEN
 
     def pre_serialize(self, raw, pkt, i):
         pass
@@ -42,24 +44,25 @@ class Arp(PacketHeaderBase):
         '''
         Return packed byte representation of the ARP header.
         '''
-        return struct.pack(Arp._PACKFMT, self._hwtype.value, self._prototype.value, self._hwaddrlen, self._protoaddrlen, self._operation.value, self._senderhwaddr.packed, self._senderprotoaddr.packed, self._targethwaddr.packed, self._targetprotoaddr.packed)
+        return Arp._STRUCT.pack(self._hwtype.value, self._prototype.value, self._hwaddrlen, self._protoaddrlen, self._operation.value, self._senderhwaddr.packed, self._senderprotoaddr, self._targethwaddr.packed, self._targetprotoaddr)
 
     def from_bytes(self, raw):
         '''Return an Ethernet object reconstructed from raw bytes, or an
            Exception if we can't resurrect the packet.'''
         if len(raw) < Arp._MINLEN:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct an Arp object".format(len(raw)))
-        fields = struct.unpack(Arp._PACKFMT, raw[:Arp._MINLEN])
+        fields = Arp._STRUCT.unpack_from(raw)
+        self._serialized = None
         try:
-            self._hwtype = ArpHwType(fields[0])
-            self._prototype = EtherType(fields[1])
+            self._hwtype = _to_enum(ArpHwType, fields[0])
+            self._prototype = _to_enum(EtherType, fields[1])
             self._hwaddrlen = fields[2]
             self._protoaddrlen = fields[3]
-            self.operation = ArpOperation(fields[4])
-            self.senderhwaddr = EthAddr(fields[5])
-            self.senderprotoaddr = IPAddr(fields[6])
-            self.targethwaddr = EthAddr(fields[7])
-            self.targetprotoaddr = IPAddr(fields[8])
+            self.operation = fields[4]
+            self._senderhwaddr = EthAddr.from_raw(fields[5])
+            self._senderprotoaddr = fields[6]
+            self._targethwaddr = EthAddr.from_raw(fields[7])
+            self._targetprotoaddr = fields[8]
         except Exception as e:
             raise Exception("Error constructing Arp packet object from raw bytes: {}".format(str(e)))
         return raw[Arp._MINLEN:]
@@ -69,9 +72,16 @@ class Arp(PacketHeaderBase):
                self.protocoltype == other.protocoltype and \
                self.operation == other.operation and \
                self.senderhwaddr == other.senderhwaddr and \
-               self.senderprotoaddr == other.senderprotoaddr and \
+               self._senderprotoaddr == other._senderprotoaddr and \
                self.targethwaddr == other.targethwaddr and \
-               self.targetprotoaddr == other.targetprotoaddr 
+               self._targetprotoaddr == other._targetprotoaddr 
+
+    def __setstate__(self, state):
+        # protocol addresses used to be kept as IPv4Address objects
+        for attr, value in state[1].items():
+            if attr in ('_senderprotoaddr', '_targetprotoaddr'):
+                value = _ipv4_to_int(value)
+            setattr(self, attr, value)
 
     @property
     def hardwaretype(self):
@@ -87,7 +97,8 @@ class Arp(PacketHeaderBase):
 
     @operation.setter
     def operation(self, value):
-        self._operation = ArpOperation(value)
+        self._serialized = None
+        self._operation = _to_enum(ArpOperation, value)
 
     @property
     def senderhwaddr(self):
@@ -95,15 +106,25 @@ class Arp(PacketHeaderBase):
 
     @senderhwaddr.setter
     def senderhwaddr(self, value):
-        self._senderhwaddr = EthAddr(value)
+        self._serialized = None
+        self._senderhwaddr = EthAddr.coerce(value)
 
     @property
     def senderprotoaddr(self):
-        return self._senderprotoaddr
+        return IPAddr(self._senderprotoaddr)
 
     @senderprotoaddr.setter
     def senderprotoaddr(self, value):
-        self._senderprotoaddr = IPAddr(value)
+        self._serialized = None
+        self._senderprotoaddr = _ipv4_to_int(value)
+
+    @property
+    def senderprotoaddr_int(self):
+        '''
+        The sender protocol address as an integer, without building an
+        IPv4Address object.
+        '''
+        return self._senderprotoaddr
 
     @property
     def targethwaddr(self):
@@ -111,15 +132,25 @@ class Arp(PacketHeaderBase):
 
     @targethwaddr.setter
     def targethwaddr(self, value):
-        self._targethwaddr = EthAddr(value)
+        self._serialized = None
+        self._targethwaddr = EthAddr.coerce(value)
 
     @property
     def targetprotoaddr(self):
-        return self._targetprotoaddr
+        return IPAddr(self._targetprotoaddr)
 
     @targetprotoaddr.setter
     def targetprotoaddr(self, value):
-        self._targetprotoaddr = IPAddr(value)
+        self._serialized = None
+        self._targetprotoaddr = _ipv4_to_int(value)
+
+    @property
+    def targetprotoaddr_int(self):
+        '''
+        The target protocol address as an integer, without building an
+        IPv4Address object.
+        '''
+        return self._targetprotoaddr
 
     def next_header_class(self):
         '''
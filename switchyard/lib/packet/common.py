@@ -1,8 +1,27 @@
 import struct
-import array
+import sys
 from enum import IntEnum
 from socket import ntohs
 
+# value -> member dicts for enumerated types, built on first use by
+# _to_enum
+_enum_tables = {}
+
+def _to_enum(enumcls, value):
+    '''
+    Return enumcls(value), but get there with a dict lookup rather than
+    through the (slow) Enum constructor when value is a known value for
+    enumcls.  Anything else, including values that aren't valid, is
+    still passed to the constructor so the outcome is the same.
+    '''
+    table = _enum_tables.get(enumcls, None)
+    if table is None:
+        table = _enum_tables[enumcls] = { m.value: m for m in enumcls }
+    try:
+        return table[value]
+    except (KeyError, TypeError):
+        return enumcls(value)
+
 class EtherType(IntEnum):
     NoType = 0xFFFF
     IP = 0x0800
@@ -240,6 +259,8 @@ ICMPv6TypeCodeMap = {
 # developed by Nicira, Inc.
 
 
+_byteorder = sys.byteorder
+
 def checksum (data, start = 0, skip_word = None):
   """
   Calculate standard internet checksum over data starting at start'th byte
@@ -250,27 +271,23 @@ def checksum (data, start = 0, skip_word = None):
              verify -- you want to skip that word since it was zero when
              the checksum was initially calculated.
   """
-  if len(data) % 2 != 0:
-    arr = array.array('H', data[:-1])
-  else:
-    arr = array.array('H', data)
-
-  if skip_word is not None:
-    for i in range(0, len(arr)):
-      if i == skip_word:
-        continue
-      start +=  arr[i]
-  else:
-    for i in range(0, len(arr)):
-      start +=  arr[i]
-
-  if len(data) % 2 != 0:
-    start += struct.unpack('H', data[-1:]+b'\x00')[0] # Specify order?
-
-  start  = (start >> 16) + (start & 0xffff)
-  start += (start >> 16)
-  #while start >> 16:
-  #  start = (start >> 16) + (start & 0xffff)
-
-  return ntohs(~start & 0xffff)
-
+  # Rather than adding up 16-bit words one at a time, treat the data as
+  # one (native byte order) integer: since 2**16 == 1 (mod 0xffff), that
+  # integer has the same remainder mod 0xffff as the sum of the words,
+  # and the remainder is the one's complement sum (with 0xffff standing
+  # in for a non-zero multiple of 0xffff).
+  total = int.from_bytes(data, _byteorder)
+  nwords = (len(data) + 1) // 2
+  if len(data) % 2 != 0 and _byteorder == 'big':
+    total <<= 8 # pad the last byte out to a full word
+  if skip_word is not None and 0 <= skip_word < len(data) // 2:
+    word = int.from_bytes(data[skip_word*2:skip_word*2+2], _byteorder)
+    if _byteorder == 'big':
+      total -= word << (16 * (nwords - 1 - skip_word))
+    else:
+      total -= word << (16 * skip_word)
+  total += start
+  if total:
+    total = total % 0xffff or 0xffff
+
+  return ntohs(~total & 0xffff)
@@ -4,7 +4,7 @@ from ..address import EthAddr,SpecialEthAddr
 from .arp import Arp
 from .ipv4 import IPv4
 from .ipv6 import IPv6
-from .common import EtherType
+from .common import EtherType, _to_enum
 from ..exceptions import *
 
 
@@ -25,8 +25,10 @@ class Vlan(PacketHeaderBase):
     '''
 
     __slots__ = ['_vlanid', '_pcp', '_ethertype']
+    _cacheable = True
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
     _next_header_map = {
         EtherType.IP: IPv4,
         EtherType.ARP: Arp,
@@ -51,6 +53,7 @@ class Vlan(PacketHeaderBase):
 
     @vlanid.setter
     def vlanid(self, value):
+        self._serialized = None
         self._vlanid = int(value) & 0x0fff # mask out high-order 4 bits
 
     @property
@@ -59,6 +62,7 @@ class Vlan(PacketHeaderBase):
 
     @pcp.setter
     def pcp(self, value):
+        self._serialized = None
         self._pcp = max(min(int(value),3),0)
 
     @property
@@ -67,20 +71,21 @@ class Vlan(PacketHeaderBase):
 
     @ethertype.setter
     def ethertype(self, value):
-        self._ethertype = EtherType(value)
+        self._serialized = None
+        self._ethertype = _to_enum(EtherType, value)
 
     def from_bytes(self, raw):
         if len(raw) < Vlan._MINLEN:
             raise NotEnoughDataError("Not enough bytes to unpack Vlan header; need {}, "
                 "only have {}".format(Vlan._MINLEN, len(raw)))
-        fields = struct.unpack(Vlan._PACKFMT, raw[:Vlan._MINLEN])
+        fields = Vlan._STRUCT.unpack_from(raw)
         self.vlanid = fields[0]
         self.pcp = ((fields[0] & 0xf000) >> 12)
         self.ethertype = fields[1]
         return raw[Vlan._MINLEN:]
 
     def to_bytes(self):
-        return struct.pack(Vlan._PACKFMT, ((self._pcp << 12) | self._vlanid), 
+        return Vlan._STRUCT.pack(((self._pcp << 12) | self._vlanid), 
             self._ethertype.value)
 
     def __eq__(self, other):
@@ -96,8 +101,10 @@ class Vlan(PacketHeaderBase):
 
 class Ethernet(PacketHeaderBase):
     __slots__ = ['_src','_dst','_ethertype']
+    _cacheable = True
     _PACKFMT = '!6s6sH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
     _next_header_map = {
         EtherType.IP: IPv4,
         EtherType.ARP: Arp,
@@ -113,7 +120,7 @@ class Ethernet(PacketHeaderBase):
         super().__init__(**kwargs)
 
     def size(self):
-        return struct.calcsize(Ethernet._PACKFMT)
+        return Ethernet._MINLEN
 
     @property
     def src(self):
@@ -121,7 +128,8 @@ class Ethernet(PacketHeaderBase):
 
     @src.setter
     def src(self, value):
-        self._src = EthAddr(value)
+        self._serialized = None
+        self._src = EthAddr.coerce(value)
 
     @property
     def dst(self):
@@ -129,7 +137,8 @@ class Ethernet(PacketHeaderBase):
 
     @dst.setter
     def dst(self, value):
-        self._dst = EthAddr(value)
+        self._serialized = None
+        self._dst = EthAddr.coerce(value)
 
     @property
     def ethertype(self):
@@ -137,13 +146,14 @@ class Ethernet(PacketHeaderBase):
 
     @ethertype.setter
     def ethertype(self, value):
-        self._ethertype = EtherType(value)
+        self._serialized = None
+        self._ethertype = _to_enum(EtherType, value)
 
     def to_bytes(self):
         '''
         Return packed byte representation of the Ethernet header.
         '''
-        return struct.pack(Ethernet._PACKFMT, self._dst.packed, 
+        return Ethernet._STRUCT.pack(self._dst.packed, 
             self._src.packed, self._ethertype.value)
 
     def from_bytes(self, raw):
@@ -152,10 +162,9 @@ class Ethernet(PacketHeaderBase):
         if len(raw) < Ethernet._MINLEN:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct an "
                 "Ethernet object".format(len(raw)))
-        dst,src,ethertype = struct.unpack(Ethernet._PACKFMT, 
-            raw[:Ethernet._MINLEN])
-        self.src = src
-        self.dst = dst
+        dst,src,ethertype = Ethernet._STRUCT.unpack_from(raw)
+        self._src = EthAddr.from_raw(src)
+        self._dst = EthAddr.from_raw(dst)
         if ethertype <= 1500:
             self.ethertype = EtherType.NoType
         else:
@@ -3,7 +3,7 @@ from enum import IntEnum
 from ipaddress import IPv4Address
 
 from .packet import PacketHeaderBase,Packet
-from .common import checksum, ICMPType, ICMPTypeCodeMap
+from .common import checksum, ICMPType, ICMPTypeCodeMap, _to_enum
 from ..exceptions import *
 
 '''
@@ -25,8 +25,10 @@ class ICMP(PacketHeaderBase):
     __slots__ = ('_type', '_code', '_icmpdata', '_valid_types', 
                  '_valid_codes_map', '_classtype_from_icmptype', 
                  '_icmptype_from_classtype', '_checksum')
+    _cacheable = True
     _PACKFMT = '!BBH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, **kwargs):
         self._valid_types = ICMPType
@@ -52,10 +54,10 @@ class ICMP(PacketHeaderBase):
         super().__init__(**kwargs)
 
     def size(self):
-        return struct.calcsize(ICMP._PACKFMT) + len(self._icmpdata.to_bytes())
+        return ICMP._MINLEN + len(self._icmpdata.to_bytes())
 
     def checksum(self):
-        self._checksum = checksum(b''.join( (struct.pack(ICMP._PACKFMT, self._type.value, self._code.value, 0), self._icmpdata.to_bytes())))
+        self._checksum = checksum(b''.join( (ICMP._STRUCT.pack(self._type.value, self._code.value, 0), self._icmpdata.to_bytes())))
         return self._checksum
 
     def to_bytes(self, dochecksum=True):
@@ -65,14 +67,15 @@ class ICMP(PacketHeaderBase):
         csum = 0
         if dochecksum:
             csum = self.checksum()
-        return b''.join((struct.pack(ICMP._PACKFMT, self._type.value, self._code.value, csum), self._icmpdata.to_bytes()))
+        return b''.join((ICMP._STRUCT.pack(self._type.value, self._code.value, csum), self._icmpdata.to_bytes()))
 
     def from_bytes(self, raw):
         if len(raw) < ICMP._MINLEN:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct an ICMP object".format(len(raw)))
-        fields = struct.unpack(ICMP._PACKFMT, raw[:ICMP._MINLEN])
-        self._type = self._valid_types(fields[0])
-        self._code = self._valid_codes_map[self.icmptype](fields[1])
+        fields = ICMP._STRUCT.unpack_from(raw)
+        self._serialized = None
+        self._type = _to_enum(self._valid_types, fields[0])
+        self._code = _to_enum(self._valid_codes_map[self._type], fields[1])
         self._checksum = fields[2]
         self._icmpdata = self._classtype_from_icmptype(self._type)()
         self._icmpdata.from_bytes(raw[ICMP._MINLEN:])
@@ -93,8 +96,9 @@ class ICMP(PacketHeaderBase):
 
     @icmptype.setter
     def icmptype(self, value):
+        self._serialized = None
         if not isinstance(value, self._valid_types):
-            value = self._valid_types(value)
+            value = _to_enum(self._valid_types, value)
             # JS: revised following line as above; too restrictive
             # raise ValueError("ICMP type must be an {} enumeration".format(type(self._valid_types)))
 
@@ -110,12 +114,13 @@ class ICMP(PacketHeaderBase):
 
     @icmpcode.setter
     def icmpcode(self,value):
+        self._serialized = None
         if issubclass(value.__class__, IntEnum):
             validcodes = self._valid_codes_map[self._type]
             self._check_typecode_consistency(value) 
             self._code = value
         elif isinstance(value, int):
-            self._code = self._valid_codes_map[self.icmptype](value)
+            self._code = _to_enum(self._valid_codes_map[self._type], value)
 
     def _check_typecode_consistency(self, xcode):
         validcodes = self._valid_codes_map[self._type]
@@ -134,12 +139,25 @@ class ICMP(PacketHeaderBase):
     def pre_serialize(self, raw, pkt, i):
         return
 
+    def _serial_stamp(self):
+        # the data object can be changed without going through ICMP, so
+        # it's stamped along with this header and both have to match
+        stamp = super()._serial_stamp()
+        if stamp is None or self._icmpdata._serial_stamp() != stamp:
+            return None
+        return stamp
+
+    def _stamp_serialized(self, stamp):
+        super()._stamp_serialized(stamp)
+        self._icmpdata._stamp_serialized(stamp)
+
     @property
     def icmpdata(self):
         return self._icmpdata
 
     @icmpdata.setter
     def icmpdata(self, dataobj):
+        self._serialized = None
         if not issubclass(dataobj.__class__, ICMPData):
             raise Exception("ICMP data must be subclass of ICMPData (you gave me {})".format(dataobj.__class__.__name__))
         self._icmpdata = dataobj
@@ -148,6 +166,7 @@ class ICMP(PacketHeaderBase):
 
 class ICMPData(PacketHeaderBase):
     __slots__ = ('_rawpayload',)
+    _cacheable = True
 
     def __init__(self, **kwargs):
         self._rawpayload = b''
@@ -166,6 +185,7 @@ class ICMPData(PacketHeaderBase):
         return self._rawpayload
 
     def from_bytes(self, raw):
+        self._serialized = None
         self._rawpayload = bytes(raw)
 
     @property
@@ -174,6 +194,7 @@ class ICMPData(PacketHeaderBase):
 
     @data.setter
     def data(self, value):
+        self._serialized = None
         if not isinstance(value, bytes):
             self._rawpayload = bytes(value, 'utf8')
         else:
@@ -205,6 +226,8 @@ class ICMPSourceQuench(ICMPData):
 
 class ICMPRedirect(ICMPData):
     __slots__ = ['_redirectto']
+    _PACKFMT = '!I'
+    _STRUCT = struct.Struct(_PACKFMT)
     def __init__(self):
         super().__init__()
         self._redirectto = IPv4Address('0.0.0.0')
@@ -215,7 +238,7 @@ class ICMPRedirect(ICMPData):
     def from_bytes(self, raw):
         if len(raw) < 4:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct ICMPRedirect data object".format(len(raw)))
-        fields = struct.unpack('!I', raw[:4])
+        fields = ICMPRedirect._STRUCT.unpack_from(raw)
         self._redirectto = IPv4Address(fields[0])
         super().from_bytes(raw[4:])
 
@@ -228,23 +251,26 @@ class ICMPRedirect(ICMPData):
 
     @redirectto.setter
     def redirectto(self, value):
+        self._serialized = None
         self._redirectto = IPv4Address(value) 
 
     
 class ICMPDestinationUnreachable(ICMPData):
     __slots__ = ('_origdgramlen', '_nexthopmtu')
+    _PACKFMT = '!xBH'
+    _STRUCT = struct.Struct(_PACKFMT)
     def __init__(self):
         super().__init__()
         self._nexthopmtu = 0
         self._origdgramlen = 0
 
     def to_bytes(self):
-        return b''.join( (struct.pack('!xBH', self._origdgramlen, self._nexthopmtu), super().to_bytes()) )
+        return b''.join( (ICMPDestinationUnreachable._STRUCT.pack(self._origdgramlen, self._nexthopmtu), super().to_bytes()) )
 
     def from_bytes(self, raw):
         if len(raw) < 4:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct ICMPDestinationUnreachable data object".format(len(raw)))
-        fields = struct.unpack('!xBH', raw[:4])
+        fields = ICMPDestinationUnreachable._STRUCT.unpack_from(raw)
         self._origdgramlen = fields[0]
         self._nexthopmtu = fields[1]
         super().from_bytes(raw[4:])
@@ -255,6 +281,7 @@ class ICMPDestinationUnreachable(ICMPData):
 
     @origdgramlen.setter
     def origdgramlen(self, value):
+        self._serialized = None
         self._origdgramlen = int(value)
 
     @property
@@ -263,6 +290,7 @@ class ICMPDestinationUnreachable(ICMPData):
 
     @nexthopmtu.setter
     def nexthopmtu(self, value):
+        self._serialized = None
         self._nexthopmtu = int(value)
 
     def __str__(self):
@@ -272,7 +300,8 @@ class ICMPDestinationUnreachable(ICMPData):
 class ICMPEchoRequest(ICMPData):
     __slots__ = ['_identifier','_sequence']
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
     
     def __init__(self):
         super().__init__()
@@ -291,15 +320,14 @@ class ICMPEchoRequest(ICMPData):
     def from_bytes(self, raw):
         if len(raw) < 4:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct {} data object".format(len(raw)))
-        fields = struct.unpack(ICMPEchoRequest._PACKFMT, 
-            raw[:ICMPEchoRequest._MINLEN])
+        fields = ICMPEchoRequest._STRUCT.unpack_from(raw)
         self._identifier = fields[0]
         self._sequence = fields[1]
         super().from_bytes(raw[4:])
         return b''
 
     def to_bytes(self):
-        return b''.join( (struct.pack(ICMPEchoRequest._PACKFMT,
+        return b''.join( (ICMPEchoRequest._STRUCT.pack(
             self._identifier, self._sequence), super().to_bytes() ) )
 
     def __str__(self):
@@ -320,10 +348,12 @@ class ICMPEchoRequest(ICMPData):
    
     @identifier.setter
     def identifier(self, value):
+        self._serialized = None
         self._identifier = int(value)
 
     @sequence.setter
     def sequence(self, value):
+        self._serialized = None
         self._sequence = int(value)
 
 class ICMPEchoReply(ICMPEchoRequest):
@@ -331,18 +361,20 @@ class ICMPEchoReply(ICMPEchoRequest):
 
 class ICMPTimeExceeded(ICMPData):
     __slots__ = ('_nexthopmtu','_origdgramlen',)
+    _PACKFMT = '!xBH'
+    _STRUCT = struct.Struct(_PACKFMT)
     def __init__(self):
         super().__init__()
         self._origdgramlen = 0
 
     def to_bytes(self):
-        return b''.join( (struct.pack('!xBH', self._origdgramlen, 0), super().to_bytes()) )
+        return b''.join( (ICMPTimeExceeded._STRUCT.pack(self._origdgramlen, 0), super().to_bytes()) )
         # FIXME: origdgram len should be padded to 4 bytes for v4, and 8 bytes for v6
 
     def from_bytes(self, raw):
         if len(raw) < 4:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct ICMPTimeExceeded data object".format(len(raw)))
-        fields = struct.unpack('!xBH', raw[:4])
+        fields = ICMPTimeExceeded._STRUCT.unpack_from(raw)
         self._origdgramlen = fields[0]
         self._nexthopmtu = fields[1]
         super().from_bytes(raw[4:])
@@ -353,6 +385,7 @@ class ICMPTimeExceeded(ICMPData):
 
     @origdgramlen.setter
     def origdgramlen(self, value):
+        self._serialized = None
         self._origdgramlen = int(value)
 
     def __str__(self):
@@ -361,7 +394,8 @@ class ICMPTimeExceeded(ICMPData):
 class ICMPAddressMaskRequest(ICMPData):
     __slots__ = ['_identifier','_sequence','_addrmask']
     _PACKFMT = '!HH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self):
         super().__init__()
@@ -379,16 +413,17 @@ class ICMPAddressMaskRequest(ICMPData):
         return ICMPAddressMaskRequest._MINLEN
 
     def to_bytes(self):
-        return b''.join( (struct.pack(ICMPAddressMaskRequest._PACKFMT, 
+        return b''.join( (ICMPAddressMaskRequest._STRUCT.pack(
             self._identifier, self._sequence), self._addrmask.packed))
 
     def from_bytes(self, raw):
         if len(raw) < ICMPAddressMaskRequest._MINLEN:
             raise NotEnoughDataError("Not enough bytes to unpack ICMPAddressMaskRequest object")
-        fields = struct.unpack(ICMPAddressMaskRequest._PACKFMT, raw[:4])
+        fields = ICMPAddressMaskRequest._STRUCT.unpack_from(raw)
+        self._serialized = None
         self._identifier = fields[0]
         self._sequence = fields[1]
-        self._addrmask = IPv4Address(raw[4:8])
+        self._addrmask = IPv4Address(bytes(raw[4:8]))
         return b''
 
     @property
@@ -397,6 +432,7 @@ class ICMPAddressMaskRequest(ICMPData):
 
     @addrmask.setter
     def addrmask(self, value):
+        self._serialized = None
         self._addrmask = IPv4Address(value)
 
     @property
@@ -405,6 +441,7 @@ class ICMPAddressMaskRequest(ICMPData):
 
     @identifier.setter
     def identifier(self, value):
+        self._serialized = None
         self._identifier = int(value)
 
     @property
@@ -413,6 +450,7 @@ class ICMPAddressMaskRequest(ICMPData):
 
     @sequence.setter
     def sequence(self, value):
+        self._serialized = None
         self._sequence = int(value)
 
     def __str__(self):
@@ -451,7 +489,7 @@ def construct_icmp_class_map():
         cls = eval(clsname)
         clsmap[xtype] = cls
     def inner(icmptype):
-        icmptype = ICMPType(icmptype)
+        icmptype = _to_enum(ICMPType, icmptype)
         return clsmap.get(icmptype, None)
     return inner
 
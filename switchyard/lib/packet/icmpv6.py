@@ -2,7 +2,7 @@ import struct
 from ipaddress import IPv6Address
 
 from .icmp import ICMP, ICMPEchoRequest, ICMPEchoReply
-from .common import ICMPv6Type, ICMPv6TypeCodeMap
+from .common import ICMPv6Type, ICMPv6TypeCodeMap, _to_enum
 from .common import checksum as csum
 from ..exceptions import *
 
@@ -14,6 +14,8 @@ References:
 
 
 class ICMPv6(ICMP):
+    _PSEUDOSTRUCT = struct.Struct('!I3xBBB')
+
     def __init__(self, **kwargs):
         self._valid_types = ICMPv6Type
         self._valid_codes_map = ICMPv6TypeCodeMap
@@ -38,15 +40,21 @@ class ICMPv6(ICMP):
         databytes = self._icmpdata.to_bytes()
         icmpsize = ICMP._MINLEN+len(databytes)
         self._checksum = csum(sep.join( (src.packed, dst.packed,
-            struct.pack('!I3xBBB', 
+            ICMPv6._PSEUDOSTRUCT.pack(
                 ICMP._MINLEN+len(databytes), 58, self._type.value, self._code.value), 
             databytes) ))
 
     def pre_serialize(self, raw, pkt, i):
-        ip6hdr = pkt.get_header('IPv6')
+        ip6hdr = pkt._peek_header('IPv6')
         assert(ip6hdr is not None)
         self._compute_checksum(ip6hdr.src, ip6hdr.dst, raw)
 
+    def _serial_context(self, pkt):
+        ip6hdr = pkt._peek_header('IPv6')
+        if ip6hdr is None:
+            return None
+        return (ip6hdr.src, ip6hdr.dst)
+
 
 class ICMPv6EchoRequest(ICMPEchoRequest):
     pass
@@ -76,7 +84,7 @@ def construct_icmpv6_class_map():
             cls = None
         clsmap[xtype] = cls
     def inner(icmptype):
-        icmptype = ICMPv6Type(icmptype)
+        icmptype = _to_enum(ICMPv6Type, icmptype)
         return clsmap.get(icmptype, None)
     return inner
 
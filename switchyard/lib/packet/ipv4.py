@@ -4,9 +4,9 @@ from ipaddress import IPv4Address
 from collections import namedtuple
 
 from .packet import PacketHeaderBase,Packet
-from ..address import EthAddr,IPAddr,SpecialIPv4Addr,SpecialEthAddr
+from ..address import EthAddr,IPAddr,SpecialIPv4Addr,SpecialEthAddr,_ipv4_to_int
 from ..logging import log_warn
-from .common import IPProtocol,IPFragmentFlag,IPOptionNumber, checksum
+from .common import IPProtocol,IPFragmentFlag,IPOptionNumber, checksum, _to_enum
 from .icmp import ICMP
 from .udp import UDP
 from .tcp import TCP
@@ -24,19 +24,20 @@ References:
 
 class IPOption(object, metaclass=ABCMeta):
     _PACKFMT = 'B'
+    _STRUCT = struct.Struct(_PACKFMT)
     __slots__ = ['_optnum']
     def __init__(self, optnum):
-        self._optnum = IPOptionNumber(optnum)
+        self._optnum = _to_enum(IPOptionNumber, optnum)
 
     @property
     def optnum(self):
         return self._optnum
 
     def length(self):
-        return struct.calcsize(IPOption._PACKFMT)
+        return IPOption._STRUCT.size
 
     def to_bytes(self):
-        return struct.pack(IPOption._PACKFMT, self._optnum.value)
+        return IPOption._STRUCT.pack(self._optnum.value)
 
     def from_bytes(self, raw):
         return self.length()
@@ -60,6 +61,7 @@ class IPOptionEndOfOptionList(IPOption):
 
 class IPOptionXRouting(IPOption):
     _PACKFMT = 'BBB'
+    _STRUCT = struct.Struct(_PACKFMT)
     __slots__ = ['_routedata','_ptr']
     def __init__(self, ipoptnum, numaddrs=9):
         super().__init__(ipoptnum)
@@ -69,13 +71,13 @@ class IPOptionXRouting(IPOption):
         self._ptr = 4
 
     def length(self):
-        return struct.calcsize(IPOptionXRouting._PACKFMT)+len(self._routedata)*4
+        return IPOptionXRouting._STRUCT.size+len(self._routedata)*4
 
     def __len__(self):
         return len(self._routedata)
 
     def to_bytes(self):
-        raw = struct.pack(IPOptionXRouting._PACKFMT,self.optnum.value,self.length(), self._ptr)
+        raw = IPOptionXRouting._STRUCT.pack(self.optnum.value,self.length(), self._ptr)
         for ipaddr in self._routedata:
             raw += ipaddr.packed
         return raw
@@ -87,7 +89,7 @@ class IPOptionXRouting(IPOption):
         numaddrs = ((length - 3) // 4)
         self._routedata = []
         for i in range(numaddrs):
-            self._routedata.append(IPv4Address(raw[(3+(i*4)):(7+(i*4))]))
+            self._routedata.append(IPv4Address(bytes(raw[(3+(i*4)):(7+(i*4))])))
         self.pointer = pointer
         return length
 
@@ -228,6 +230,7 @@ class IPOptionTimestamp(IPOption):
 class IPOption4Bytes(IPOption):
     __slots__ = ['_value', '_copyflag']
     _PACKFMT = '!BBH'
+    _STRUCT = struct.Struct(_PACKFMT)
 
     def __init__(self, optnum, value=0, copyflag=False):
         super().__init__(optnum)
@@ -237,15 +240,15 @@ class IPOption4Bytes(IPOption):
             self._copyflag = 0x80
     
     def length(self):
-        return struct.calcsize(IPOption4Bytes._PACKFMT)
+        return IPOption4Bytes._STRUCT.size
 
     def from_bytes(self, raw):
-        fields = struct.unpack(IPOption4Bytes._PACKFMT, raw[:4])
+        fields = IPOption4Bytes._STRUCT.unpack_from(raw)
         self._value = fields[2]
         return self.length()
 
     def to_bytes(self):
-        return struct.pack(IPOption4Bytes._PACKFMT, 
+        return IPOption4Bytes._STRUCT.pack(
             self._copyflag | self.optnum.value, self.length(), self._value)
 
     def __eq__(self, other):
@@ -299,7 +302,7 @@ class IPOptionList(object):
             optcopied = opttype >> 7         # high order 1 bit
             optclass = (opttype >> 5) & 0x03 # next 2 bits
             optnum = opttype & 0x1f          # low-order 5 bits are optnum
-            optnum = IPOptionNumber(optnum)
+            optnum = _to_enum(IPOptionNumber, optnum)
             obj = IPOptionClasses[optnum]()
             eaten = obj.from_bytes(rawbytes[i:])
             i += eaten
@@ -382,13 +385,19 @@ class IPv4(PacketHeaderBase):
     __slots__ = ['_tos','_totallen','_ttl',
                  '_ipid','_flags','_fragoffset',
                  '_protocol','_csum',
-                 '_src','_dst','_options']
-    _PACKFMT = '!BBHHHBBH4s4s'
-    _MINLEN = struct.calcsize(_PACKFMT)
+                 '_src','_dst','_options','_csumopts']
+    _cacheable = True
+    _uses_tail_length = True
+    _PACKFMT = '!BBHHHBBHII'
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
     _next_header_map = IPTypeClasses
     _next_header_class_key = '_protocol'
 
     def __init__(self, **kwargs):
+        # the checksum isn't known (and so isn't incrementally
+        # updated by the setters) until it's first computed
+        self._csumopts = None
         # fill in fields with (essentially) zero values
         self.tos = 0x00
         self._totallen = IPv4._MINLEN
@@ -398,29 +407,37 @@ class IPv4(PacketHeaderBase):
         self._fragoffset = 0
         self.protocol = IPProtocol.ICMP
         self._csum = 0x0000
-        self.src = SpecialIPv4Addr.IP_ANY.value
-        self.dst = SpecialIPv4Addr.IP_ANY.value
+        self._src = self._dst = 0
         self._options = IPOptionList()
         super().__init__(**kwargs)
         
     def size(self):
-        return struct.calcsize(IPv4._PACKFMT) + self._options.raw_length()
+        return IPv4._MINLEN + self._options.raw_length()
 
     def pre_serialize(self, raw, pkt, i):
-        self._totallen = self.size() + len(raw)
+        totallen = self.size() + len(raw)
+        if self._csumopts is not None:
+            self._update_checksum(self._totallen, totallen)
+        self._totallen = totallen
+
+    def _serial_stamp(self):
+        # options are changed in place, without going through a setter
+        if len(self._options):
+            return None
+        return super()._serial_stamp()
 
     def to_bytes(self):
-        iphdr = struct.pack(IPv4._PACKFMT,
+        iphdr = IPv4._STRUCT.pack(
             4 << 4 | self.hl, self.tos, self._totallen,
             self.ipid, self._flags.value << 13 | self.fragment_offset,
             self.ttl, self.protocol.value, self.checksum,
-            self.src.packed, self.dst.packed)
+            self._src, self._dst)
         return iphdr + self._options.to_bytes()
 
     def from_bytes(self, raw):
         if len(raw) < 20:
             raise NotEnoughDataError("Not enough data to unpack IPv4 header (only {} bytes)".format(len(raw)))
-        headerfields = struct.unpack(IPv4._PACKFMT, raw[:20])
+        headerfields = IPv4._STRUCT.unpack_from(raw)
         v = headerfields[0] >> 4
         if v != 4:
             raise ValueError("Version in raw bytes for IPv4 isn't 4!")
@@ -428,19 +445,35 @@ class IPv4(PacketHeaderBase):
         if len(raw) < hl:
             raise NotEnoughDataError("Not enough data to unpack IPv4 header (only {} bytes, but header length field claims {})".format(len(raw), hl))
         optionbytes = raw[20:hl]
+        self._csumopts = None
         self.tos = headerfields[1]        
         self._totallen = headerfields[2]
         self.ipid = headerfields[3]
-        self.flags = IPFragmentFlag(headerfields[4] >> 13)
+        self.flags = headerfields[4] >> 13
         self.fragment_offset = headerfields[4] & 0x1fff
         self.ttl = headerfields[5]
-        self.protocol = IPProtocol(headerfields[6])
+        self.protocol = headerfields[6]
         self._csum = headerfields[7]
-        self.src = headerfields[8]
-        self.dst = headerfields[9]
+        self._src = headerfields[8]
+        self._dst = headerfields[9]
         self._options = IPOptionList.from_bytes(optionbytes)
+        # if the checksum on the wire is correct, start from it; as in a
+        # router, changes are folded into it rather than it being computed
+        # from scratch.  Otherwise it's computed in full when needed.
+        if checksum(raw[:hl]) == 0:
+            self._csumopts = bytes(optionbytes)
         return raw[hl:]
 
+    def __setstate__(self, state):
+        # headers pickled by earlier versions don't have _csumopts, and
+        # their _csum may not match the other fields.  Addresses used
+        # to be kept as IPv4Address objects.
+        self._csumopts = None
+        for attr, value in state[1].items():
+            if attr in ('_src', '_dst'):
+                value = _ipv4_to_int(value)
+            setattr(self, attr, value)
+
     def __eq__(self, other):
         return self.tos == other.tos and \
                 self.ipid == other.ipid and \
@@ -448,8 +481,8 @@ class IPv4(PacketHeaderBase):
                 self.fragment_offset == other.fragment_offset and \
                 self.ttl == other.ttl and \
                 self.protocol == other.protocol and \
-                self.src == other.src and \
-                self.dst == other.dst
+                self._src == other._src and \
+                self._dst == other._dst
 
     # accessors and mutators
     @property
@@ -466,9 +499,12 @@ class IPv4(PacketHeaderBase):
 
     @ttl.setter
     def ttl(self, value):
+        self._serialized = None
         value = int(value) 
         if not (0 <= value <= 255):
             raise ValueError("Invalid TTL value {}".format(value))
+        if self._csumopts is not None:
+            self._update_checksum(self._ttl << 8, value << 8)
         self._ttl = value
 
     @property
@@ -477,8 +513,11 @@ class IPv4(PacketHeaderBase):
 
     @tos.setter
     def tos(self, value):
+        self._serialized = None
         if not (0 <= value < 256):
             raise ValueError("Invalid type of service value; must be 0-255")
+        if self._csumopts is not None:
+            self._update_checksum(self._tos, value)
         self._tos = value
 
     @property
@@ -491,15 +530,17 @@ class IPv4(PacketHeaderBase):
 
     @dscp.setter
     def dscp(self, value):
+        self._serialized = None
         if not (0 <= value < 64):
             raise ValueError("Invalid DSCP value; must be 0-63")
-        self._tos = (self._tos & 0x03) | value << 2
+        self.tos = (self._tos & 0x03) | value << 2
 
     @ecn.setter
     def ecn(self, value):
+        self._serialized = None
         if not (0 <= value < 4):
             raise ValueError("Invalid ECN value; must be 0-3")
-        self._tos = (self._tos & 0xfa) | value
+        self.tos = (self._tos & 0xfa) | value
 
     @property
     def ipid(self):
@@ -507,8 +548,11 @@ class IPv4(PacketHeaderBase):
 
     @ipid.setter
     def ipid(self, value):
+        self._serialized = None
         if not (0 <= value < 65536):
             raise ValueError("Invalid IP ID value; must be 0-65535")
+        if self._csumopts is not None:
+            self._update_checksum(self._ipid, value)
         self._ipid = value
 
     @property
@@ -517,23 +561,51 @@ class IPv4(PacketHeaderBase):
 
     @protocol.setter
     def protocol(self, value):
-        self._protocol = IPProtocol(value)
+        self._serialized = None
+        value = _to_enum(IPProtocol, value)
+        if self._csumopts is not None:
+            self._update_checksum(self._protocol.value, value.value)
+        self._protocol = value
 
     @property
     def src(self):
-        return self._src
+        return IPv4Address(self._src)
 
     @src.setter
     def src(self, value):
-        self._src = IPAddr(value)
+        self._serialized = None
+        value = _ipv4_to_int(value)
+        if self._csumopts is not None:
+            self._update_checksum(self._src, value)
+        self._src = value
+
+    @property
+    def src_int(self):
+        '''
+        The source address as an integer, without building an
+        IPv4Address object.
+        '''
+        return self._src
 
     @property
     def dst(self):
-        return self._dst
+        return IPv4Address(self._dst)
 
     @dst.setter
     def dst(self, value):
-        self._dst = IPAddr(value)
+        self._serialized = None
+        value = _ipv4_to_int(value)
+        if self._csumopts is not None:
+            self._update_checksum(self._dst, value)
+        self._dst = value
+
+    @property
+    def dst_int(self):
+        '''
+        The destination address as an integer, without building an
+        IPv4Address object.
+        '''
+        return self._dst
 
     @property
     def flags(self):
@@ -541,7 +613,11 @@ class IPv4(PacketHeaderBase):
 
     @flags.setter
     def flags(self, value):
-        self._flags = IPFragmentFlag(value)
+        self._serialized = None
+        value = _to_enum(IPFragmentFlag, value)
+        if self._csumopts is not None:
+            self._update_checksum(self._flags.value << 13, value.value << 13)
+        self._flags = value
 
     @property
     def fragment_offset(self):
@@ -549,24 +625,48 @@ class IPv4(PacketHeaderBase):
 
     @fragment_offset.setter
     def fragment_offset(self, value):
+        self._serialized = None
         if not (0 <= value < 2**13):
             raise ValueError("Invalid fragment offset value")
+        if self._csumopts is not None:
+            self._update_checksum(self._fragoffset, value)
         self._fragoffset = value
     
     @property
     def hl(self):
         return self.size() // 4
 
+    def _update_checksum(self, old, new):
+        '''
+        Fold a change in header contents from old to new (ints made up
+        of whole 16-bit header words) into the checksum, using equation
+        3 from RFC 1624: HC' = ~(~HC + ~m + m').
+        '''
+        csum = ~self._csum & 0xffff
+        while old or new:
+            csum += (~old & 0xffff) + (new & 0xffff)
+            old >>= 16
+            new >>= 16
+        csum = (csum >> 16) + (csum & 0xffff)
+        csum += csum >> 16
+        self._csum = ~csum & 0xffff
+
     @property
     def checksum(self):
-        data = struct.pack(IPv4._PACKFMT,
-                    (4 << 4) + self.hl, self.tos,
-                    self._totallen, self.ipid,
-                    (self.flags.value << 13) | self.fragment_offset, 
-                    self.ttl,
-                    self.protocol.value, 0, self.src.packed, self.dst.packed)
-        data += self._options.to_bytes()
-        self._csum = checksum(data, 0)
+        # the checksum is kept up to date by the setters for the fixed
+        # fields, but options can change in place so if they differ from
+        # the last time the checksum was computed, start over.
+        options = self._options.to_bytes()
+        if options != self._csumopts:
+            data = IPv4._STRUCT.pack(
+                        (4 << 4) + self.hl, self.tos,
+                        self._totallen, self.ipid,
+                        (self.flags.value << 13) | self.fragment_offset, 
+                        self.ttl,
+                        self.protocol.value, 0, self._src, self._dst)
+            data += options
+            self._csum = checksum(data, 0)
+            self._csumopts = options
         return self._csum
 
     def __str__(self):
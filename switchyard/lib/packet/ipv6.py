@@ -6,7 +6,7 @@ from enum import IntEnum
 from ..logging import log_warn
 from .packet import PacketHeaderBase,Packet
 from ..address import EthAddr,IPAddr,SpecialIPv6Addr,SpecialEthAddr
-from .common import IPProtocol, checksum
+from .common import IPProtocol, checksum, _to_enum
 from ..exceptions import *
 
 from .icmpv6 import ICMPv6
@@ -25,6 +25,7 @@ References:
 class IPv6ExtensionHeader(PacketHeaderBase):
     __slots__ = ['_nextheader','_optdatalen','_optlenmultiplier']
     _PACKFMT = '!BB'
+    _STRUCT = struct.Struct(_PACKFMT)
     _MINLEN = 2
 
     def __init__(self, optlenmultiplier, **kwargs):
@@ -47,7 +48,7 @@ class IPv6ExtensionHeader(PacketHeaderBase):
 
     @nextheader.setter
     def nextheader(self, value):
-        self._nextheader = IPProtocol(value)
+        self._nextheader = _to_enum(IPProtocol, value)
 
     @property 
     def protocol(self):
@@ -55,7 +56,7 @@ class IPv6ExtensionHeader(PacketHeaderBase):
 
     @protocol.setter
     def protocol(self, value):
-        self._nextheader = IPProtocol(value)
+        self._nextheader = _to_enum(IPProtocol, value)
 
     def next_header_class(self):
         cls = IPTypeClasses.get(self.nextheader, None) 
@@ -64,14 +65,14 @@ class IPv6ExtensionHeader(PacketHeaderBase):
         return cls
 
     def to_bytes(self):
-        return struct.pack(IPv6ExtensionHeader._PACKFMT, 
+        return IPv6ExtensionHeader._STRUCT.pack(
             self.nextheader.value, self._optdatalen)
 
     def from_bytes(self, raw):
         if len(raw) < IPv6ExtensionHeader._MINLEN:
             raise NotEnoughDataError("Not enough data to unpack IPv6ExtensionHeader")
 
-        self.nextheader = IPProtocol(raw[0])
+        self.nextheader = raw[0]
         self._optdatalen = int(raw[1])
 
         if len(raw) < self._optdatalen * self._optlenmultiplier:
@@ -117,7 +118,7 @@ class IPv6RouteOption(IPv6ExtensionHeader):
         if self._routingtype == 2:
             rawaddr = remain[6:22]
             remain = remain[22:]
-            self._address = IPv6Address(rawaddr)
+            self._address = IPv6Address(bytes(rawaddr))
         else:
             raise ValueError("IPv6 routing option only supports type 2 (but I got type {})".format(self._routingtype))
         return remain
@@ -125,6 +126,7 @@ class IPv6RouteOption(IPv6ExtensionHeader):
 class IPv6Fragment(IPv6ExtensionHeader):
     __slots__ = ['_id','_offset','_morefragments']
     _PACKFMT = '!HI'
+    _STRUCT = struct.Struct(_PACKFMT)
     _MINLEN = 6
 
     def __init__(self, **kwargs):
@@ -163,14 +165,14 @@ class IPv6Fragment(IPv6ExtensionHeader):
 
     def to_bytes(self):
         common = super().to_bytes()
-        payload = struct.pack(IPv6Fragment._PACKFMT, self._offset << 3 | int(self._morefragments), self._id)
+        payload = IPv6Fragment._STRUCT.pack(self._offset << 3 | int(self._morefragments), self._id)
         return common + payload
 
     def from_bytes(self, raw):
         remain = super().from_bytes(raw)
         if len(remain) < IPv6Fragment._MINLEN:
             raise NotEnoughDataError("Not enough data to unpack IPv6Fragment extension header")
-        offsetfield, xid = struct.unpack(IPv6Fragment._PACKFMT, remain[:IPv6Fragment._MINLEN])
+        offsetfield, xid = IPv6Fragment._STRUCT.unpack_from(remain)
         self._id = xid
         self._offset = offsetfield >> 3
         self._morefragments = bool(offsetfield & 0x1)
@@ -299,7 +301,7 @@ class HomeAddress(IPv6Option):
     @staticmethod
     def from_bytes(raw):
         assert(len(raw) == 16)
-        return HomeAddress(raw)
+        return HomeAddress(bytes(raw))
 
     def __str__(self):
         return "{} ({})".format(self.__class__.__name__, self._value)
@@ -417,7 +419,8 @@ class IPv6Mobility(IPv6ExtensionHeader):
 
     __slots__ = ('_mhtype','_checksum','_data','_src','_dst')
     _PACKFMT = '!BBH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, **kwargs):
         self._nextheader = IPProtocol.IPv6NoNext
@@ -428,7 +431,7 @@ class IPv6Mobility(IPv6ExtensionHeader):
         super().__init__(8, **kwargs)
 
     def pre_serialize(self, raw, pkt, i):
-        ipv6hdr = pkt.get_header(IPv6)
+        ipv6hdr = pkt._peek_header(IPv6)
         self._src = ipv6hdr.src
         self._dst = ipv6hdr.dst
 
@@ -454,7 +457,7 @@ class IPv6Mobility(IPv6ExtensionHeader):
         if computecsum:
             self._compute_checksum()
         exthdr = super().to_bytes()
-        mobhdr = struct.pack(IPv6Mobility._PACKFMT, self._mhtype.value, 0, self._checksum)
+        mobhdr = IPv6Mobility._STRUCT.pack(self._mhtype.value, 0, self._checksum)
         remain = struct.pack(_IPv6MobilityHeaderStruct[self._mhtype], *self._data)
         return exthdr + mobhdr + remain
 
@@ -463,9 +466,8 @@ class IPv6Mobility(IPv6ExtensionHeader):
         remain = raw[2:]
         if len(remain) < IPv6Mobility._MINLEN:
             raise NotEnoughDataError("Not enough data to unpack IPv6Mobility header")
-        mhtype,reserved,checksum = struct.unpack(IPv6Mobility._PACKFMT, 
-                                                 remain[:IPv6Mobility._MINLEN])
-        self._mhtype = IPv6MobilityHeaderType(mhtype)
+        mhtype,reserved,checksum = IPv6Mobility._STRUCT.unpack_from(remain)
+        self._mhtype = _to_enum(IPv6MobilityHeaderType, mhtype)
         self._checksum = checksum
         mobheaderstruct = _IPv6MobilityHeaderStruct[self._mhtype]
         structsize = struct.calcsize(mobheaderstruct)
@@ -492,8 +494,11 @@ class IPv6(PacketHeaderBase):
     __slots__ = ['_trafficclass','_flowlabel','_ttl',
                  '_nextheader','_payloadlen',
                  '_src','_dst','_extheaders']
+    _cacheable = True
+    _uses_tail_length = True
     _PACKFMT = '!BBHHBB16s16s'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
     _next_header_map = IPTypeClasses
     _next_header_class_key = '_nextheader'
 
@@ -515,7 +520,7 @@ class IPv6(PacketHeaderBase):
         self._payloadlen = len(raw)
 
     def to_bytes(self):
-        return struct.pack(IPv6._PACKFMT,
+        return IPv6._STRUCT.pack(
             6 << 4 | self.trafficclass >> 4,
             (self.trafficclass & 0x0f) << 4 | (self.flowlabel & 0xf0000) >> 16,
             self.flowlabel & 0x0ffff,
@@ -525,14 +530,14 @@ class IPv6(PacketHeaderBase):
     def from_bytes(self, raw):
         if len(raw) < IPv6._MINLEN:
             raise NotEnoughDataError("Not enough data to unpack IPv6 header (only {} bytes)".format(len(raw)))
-        fields = struct.unpack(IPv6._PACKFMT, raw[:IPv6._MINLEN])
+        fields = IPv6._STRUCT.unpack_from(raw)
         ipversion = fields[0] >> 4
         if ipversion != 6:
             raise ValueError("Trying to parse IPv6 header, but IP version is not 6! ({})".format(ipversion))
         self.trafficclass = (fields[0] & 0x0f) << 4 | (fields[1] >> 4)
         self.flowlabel = (fields[1] & 0x0f) << 16 | fields[2]
         self._payloadlen = fields[3]
-        self.nextheader = IPProtocol(fields[4])
+        self.nextheader = fields[4]
         self.ttl = fields[5]
         self.src = IPv6Address(fields[6])
         self.dst = IPv6Address(fields[7])
@@ -555,6 +560,7 @@ class IPv6(PacketHeaderBase):
 
     @trafficclass.setter
     def trafficclass(self, value):
+        self._serialized = None
         self._trafficclass = value
 
     @property
@@ -563,6 +569,7 @@ class IPv6(PacketHeaderBase):
 
     @flowlabel.setter
     def flowlabel(self, value):
+        self._serialized = None
         self._flowlabel = value
 
     @property
@@ -571,7 +578,8 @@ class IPv6(PacketHeaderBase):
 
     @nextheader.setter
     def nextheader(self, value):
-        self._nextheader = IPProtocol(value)
+        self._serialized = None
+        self._nextheader = _to_enum(IPProtocol, value)
 
     @property
     def ttl(self):
@@ -579,6 +587,7 @@ class IPv6(PacketHeaderBase):
 
     @ttl.setter
     def ttl(self, value):
+        self._serialized = None
         self._ttl = int(value)
 
     @property 
@@ -587,6 +596,7 @@ class IPv6(PacketHeaderBase):
 
     @hopcount.setter
     def hopcount(self, value):
+        self._serialized = None
         self.ttl = value
 
     @property
@@ -595,6 +605,7 @@ class IPv6(PacketHeaderBase):
 
     @src.setter
     def src(self, value):
+        self._serialized = None
         self._src = value
 
     @property
@@ -603,6 +614,7 @@ class IPv6(PacketHeaderBase):
 
     @dst.setter
     def dst(self, value):
+        self._serialized = None
         self._dst = value
 
     def __str__(self):
@@ -18,6 +18,9 @@ AFTypeNames = {
 
 class Null(PacketHeaderBase):
     __slots__ = ['_af']
+    _cacheable = True
+    _PACKFMT = '=I'
+    _STRUCT = struct.Struct(_PACKFMT)
 
     def __init__(self, af=socket.AF_INET):
         self._af = int(af)
@@ -32,20 +35,22 @@ class Null(PacketHeaderBase):
 
     @af.setter
     def af(self,value):
+        self._serialized = None
         self._af = int(value)
 
     def to_bytes(self):
         '''
         Return packed byte representation of the Ethernet header.
         '''
-        return struct.pack('=I', self._af)
+        return Null._STRUCT.pack(self._af)
 
     def from_bytes(self, raw):
         '''Return a Null header object reconstructed from raw bytes, or an
         Exception if we can't resurrect the packet.'''
         if len(raw) < 4:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct a Null object".format(len(raw)))
-        fields = struct.unpack('=I', raw[:4])
+        fields = Null._STRUCT.unpack_from(raw)
+        self._serialized = None
         self._af = fields[0]
         return raw[4:]
 
@@ -1,21 +1,31 @@
 from abc import ABCMeta, abstractmethod
 from copy import deepcopy
+from itertools import count
 
 from ..logging import log_warn
 from ..exceptions import *
 
+# source of the stamps given to headers as Packet.to_bytes serializes them
+_serial_stamps = count(1)
+
 class Packet(object):
     '''
     Base class for packet headers.
     '''
-    __slots__ = ['_headers','_raw']
+    __slots__ = ['_headers','_raw','_pending','_index','_shared','_cache',
+                 '_rawstamps']
 
-    def __init__(self, raw=None, first_header=None):
+    def __init__(self, raw=None, first_header=None, lazy=False):
         self._headers = []
         self._raw = None
+        self._pending = None
+        self._index = None
+        self._shared = None
+        self._cache = None
+        self._rawstamps = None
         if raw:
             self._raw = raw
-            self._parse(raw, first_header)            
+            self._parse(raw, first_header, lazy)
 
     def __len__(self):
         '''Return the packed length of this packet, and all
@@ -24,47 +34,259 @@ class Packet(object):
 
     def size(self):
         '''Return the packed length of this header'''
+        self._parse_all()
         return sum([len(ph) for ph in self._headers])
 
     def to_bytes(self):
         '''
         Returns serialized bytes object representing all headers/
         payloads in this packet'''
-        rawlist = []
-        i = len(self._headers)-1
-        while i >= 0:
-            self._headers[i].pre_serialize(b''.join(rawlist), self, i)
-            rawlist.insert(0, self._headers[i].to_bytes())
-            i -= 1
-        self._raw = b''.join(rawlist)
+        self._parse_all()
+        headers = self._headers
+        stamps = [ph._serial_stamp() for ph in headers]
+        contexts = [ph._serial_context(self) for ph in headers]
+        cache = self._cache
+        if cache is not None:
+            image, offsets, oldstamps, oldcontexts = cache
+            if stamps == oldstamps and None not in stamps and \
+                contexts == oldcontexts:
+                return image
+            oldview = memoryview(image)
+
+        # Headers are serialized back-to-front into a single buffer sized
+        # from the headers' own size() estimates, so that the "tail" handed
+        # to each pre_serialize call is just a view on what has already been
+        # written rather than a freshly joined copy.  A header that hasn't
+        # changed since the last serialization (and whose output doesn't
+        # depend on a part of the tail that has changed) is copied from the
+        # previous image rather than being serialized again.
+        sizes = [ph.size() for ph in headers]
+        buf = bytearray(sum(sizes))
+        pos = len(buf)
+        lengths = [0] * len(headers)
+        tail_same_len = tail_same_bytes = cache is not None
+        for i in range(len(headers)-1, -1, -1):
+            ph = headers[i]
+            reuse = False
+            if cache is not None:
+                oldhdr = oldview[offsets[i]:offsets[i+1]]
+                if stamps[i] is not None and stamps[i] == oldstamps[i] and \
+                    contexts[i] == oldcontexts[i]:
+                    reuse = tail_same_bytes or (not ph._uses_tail_bytes and \
+                        (tail_same_len or not ph._uses_tail_length))
+            if reuse:
+                hdrbytes = oldhdr
+            else:
+                ph.pre_serialize(memoryview(buf)[pos:], self, i)
+                hdrbytes = ph.to_bytes()
+                ph._stamp_serialized(next(_serial_stamps))
+                stamps[i] = ph._serial_stamp()
+            hdrlen = len(hdrbytes)
+            if hdrlen > pos:
+                # size() under-reported; make room for this header and
+                # the (estimated) headers in front of it.
+                extra = sum(sizes[:i]) + hdrlen - pos
+                buf = bytearray(extra) + buf
+                pos += extra
+            buf[pos-hdrlen:pos] = hdrbytes
+            pos -= hdrlen
+            lengths[i] = hdrlen
+            if tail_same_len and not reuse:
+                tail_same_len = hdrlen == len(oldhdr)
+                tail_same_bytes = tail_same_bytes and tail_same_len and \
+                    oldhdr == hdrbytes
+        self._raw = bytes(memoryview(buf)[pos:])
+        self._rawstamps = None
+        offsets = [0]
+        for hdrlen in lengths:
+            offsets.append(offsets[-1] + hdrlen)
+        self._cache = (self._raw, offsets, stamps, contexts)
         return self._raw
 
-    def _parse(self, raw, next_cls):
+    def _parse(self, raw, next_cls, lazy=False):
         '''
         Parse a raw bytes object and construct the list of packet header
         objects (and possible remaining bytes) that are part of this packet.
+        If lazy is True, headers are only reconstructed as they are
+        accessed; until then, the unparsed bytes and the class of the
+        next header are held in self._pending.
+
+        Headers are decoded from a memoryview on raw, so each layer
+        hands a view (not a copy) of the rest of the packet to the next,
+        and any payload left over refers back into the original buffer.
         '''
         if next_cls is None:
             from switchyard.lib.packet import Ethernet
             next_cls = Ethernet
+        if isinstance(raw, (bytes, bytearray)):
+            raw = memoryview(raw)
 
         self._headers = []
-        while issubclass(next_cls, PacketHeaderBase):
+        self._index = None
+        self._cache = None
+        self._rawstamps = []
+        self._pending = (raw, next_cls)
+        if not lazy:
+            self._parse_all()
+
+    def _parse_next(self):
+        '''
+        Reconstruct the next header from the unparsed portion of the
+        packet, or the remaining payload if there are no more headers
+        to decode.
+        '''
+        raw, next_cls = self._pending
+        if next_cls is not None and issubclass(next_cls, PacketHeaderBase):
             packet_header_obj = next_cls()
             raw = packet_header_obj.from_bytes(raw)
-            self.add_header(packet_header_obj)
-            next_cls = packet_header_obj.next_header_class()
-            if next_cls is None:
-                break
-        if raw:
-            self.add_header(RawPacketContents(raw))
+            self._append_parsed(packet_header_obj)
+            self._pending = (raw, packet_header_obj.next_header_class())
+        else:
+            self._pending = None
+            if raw:
+                self._append_parsed(RawPacketContents(raw))
+
+    def _append_parsed(self, ph):
+        # stamp the new header so that _raw_is_current can tell whether
+        # it has been modified since it was reconstructed from self._raw
+        self._append(ph)
+        ph._stamp_serialized(next(_serial_stamps))
+        if self._rawstamps is not None:
+            self._rawstamps.append(getattr(ph, '_serialized', None))
+
+    def _append(self, ph):
+        self._headers.append(ph)
+        self._cache = None
+        if self._index is not None:
+            self._index_header(len(self._headers)-1, ph)
+
+    def _raw_is_current(self):
+        '''
+        Return True if self._raw still holds the bytes that this packet's
+        headers were reconstructed from, i.e., no header has been added,
+        removed or replaced, and none has been modified (as far as its
+        class tracks changes) since.
+        '''
+        stamps = self._rawstamps
+        if stamps is None or self._raw is None:
+            return False
+        for ph, stamp in zip(self._headers, stamps):
+            if getattr(ph, '_serialized', None) != stamp:
+                return False
+        return True
+
+    def _index_header(self, idx, ph):
+        cls = ph.__class__
+        self._index.setdefault(cls.__name__, idx)
+        for basecls in cls.__mro__:
+            self._index.setdefault(basecls, idx)
+
+    def _lookup(self, key):
+        '''
+        Return the index of the first header whose class (or any of its 
+        base classes) is key, or whose class name is key.  Returns -1 if
+        there is no such header.
+
+        The index is a dict from header class and class name to the 
+        position of the first matching header.  It is extended as headers 
+        are appended and rebuilt on first use after any other change to 
+        the header list.
+        '''
+        if self._index is None:
+            self._index = {}
+            for idx, ph in enumerate(self._headers):
+                self._index_header(idx, ph)
+        idx = self._index.get(key)
+        while idx is None and self._pending is not None:
+            self._parse_next()
+            idx = self._index.get(key)
+        if idx is None:
+            return -1
+        return idx
+
+    def _parse_all(self):
+        while self._pending is not None:
+            self._parse_next()
+
+    def _parsed_through(self, index):
+        '''
+        Make sure that the header at (non-negative) index has been
+        reconstructed, if it exists.  Returns True if it does.
+        '''
+        while index >= len(self._headers) and self._pending is not None:
+            self._parse_next()
+        return index < len(self._headers)
+
+    def __getstate__(self):
+        # unparsed data may be a memoryview, which can't be copied or
+        # pickled, so finish decoding first.  The state has the same
+        # form as the default for a __slots__ class so that packets
+        # pickled by earlier versions (e.g., in .srpy files) still load.
+        self._parse_all()
+        raw = self._raw
+        if raw is not None and not isinstance(raw, bytes):
+            raw = bytes(raw)
+        return (None, {'_headers': self._headers, '_raw': raw})
+
+    def __setstate__(self, state):
+        slotstate = state[1]
+        self._headers = slotstate['_headers']
+        self._raw = slotstate.get('_raw', None)
+        self._pending = None
+        self._index = None
+        self._shared = None
+        self._cache = None
+        self._rawstamps = None
 
     @staticmethod
-    def from_bytes(raw, first_header):
+    def from_bytes(raw, first_header, lazy=False):
         '''Create a new packet by parsing the contents of a bytestring'''
-        p = Packet(raw, first_header)        
+        p = Packet(raw, first_header, lazy)
+        return p
+
+    def clone(self):
+        '''
+        Return a copy of this packet.  Unlike copy.deepcopy, this is
+        cheap: the new packet shares header objects (and any raw, not yet
+        decoded data) with this one, and a header is only duplicated the
+        first time it is accessed through either packet (e.g., via
+        indexing, get_header, or iteration), so that modifying a header
+        in one packet doesn't change the other.  Note that a header
+        object obtained from this packet *before* cloning is shared by
+        both packets until each has accessed it again.
+        '''
+        p = Packet()
+        p._headers = list(self._headers)
+        p._raw = self._raw
+        p._pending = self._pending
+        p._cache = self._cache
+        if self._rawstamps is not None:
+            p._rawstamps = list(self._rawstamps)
+        if self._index is not None:
+            p._index = dict(self._index)
+        # the shared header objects themselves are held (keyed by id),
+        # so that an id can't be reused by another header while it's
+        # still recorded as shared
+        self._shared = dict((id(ph), ph) for ph in self._headers)
+        p._shared = dict(self._shared)
         return p
 
+    def _own(self, index):
+        '''
+        Return the header at index, first replacing it with a copy if
+        the header object is shared with a clone of this packet.
+        '''
+        ph = self._headers[index]
+        if self._shared and self._shared.pop(id(ph), None) is ph:
+            ph = deepcopy(ph)
+            self._headers[index] = ph
+        return ph
+
+    def _unshare(self, ph):
+        # forget a header that's being removed from this packet
+        if self._shared:
+            self._shared.pop(id(ph), None)
+
     def __iadd__(self, ph):
         '''Add the packet header to the end of this packet; return
            this packet header.  Only += (iadd) is defined, since 
@@ -91,12 +313,14 @@ class Packet(object):
         '''
         Return a list of packet header names in this packet.
         '''
+        self._parse_all()
         return [ ph.__class__.__name__ for ph in self._headers ]
 
     def num_headers(self):
         '''
         Return the number of headers in the packet.
         '''
+        self._parse_all()
         return len(self._headers)
 
     def prepend_header(self, ph):
@@ -104,7 +328,11 @@ class Packet(object):
         Insert a PacketHeader object at the beginning of this packet
         (i.e., as the first header of the packet).
         '''
+        self._parse_all()
         self._headers.insert(0, ph)
+        self._index = None
+        self._cache = None
+        self._rawstamps = None
 
     def add_header(self, ph):
         '''
@@ -116,7 +344,9 @@ class Packet(object):
         if isinstance(ph, bytes):
             ph = RawPacketContents(ph)
         if isinstance(ph, PacketHeaderBase):
-            self._headers.append(ph)
+            self._parse_all()
+            self._append(ph)
+            self._rawstamps = None
             return self
         raise Exception("Payload for a packet header must be an object that is a subclass of PacketHeaderBase, or a bytes object.")
 
@@ -126,7 +356,11 @@ class Packet(object):
         Any headers previously in the Packet from index idx:len(ph) are shifted to
         make room for the new packet.
         '''
+        self._parse_all()
         self._headers.insert(idx, ph)
+        self._index = None
+        self._cache = None
+        self._rawstamps = None
 
     def add_payload(self, ph):
         '''Alias for add_header'''
@@ -146,10 +380,10 @@ class Packet(object):
         Return the header object that has the given (string) header
         class name.  Returns None if no such header exists.
         '''
-        for hdr in self._headers:
-            if hdr.__class__.__name__ == hdrname:
-                return hdr
-        return None
+        idx = self._lookup(hdrname)
+        if idx == -1:
+            return None
+        return self._own(idx)
 
     def get_header(self, hdrclass, returnval=None):
         '''
@@ -160,10 +394,21 @@ class Packet(object):
         if isinstance(hdrclass, str):
             return self.get_header_by_name(hdrclass)
 
-        for hdr in self._headers:
-            if isinstance(hdr, hdrclass):
-                return hdr
-        return returnval
+        idx = self.get_header_index(hdrclass)
+        if idx == -1:
+            return returnval
+        return self._own(idx)
+
+    def _peek_header(self, hdrclass):
+        '''
+        Like get_header, but never copies a header shared with a clone.
+        For use where the header is only going to be read, e.g., by 
+        pre_serialize implementations.
+        '''
+        idx = self._lookup(hdrclass)
+        if idx == -1:
+            return None
+        return self._headers[idx]
 
     def get_header_index(self, hdrclass, startidx=0):
         '''
@@ -171,18 +416,33 @@ class Packet(object):
         starting at startidx (default=0), or -1 if the
         header class isn't found in the list of headers.
         '''
-        for hdridx in range(startidx, len(self._headers)):
+        if startidx == 0 and isinstance(hdrclass, type):
+            return self._lookup(hdrclass)
+        hdridx = startidx
+        while self._parsed_through(hdridx):
             if isinstance(self._headers[hdridx], hdrclass):
                 return hdridx
+            hdridx += 1
         return -1
 
     def __iter__(self):
-        return iter(self._headers)
+        if self._pending is None and not self._shared:
+            return iter(self._headers)
+        return self._iter_lazy()
+
+    def _iter_lazy(self):
+        i = 0
+        while self._parsed_through(i):
+            yield self._own(i)
+            i += 1
 
     def _checkidx(self, index):
         if isinstance(index, int):
             if index < 0:
+                self._parse_all()
                 index = len(self._headers) + index
+            else:
+                self._parsed_through(index)
             if not (0 <= index < len(self._headers)):
                 raise IndexError("Index out of range")
             return index
@@ -190,12 +450,12 @@ class Packet(object):
     def __getitem__(self, index):
         if isinstance(index, int):
             index = self._checkidx(index)
-            return self._headers[index]
+            return self._own(index)
         elif isinstance(index, type) and issubclass(index, PacketHeaderBase):
             idx = self.get_header_index(index)
             if idx == -1:
                 raise KeyError("No such header type exists.")
-            return self._headers[idx]
+            return self._own(idx)
         else:
             raise IndexError("Indexes must be integers or header class names")
 
@@ -205,9 +465,15 @@ class Packet(object):
         index = self._checkidx(index)
         if not isinstance(value, (PacketHeaderBase, bytes)):
             raise TypeError("Can't assign a non-packet header in a packet")
+        self._parse_all()
+        self._unshare(self._headers[index])
         self._headers[index] = value
+        self._index = None
+        self._cache = None
+        self._rawstamps = None
 
     def __contains__(self, obj):
+        self._parse_all()
         for ph in self._headers:
             if ph is obj or \
                 (isinstance(obj, ph.__class__) and ph == obj):
@@ -217,12 +483,22 @@ class Packet(object):
     def __delitem__(self, index):
         if isinstance(index, int):
             index = self._checkidx(index)
+            self._parse_all()
+            self._unshare(self._headers[index])
             del self._headers[index]
+            self._index = None
+            self._cache = None
+            self._rawstamps = None
         elif isinstance(index, type) and issubclass(index, PacketHeaderBase):
             idx = self.get_header_index(index)
             if idx == -1:
                 raise KeyError("No such header type exists.")
+            self._parse_all()
+            self._unshare(self._headers[idx])
             del self._headers[idx]
+            self._index = None
+            self._cache = None
+            self._rawstamps = None
         else:
             raise IndexError("Indexes must be integers or header class names")
 
@@ -231,13 +507,13 @@ class Packet(object):
             raise TypeError("Can't compare Packet with non-Packet for equality")
         if len(self.headers()) != len(other.headers()):
             return False
-        for i in range(len(other.headers())):
-            if not isinstance(other[i], self[i].__class__) \
-                    or self[i] != other[i]:
+        for mine, theirs in zip(self._headers, other._headers):
+            if not isinstance(theirs, mine.__class__) or mine != theirs:
                 return False
         return True
 
     def __str__(self):
+        self._parse_all()
         return ' | '.join([str(ph) for ph in self._headers if isinstance(ph, PacketHeaderBase)])
 
 
@@ -245,10 +521,21 @@ class PacketHeaderBase(metaclass=ABCMeta):
     '''
     Base class for packet headers.
     '''
-    __slots__ = []
+    __slots__ = ['_serialized']
     _next_header_map = {}
     _next_header_class_key = ''
 
+    # Header classes that set _cacheable to True promise that every
+    # change to a header's contents goes through a property setter (or
+    # from_bytes) that resets self._serialized to None.  Packet.to_bytes
+    # can then reuse the bytes from a previous serialization of the
+    # header as long as nothing it depends on has changed.  The other two
+    # attributes say whether a header's serialized form depends on the 
+    # length, or on the actual bytes, of the headers that follow it.
+    _cacheable = False
+    _uses_tail_length = False
+    _uses_tail_bytes = False
+
     def __init__(self, **kwargs):
         for attrname, value in kwargs.items():
             setattr(self, attrname, value)
@@ -292,6 +579,29 @@ class PacketHeaderBase(metaclass=ABCMeta):
             log_warn("No class exists to handle next header value {}".format(key))
         return rv
 
+    def _serial_stamp(self):
+        '''
+        Return the stamp given to this header the last time it was
+        serialized as part of a Packet, or None if it has changed since
+        then (or its class doesn't track changes).
+        '''
+        if not self._cacheable:
+            return None
+        return getattr(self, '_serialized', None)
+
+    def _stamp_serialized(self, stamp):
+        if self._cacheable:
+            self._serialized = stamp
+
+    def _serial_context(self, pkt):
+        '''
+        Return a value summarizing anything in *other* headers of pkt 
+        (besides the ones that follow this header) that the serialized
+        form of this header depends on, e.g., IP addresses used in a
+        transport-layer pseudo-header checksum.
+        '''
+        return None
+
     def pre_serialize(self, raw, packet, i):
         '''
         This method is called by the Switchyard framework just before any
@@ -301,9 +611,11 @@ class PacketHeaderBase(metaclass=ABCMeta):
         access to header fields that are outside its scope (e.g., in IPv6,
         the checksum includes the IPv6 source/dst addresses).
 
-        The three parameters to this method are the raw (bytes) representation
+        The three parameters to this method are the raw (bytes-like) representation
         of the "tail" of the packet (i.e., headers that come after this one),
         a reference to the full packet object, and the index of the current header.
+        The tail is passed as a memoryview on the packet's serialization buffer;
+        convert it with bytes() if a copy needs to be kept beyond the call.
         This method should not return anything.
         '''
         pass
@@ -364,32 +676,48 @@ class NullPacketHeader(PacketHeaderBase):
 
 
 class RawPacketContents(PacketHeaderBase):
+    '''
+    Uninterpreted packet contents.  When constructed from a memoryview
+    (as happens when a Packet is parsed from raw bytes), the view is
+    kept as-is and only turned into a bytes object the first time the
+    contents are asked for.
+    '''
     __slots__ = ['_raw'] 
+    _cacheable = True
 
     def __init__(self, raw=None):
         if isinstance(raw, str):
             raw = bytes(raw, 'utf8')
-        elif isinstance(raw, bytes):
+        elif isinstance(raw, (bytes, memoryview)):
             pass
         else:
             raise TypeError("RawPacketContents must be initialized with either str or bytes.  You gave me {}".format(raw.__class__.__name__))
         self._raw = raw
 
     def to_bytes(self):
+        if not isinstance(self._raw, bytes):
+            self._raw = bytes(self._raw)
         return self._raw    
 
     @property
     def data(self):
-        return self._raw
+        return self.to_bytes()
 
     def from_bytes(self, raw):
-        if isinstance(raw, bytes):
-            self._raw = bytes(raw)
+        self._serialized = None
+        if isinstance(raw, (bytes, memoryview)):
+            self._raw = raw
         elif isinstance(raw, str):
             self._raw = bytes(raw, 'utf8')
         else:
             raise TypeError("RawPacketContents must be initialized with either str or bytes.  You gave me {}".format(raw.__class__.__name__))
 
+    def __getstate__(self):
+        return (None, {'_raw': self.to_bytes()})
+
+    def __setstate__(self, state):
+        self._raw = state[1]['_raw']
+
     def size(self):
         return len(self._raw)
 
@@ -402,4 +730,4 @@ class RawPacketContents(PacketHeaderBase):
         if len(self._raw) < 10:
             ellipse = ''
         return '{} ({} bytes) {}{}'.format(self.__class__.__name__,
-            len(self._raw), self._raw[:10], ellipse)
+            len(self._raw), bytes(self._raw[:10]), ellipse)
@@ -21,7 +21,8 @@ class RIPCommand(IntEnum):
 class RIPRouteEntry(object):
     __slots__ = ('_family','_tag','_addr','_nexthop','_metric')
     _PACKFMT = '!HHIIII'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, address=SpecialIPv4Addr.IP_ANY.value, netmask='0.0.0.0', nexthop='0.0.0.0', family=2, metric=RIP_INFINITY, tag=0):
         self._family = family
@@ -41,7 +42,7 @@ class RIPRouteEntry(object):
         return s
 
     def to_bytes(self):
-        return struct.pack(RIPRouteEntry._PACKFMT, self._family, self.tag,
+        return RIPRouteEntry._STRUCT.pack(self._family, self.tag,
                            int(self._addr.network_address), 
                            int(self._addr.netmask), int(self.nexthop),
                            self.metric)
@@ -50,7 +51,7 @@ class RIPRouteEntry(object):
     def from_bytes(raw):
         if len(raw) != RIPRouteEntry._MINLEN:
             raise NotEnoughDataError("Wrong number of bytes to reconstruct RIP Route Entry")
-        fields = struct.unpack(RIPRouteEntry._PACKFMT, raw)            
+        fields = RIPRouteEntry._STRUCT.unpack(raw)            
         entry = RIPRouteEntry()
         entry._family = int(fields[0])
         entry._tag = int(fields[1])
@@ -98,7 +99,8 @@ class RIPRouteEntry(object):
 class RIPv2(PacketHeaderBase):
     __slots__ = ('_command','_routes')
     _PACKFMT = '!BBxx'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _MINLEN = _STRUCT.size
 
     def __init__(self, raw=None, **kwargs):
         self.command = RIPCommand.Request
@@ -114,7 +116,7 @@ class RIPv2(PacketHeaderBase):
         '''
         Return packed byte representation of the UDP header.
         '''
-        hdr = struct.pack(RIPv2._PACKFMT, self.command.value, 2)
+        hdr = RIPv2._STRUCT.pack(self.command.value, 2)
         routes = b''.join([r.to_bytes() for r in self._routes])
         return hdr + routes
 
@@ -123,7 +125,7 @@ class RIPv2(PacketHeaderBase):
             raw = raw.to_bytes()
         if len(raw) < RIPv2._MINLEN:
             raise NotEnoughDataError("Not enough bytes to reconstruct RIPv2 header")
-        fields = struct.unpack(RIPv2._PACKFMT, raw[:RIPv2._MINLEN])
+        fields = RIPv2._STRUCT.unpack_from(raw)
         self.command = fields[0]
         version = int(fields[1])
         if version != 2:
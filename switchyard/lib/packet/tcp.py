@@ -67,8 +67,13 @@ class TCPFlags(IntEnum):
 class TCP(PacketHeaderBase):
     __slots__ = ['_src','_dst','_seq','_ack',
         '_flags','_window','_urg','_options','_len', '_checksum']
+    _cacheable = True
+    _uses_tail_length = True
+    _uses_tail_bytes = True
     _PACKFMT = '!HHIIHHHH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _PSEUDOSTRUCT = struct.Struct('!IIxBH')
+    _MINLEN = _STRUCT.size
     _next_header_map = {}
     _next_header_class_key = ''
 
@@ -84,12 +89,12 @@ class TCP(PacketHeaderBase):
         super().__init__(**kwargs)
 
     def size(self):
-        return struct.calcsize(TCP._PACKFMT)
+        return TCP._MINLEN
 
     def _compute_checksum_ipv4(self, ip4, xdata):
         if ip4 is None:
             return 0
-        phdr = struct.pack('!IIxBH', int(ip4.src), int(ip4.dst), 
+        phdr = TCP._PSEUDOSTRUCT.pack(int(ip4.src), int(ip4.dst), 
             ip4.protocol.value, self._len)
         tcphdr = self._make_header(0)
         return checksum(phdr + tcphdr + xdata)
@@ -98,11 +103,24 @@ class TCP(PacketHeaderBase):
         self._len = self.size() + len(raw)
         # checksum calc currently assumes we're only dealing with ipv4.
         # will need to be modified for ipv6 support...
-        self._checksum = self._compute_checksum_ipv4(pkt.get_header_by_name('IPv4'), raw)
+        self._checksum = self._compute_checksum_ipv4(pkt._peek_header('IPv4'), raw)
+
+    def _serial_context(self, pkt):
+        # the pseudo-header fields that go into the checksum
+        ip4 = pkt._peek_header('IPv4')
+        if ip4 is None:
+            return None
+        return (ip4.src, ip4.dst, ip4.protocol)
+
+    def _serial_stamp(self):
+        # options aren't tracked, so don't reuse a header that has any
+        if self._options._optlist:
+            return None
+        return super()._serial_stamp()
 
     def _make_header(self, csum):
         offset_flags = self.offset << 12 | self._flags
-        header = struct.pack(TCP._PACKFMT, self.src, self.dst,
+        header = TCP._STRUCT.pack(self.src, self.dst,
             self.seq, self.ack, offset_flags, self.window,
             csum, self.urgent_pointer)
         return header
@@ -119,7 +137,8 @@ class TCP(PacketHeaderBase):
            Exception if we can't resurrect the packet.'''
         if len(raw) < TCP._MINLEN:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct an TCP object".format(len(raw)))
-        fields = struct.unpack(TCP._PACKFMT, raw[:TCP._MINLEN])
+        fields = TCP._STRUCT.unpack_from(raw)
+        self._serialized = None
         self._src = fields[0]
         self._dst = fields[1]
         self._seq = fields[2]        
@@ -159,10 +178,12 @@ class TCP(PacketHeaderBase):
 
     @src.setter
     def src(self,value):
+        self._serialized = None
         self._src = value
 
     @dst.setter
     def dst(self,value):
+        self._serialized = None
         self._dst = value
 
     def __str__(self):
@@ -175,6 +196,7 @@ class TCP(PacketHeaderBase):
 
     @seq.setter
     def seq(self, value):
+        self._serialized = None
         self._seq = value
 
     @property
@@ -183,6 +205,7 @@ class TCP(PacketHeaderBase):
 
     @ack.setter
     def ack(self, value):
+        self._serialized = None
         self._ack = value
 
     @property
@@ -191,6 +214,7 @@ class TCP(PacketHeaderBase):
 
     @window.setter
     def window(self, value):
+        self._serialized = None
         self._window = value
 
     @property 
@@ -215,6 +239,7 @@ class TCP(PacketHeaderBase):
 
     @urgent_pointer.setter
     def urgent_pointer(self, value):
+        self._serialized = None
         self._urg = value
 
     @property
@@ -228,6 +253,7 @@ class TCP(PacketHeaderBase):
         return (self._flags & mask) == mask
 
     def _setflag(self, flag, value):
+        self._serialized = None
         mask = 0x01 << flag.value 
         if value:
             self._flags = self._flags | mask
@@ -240,6 +266,7 @@ class TCP(PacketHeaderBase):
 
     @NS.setter
     def NS(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.NS, value)
 
     @property
@@ -248,6 +275,7 @@ class TCP(PacketHeaderBase):
 
     @CWR.setter
     def CWR(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.CWR, value)
 
     @property
@@ -256,6 +284,7 @@ class TCP(PacketHeaderBase):
 
     @ECE.setter
     def ECE(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.ECE, value)
 
     @property
@@ -264,6 +293,7 @@ class TCP(PacketHeaderBase):
 
     @URG.setter
     def URG(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.URG, value)
 
     @property
@@ -272,6 +302,7 @@ class TCP(PacketHeaderBase):
 
     @ACK.setter
     def ACK(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.ACK, value)
 
     @property
@@ -280,6 +311,7 @@ class TCP(PacketHeaderBase):
 
     @PSH.setter
     def PSH(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.PSH, value)
 
     @property
@@ -288,6 +320,7 @@ class TCP(PacketHeaderBase):
 
     @RST.setter
     def RST(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.RST, value)
 
     @property
@@ -296,6 +329,7 @@ class TCP(PacketHeaderBase):
 
     @SYN.setter
     def SYN(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.SYN, value)
 
     @property
@@ -304,4 +338,5 @@ class TCP(PacketHeaderBase):
 
     @FIN.setter
     def FIN(self, value):
+        self._serialized = None
         self._setflag(TCPFlags.FIN, value)
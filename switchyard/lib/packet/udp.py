@@ -13,8 +13,13 @@ References:
 
 class UDP(PacketHeaderBase):
     __slots__ = ['_src','_dst','_len','_checksum']
+    _cacheable = True
+    _uses_tail_length = True
+    _uses_tail_bytes = True
     _PACKFMT = '!HHHH'
-    _MINLEN = struct.calcsize(_PACKFMT)
+    _STRUCT = struct.Struct(_PACKFMT)
+    _PSEUDOSTRUCT = struct.Struct('!IIxBHHHHH')
+    _MINLEN = _STRUCT.size
     _next_header_map = {}
     _next_header_class_key = ''
 
@@ -25,13 +30,13 @@ class UDP(PacketHeaderBase):
         super().__init__(**kwargs)
 
     def size(self):
-        return struct.calcsize(UDP._PACKFMT)
+        return UDP._MINLEN
 
     def to_bytes(self):
         '''
         Return packed byte representation of the UDP header.
         '''
-        return struct.pack(UDP._PACKFMT, self._src, self._dst,
+        return UDP._STRUCT.pack(self._src, self._dst,
             self._len, self._checksum)
 
     def from_bytes(self, raw):
@@ -39,7 +44,8 @@ class UDP(PacketHeaderBase):
            Exception if we can't resurrect the packet.'''
         if len(raw) < UDP._MINLEN:
             raise NotEnoughDataError("Not enough bytes ({}) to reconstruct an UDP object".format(len(raw)))
-        fields = struct.unpack(UDP._PACKFMT, raw[:UDP._MINLEN])
+        fields = UDP._STRUCT.unpack_from(raw)
+        self._serialized = None
         self._src = fields[0]
         self._dst = fields[1]
         self._len = fields[2]
@@ -60,10 +66,12 @@ class UDP(PacketHeaderBase):
 
     @src.setter
     def src(self,value):
+        self._serialized = None
         self._src = value
 
     @dst.setter
     def dst(self,value):
+        self._serialized = None
         self._dst = value
 
     @property  
@@ -80,7 +88,7 @@ class UDP(PacketHeaderBase):
     def _compute_checksum_ipv4(self, ip4, xdata):
         if ip4 is None:
             return 0
-        xhdr = struct.pack('!IIxBHHHHH', int(ip4.src), int(ip4.dst), 
+        xhdr = UDP._PSEUDOSTRUCT.pack(int(ip4.src), int(ip4.dst), 
             ip4.protocol.value, self._len, 
             self.src, self.dst, self._len, 0)
         return checksum(xhdr + xdata)
@@ -89,4 +97,11 @@ class UDP(PacketHeaderBase):
         self._len = self.size() + len(raw)
         # checksum calc currently assumes we're only dealing with ipv4.
         # will need to be modified for ipv6 support...
-        self._checksum = self._compute_checksum_ipv4(pkt.get_header_by_name('IPv4'), raw)
+        self._checksum = self._compute_checksum_ipv4(pkt._peek_header('IPv4'), raw)
+
+    def _serial_context(self, pkt):
+        # the pseudo-header fields that go into the checksum
+        ip4 = pkt._peek_header('IPv4')
+        if ip4 is None:
+            return None
+        return (ip4.src, ip4.dst, ip4.protocol)
@@ -1,4 +1,9 @@
+import socket
+import struct
+import sys
+
 from . import *
+from .null import Null
 
 def create_ip_arp_reply(srchw, dsthw, srcip, targetip):
     '''
@@ -27,3 +32,134 @@ def create_ip_arp_request(srchw, srcip, targetip):
     arp.targethwaddr = SpecialEthAddr.ETHER_BROADCAST.value
     arp.targetprotoaddr = targetip
     return ether + arp
+
+def verify_checksums(packet):
+    '''
+    Return True if the IPv4 header checksum and any UDP, TCP, ICMP or
+    ICMPv6 checksum in the packet are correct.  The check is made on the
+    bytes the packet was reconstructed from as long as the packet hasn't
+    been changed since, so headers don't need to be parsed or serialized
+    again; otherwise (or for a packet that was put together from header
+    objects) it's made on the bytes the packet serializes to.  Packets
+    that don't start with an Ethernet, Null, IPv4 or IPv6 header have
+    nothing to check.
+    '''
+    if not packet._parsed_through(0):
+        return True
+    verify = _frame_verifiers.get(packet._headers[0].__class__, None)
+    if verify is None:
+        return True
+    if packet._raw_is_current():
+        raw = packet._raw
+    else:
+        raw = packet.to_bytes()
+    return verify(memoryview(raw))
+
+def verify_checksums_batch(frames, first_header=None):
+    '''
+    Check the checksums in a sequence of raw frames (bytes-like objects)
+    without reconstructing any packet headers.  first_header is the
+    class of the first header in each frame (default Ethernet; Null,
+    IPv4 and IPv6 are also handled).  Returns a list with one bool per
+    frame, True if its checksums are correct.  A frame that is too short
+    for the headers it claims to have is treated as failing the check.
+    '''
+    if first_header is None:
+        first_header = Ethernet
+    verify = _frame_verifiers.get(first_header, None)
+    if verify is None:
+        raise ValueError("Can't verify checksums for frames starting with a {} header".format(first_header.__name__))
+    return [verify(memoryview(frame)) for frame in frames]
+
+_IPV4_LENGTHS = struct.Struct('!HxxH')
+_IPV4_PSEUDOHDR = struct.Struct('!xBH')
+_IPV6_LENGTH = struct.Struct('!HB')
+_IPV6_PSEUDOHDR = struct.Struct('!I3xB')
+_ETHERTYPE = struct.Struct('!H')
+_NULL_AF = struct.Struct('=I')
+
+def _verify_segment(proto, segment, pseudohdr):
+    # pseudohdr is the start value for the checksum (the pseudo-header
+    # as a native-order integer), or None for ICMP
+    if proto == IPProtocol.UDP:
+        if len(segment) < 8:
+            return False
+        # a zero checksum means the sender didn't compute one
+        if segment[6] == 0 and segment[7] == 0:
+            return True
+    elif proto == IPProtocol.TCP:
+        if len(segment) < 20:
+            return False
+    elif proto in (IPProtocol.ICMP, IPProtocol.ICMPv6):
+        if len(segment) < 4:
+            return False
+        if proto == IPProtocol.ICMP:
+            pseudohdr = 0
+    else:
+        return True
+    return checksum(segment, pseudohdr) == 0
+
+def _verify_ipv4(view):
+    if len(view) < 20 or view[0] >> 4 != 4:
+        return False
+    hl = (view[0] & 0x0f) * 4
+    totallen, fragfield = _IPV4_LENGTHS.unpack_from(view, 2)
+    if hl < 20 or totallen < hl or len(view) < totallen:
+        return False
+    if checksum(view[:hl]) != 0:
+        return False
+    if fragfield & 0x3fff:
+        # a fragment; can't check the transport header on its own
+        return True
+    proto = view[9]
+    pseudohdr = int.from_bytes(bytes(view[12:20]) + 
+        _IPV4_PSEUDOHDR.pack(proto, totallen - hl), sys.byteorder)
+    return _verify_segment(proto, view[hl:totallen], pseudohdr)
+
+def _verify_ipv6(view):
+    if len(view) < 40 or view[0] >> 4 != 6:
+        return False
+    payloadlen, nextheader = _IPV6_LENGTH.unpack_from(view, 4)
+    if len(view) < 40 + payloadlen:
+        return False
+    # extension headers aren't followed
+    pseudohdr = int.from_bytes(bytes(view[8:40]) + 
+        _IPV6_PSEUDOHDR.pack(payloadlen, nextheader), sys.byteorder)
+    return _verify_segment(nextheader, view[40:40+payloadlen], pseudohdr)
+
+_network_verifiers = {
+    EtherType.IPv4: _verify_ipv4,
+    EtherType.IPv6: _verify_ipv6,
+}
+
+def _verify_ethernet(view):
+    if len(view) < 14:
+        return False
+    ethertype = _ETHERTYPE.unpack_from(view, 12)[0]
+    view = view[14:]
+    while ethertype in (EtherType.x8021Q, EtherType.x8021AD):
+        if len(view) < 4:
+            return False
+        ethertype = _ETHERTYPE.unpack_from(view, 2)[0]
+        view = view[4:]
+    verify = _network_verifiers.get(ethertype, None)
+    if verify is None:
+        return True
+    return verify(view)
+
+def _verify_null(view):
+    if len(view) < 4:
+        return False
+    af = _NULL_AF.unpack_from(view)[0]
+    if af == socket.AF_INET:
+        return _verify_ipv4(view[4:])
+    elif af == socket.AF_INET6:
+        return _verify_ipv6(view[4:])
+    return True
+
+_frame_verifiers = {
+    Ethernet: _verify_ethernet,
+    Null: _verify_null,
+    IPv4: _verify_ipv4,
+    IPv6: _verify_ipv6,
+}
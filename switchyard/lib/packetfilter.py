@@ -0,0 +1,297 @@
+import struct
+from ipaddress import IPv4Network
+from collections import namedtuple
+
+from .address import _ipv4_to_int
+from .packet import IPv4, TCP, UDP
+from .packet.common import IPProtocol
+
+'''
+A packet filter for firewall-style middleboxes, using the rule syntax
+of the Switchyard firewall exercise::
+
+    [permit|deny] ip src [srcnet|any] dst [dstnet|any]
+    [permit|deny] icmp src [srcnet|any] dst [dstnet|any]
+    [permit|deny] [udp|tcp] src [srcnet|any] srcport [portno|any] dst [dstnet|any] dstport [portno|any]
+
+optionally followed by "ratelimit [bytes/sec]" or "impair" on permit
+rules.
+
+Rules are compiled for tuple space search: they are grouped by the
+combination of source and destination prefix lengths and which of the
+protocol and port fields they specify (the rule's "tuple"), and each
+group is a dict keyed by the rule's masked field values.  Classifying a
+packet first finds the source and destination prefix lengths for which
+some rule's prefix matches the packet (one set probe per prefix length
+in use), then probes only the tuples with those lengths, one dict probe
+each, rather than testing the packet against every rule.  Real rule
+sets use only a handful of prefix lengths, so this stays cheap even
+for many thousands of rules.  Tuples with the same prefix lengths are
+probed in order of the first rule in each, stopping as soon as none of
+the rest can hold an earlier matching rule.
+
+Reference:
+    Srinivasan, Suri, and Varghese.  "Packet Classification using
+        Tuple Space Search", ACM SIGCOMM 1999.
+'''
+
+_ETHERTYPE = struct.Struct('!H')
+# fragment offset, protocol, source and destination in an IPv4 header,
+# starting from its fifth byte
+_IPV4_FIELDS = struct.Struct('!2xHxB2xII')
+_PORTS = struct.Struct('!HH')
+
+FilterRule = namedtuple('FilterRule', ['action', 'protocol', 'src', 'srcport',
+    'dst', 'dstport', 'ratelimit', 'impair'])
+
+_protocols = {
+    'ip': None,
+    'icmp': IPProtocol.ICMP,
+    'tcp': IPProtocol.TCP,
+    'udp': IPProtocol.UDP,
+}
+
+_ANY = IPv4Network('0.0.0.0/0')
+
+
+def _parse_net(value):
+    if value == 'any':
+        return _ANY
+    return IPv4Network(value, strict=False)
+
+
+def _parse_port(value):
+    if value == 'any':
+        return None
+    port = int(value)
+    if not 0 <= port <= 65535:
+        raise ValueError("Invalid port number {}".format(value))
+    return port
+
+
+def parse_rule(text):
+    '''
+    Parse one rule and return it as a FilterRule.  protocol is None
+    for ip rules; srcport and dstport are None for "any" (and for ip
+    and icmp rules); ratelimit is None unless one is given.  Raises
+    ValueError if the rule is malformed.
+    '''
+    tokens = text.split()
+    try:
+        action = tokens[0]
+        proto = tokens[1]
+        if action not in ('permit', 'deny') or proto not in _protocols:
+            raise ValueError()
+        protocol = _protocols[proto]
+        srcport = dstport = None
+        if protocol in (IPProtocol.TCP, IPProtocol.UDP):
+            if tokens[2] != 'src' or tokens[4] != 'srcport' or \
+               tokens[6] != 'dst' or tokens[8] != 'dstport':
+                raise ValueError()
+            src, srcport, dst, dstport = [ tokens[i] for i in (3,5,7,9) ]
+            srcport = _parse_port(srcport)
+            dstport = _parse_port(dstport)
+            rest = tokens[10:]
+        else:
+            if tokens[2] != 'src' or tokens[4] != 'dst':
+                raise ValueError()
+            src, dst = tokens[3], tokens[5]
+            rest = tokens[6:]
+        src = _parse_net(src)
+        dst = _parse_net(dst)
+        ratelimit = None
+        impair = False
+        if rest and action == 'permit':
+            if rest[0] == 'ratelimit' and len(rest) == 2:
+                ratelimit = int(rest[1])
+                rest = []
+            elif rest == ['impair']:
+                impair = True
+                rest = []
+        if rest:
+            raise ValueError()
+    except (IndexError, ValueError) as e:
+        detail = ": {}".format(e) if str(e) else ""
+        raise ValueError("Invalid filter rule '{}'{}".format(
+            text.strip(), detail))
+    return FilterRule(action, protocol, src, srcport, dst, dstport,
+                      ratelimit, impair)
+
+
+class PacketFilter(object):
+    '''
+    An ordered list of filter rules, compiled for fast classification.
+    The first rule that matches a packet applies to it; classification
+    returns that rule's index in the list (starting at 0, so rule n in
+    the exercise's numbering is index n-1), or None if no rule matches
+    or the packet isn't IPv4.
+
+    rules is an optional iterable of rules, each either a string in the
+    rule syntax or a FilterRule.
+    '''
+    def __init__(self, rules=None):
+        self._rules = []
+        # prefix length -> [mask, set of prefixes of that length used
+        # in rules], for sources and destinations
+        self._srcprefixes = {}
+        self._dstprefixes = {}
+        # (src prefix length, dst prefix length) -> list of tuples, each
+        # [first rule index, match protocol?, match srcport?, match
+        # dstport?, {field values: rule index}], in order of first rule
+        # index
+        self._tuples = {}
+        if rules is not None:
+            for rule in rules:
+                self.add(rule)
+
+    @staticmethod
+    def _add_prefix(prefixes, net):
+        length = net.prefixlen
+        if length not in prefixes:
+            prefixes[length] = [(0xffffffff << (32 - length)) & 0xffffffff,
+                                set()]
+        prefixes[length][1].add(int(net.network_address))
+
+    def add(self, rule):
+        '''
+        Append a rule (a string or FilterRule) to the end of the list
+        and return its index.
+        '''
+        if isinstance(rule, str):
+            rule = parse_rule(rule)
+        idx = len(self._rules)
+        self._rules.append(rule)
+        self._add_prefix(self._srcprefixes, rule.src)
+        self._add_prefix(self._dstprefixes, rule.dst)
+        spec = (rule.protocol is not None, rule.srcport is not None,
+                rule.dstport is not None)
+        group = self._tuples.setdefault(
+            (rule.src.prefixlen, rule.dst.prefixlen), [])
+        for entry in group:
+            if tuple(entry[1:4]) == spec:
+                break
+        else:
+            entry = [idx] + list(spec) + [{}]
+            group.append(entry)
+        key = (int(rule.src.network_address), int(rule.dst.network_address),
+               rule.protocol, rule.srcport, rule.dstport)
+        # a rule shadowed by an earlier identical one can never match
+        entry[-1].setdefault(key, idx)
+        return idx
+
+    def load(self, source):
+        '''
+        Add rules from a rules file (e.g., firewall_rules.txt from the
+        firewall exercise).  Blank lines and lines starting with # are
+        skipped.  source may be a filename or an iterable of lines.
+        '''
+        if isinstance(source, str):
+            with open(source) as infile:
+                return self.load(infile)
+        for lineno, line in enumerate(source, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                self.add(line)
+            except ValueError as e:
+                raise ValueError("Line {}: {}".format(lineno, e))
+
+    def match(self, src, dst, protocol, srcport=None, dstport=None):
+        '''
+        Return the index of the first rule matching the given header
+        fields, or None.  src and dst may be integers or IPv4 addresses.
+        srcport and dstport should be None unless protocol is TCP or
+        UDP (and the packet isn't a non-initial fragment).
+        '''
+        if type(src) is not int:
+            src = _ipv4_to_int(src)
+        if type(dst) is not int:
+            dst = _ipv4_to_int(dst)
+        protocol = int(protocol)
+        # only the tuples whose source and destination prefix lengths
+        # both have a prefix matching the packet need to be probed
+        srcs = [ (length, src & mask)
+                 for length, (mask, nets) in self._srcprefixes.items()
+                 if src & mask in nets ]
+        dsts = [ (length, dst & mask)
+                 for length, (mask, nets) in self._dstprefixes.items()
+                 if dst & mask in nets ]
+        best = None
+        tuples = self._tuples
+        for srclen, srcnet in srcs:
+            for dstlen, dstnet in dsts:
+                group = tuples.get((srclen, dstlen), None)
+                if group is None:
+                    continue
+                for first, useproto, usesport, usedport, table in group:
+                    if best is not None and first >= best:
+                        break
+                    idx = table.get((srcnet, dstnet,
+                                     protocol if useproto else None,
+                                     srcport if usesport else None,
+                                     dstport if usedport else None), None)
+                    if idx is not None and (best is None or idx < best):
+                        best = idx
+        return best
+
+    def classify(self, packet):
+        '''
+        Return the index of the first rule matching packet (a Packet
+        object), or None.
+        '''
+        ip = packet.get_header(IPv4)
+        if ip is None:
+            return None
+        srcport = dstport = None
+        if ip.fragment_offset == 0:
+            l4 = packet.get_header(TCP)
+            if l4 is None:
+                l4 = packet.get_header(UDP)
+            if l4 is not None:
+                srcport, dstport = l4.src, l4.dst
+        return self.match(ip.src_int, ip.dst_int, ip.protocol, srcport,
+                          dstport)
+
+    def classify_raw(self, frame):
+        '''
+        Return the index of the first rule matching a raw Ethernet frame
+        (bytes), or None, without decoding it into a Packet.  802.1Q
+        tags are skipped.
+        '''
+        offset = 12
+        if len(frame) < 34:
+            return None
+        ethertype = _ETHERTYPE.unpack_from(frame, offset)[0]
+        while ethertype in (0x8100, 0x88a8):
+            offset += 4
+            if len(frame) < offset + 22:
+                return None
+            ethertype = _ETHERTYPE.unpack_from(frame, offset)[0]
+        if ethertype != 0x0800:
+            return None
+        offset += 2
+        ihl = (frame[offset] & 0x0f) * 4
+        fragoff, protocol, src, dst = _IPV4_FIELDS.unpack_from(frame,
+            offset + 4)
+        srcport = dstport = None
+        if protocol in (6, 17) and fragoff & 0x1fff == 0 and \
+                len(frame) >= offset + ihl + 4:
+            srcport, dstport = _PORTS.unpack_from(frame, offset + ihl)
+        return self.match(src, dst, protocol, srcport, dstport)
+
+    @property
+    def rules(self):
+        '''
+        The list of rules, as FilterRule named tuples.
+        '''
+        return list(self._rules)
+
+    def __getitem__(self, index):
+        return self._rules[index]
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __iter__(self):
+        return iter(self._rules)
@@ -0,0 +1,302 @@
+import time
+from collections import deque
+
+'''
+Token bucket and leaky bucket meters, and a traffic shaper built on
+them, for rate limiting in firewalls and other middleboxes.
+
+Buckets don't rely on a timer to add tokens: each one remembers when it
+was last updated and catches up on the tokens due since then whenever
+it's used, so the cost per packet is the same no matter how often (or
+how rarely) packets arrive.  Times are seconds from clock, which
+defaults to time.monotonic so that changes to the system clock don't
+affect rates; every method also accepts an explicit time as now, which
+must come from the same clock.
+'''
+
+class TokenBucket(object):
+    '''
+    A token bucket meter.  Tokens are added at rate tokens per second,
+    up to burst tokens (default: one second's worth); the bucket starts
+    out full.  What a token stands for is up to the caller: for a rate
+    limit in bytes per second, use one token per byte.
+    '''
+    __slots__ = ['_rate', '_burst', '_tokens', '_last', '_clock']
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if burst is None:
+            burst = rate
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._clock = clock
+        self._last = clock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def burst(self):
+        return self._burst
+
+    def _refill(self, now):
+        if now is None:
+            now = self._clock()
+        elapsed = now - self._last
+        if elapsed > 0:
+            tokens = self._tokens + elapsed * self._rate
+            self._tokens = tokens if tokens < self._burst else self._burst
+            self._last = now
+
+    def tokens(self, now=None):
+        '''
+        Return the number of tokens in the bucket.
+        '''
+        self._refill(now)
+        return self._tokens
+
+    def conforms(self, amount=1, now=None):
+        '''
+        If there are at least amount tokens in the bucket, remove them
+        and return True; otherwise leave the bucket alone and return
+        False (i.e., the packet should be dropped or delayed).
+        '''
+        self._refill(now)
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return True
+        return False
+
+    def delay(self, amount=1, now=None):
+        '''
+        Return the number of seconds until amount tokens will be in the
+        bucket (0 if they're there now), or None if amount is more than
+        the bucket holds.
+        '''
+        if amount > self._burst:
+            return None
+        self._refill(now)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self._rate
+
+
+class LeakyBucket(object):
+    '''
+    A leaky bucket meter.  The bucket holds up to capacity (default:
+    one second's worth of draining) and leaks at rate per second; it
+    starts out empty.  Traffic conforms if it fits in the bucket.
+    This admits the same traffic as a TokenBucket with burst equal to
+    capacity, but keeps track of how full the bucket is rather than how
+    much room is left.
+    '''
+    __slots__ = ['_rate', '_capacity', '_level', '_last', '_clock']
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if capacity is None:
+            capacity = rate
+        self._rate = rate
+        self._capacity = capacity
+        self._level = 0
+        self._clock = clock
+        self._last = clock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def _drain(self, now):
+        if now is None:
+            now = self._clock()
+        elapsed = now - self._last
+        if elapsed > 0:
+            level = self._level - elapsed * self._rate
+            self._level = level if level > 0 else 0
+            self._last = now
+
+    def level(self, now=None):
+        '''
+        Return the amount in the bucket.
+        '''
+        self._drain(now)
+        return self._level
+
+    def conforms(self, amount=1, now=None):
+        '''
+        If amount fits in the bucket, add it and return True; otherwise
+        leave the bucket alone and return False.
+        '''
+        self._drain(now)
+        if self._level + amount <= self._capacity:
+            self._level += amount
+            return True
+        return False
+
+    def delay(self, amount=1, now=None):
+        '''
+        Return the number of seconds until amount will fit in the
+        bucket (0 if it does now), or None if amount is more than the
+        bucket holds.
+        '''
+        if amount > self._capacity:
+            return None
+        self._drain(now)
+        excess = self._level + amount - self._capacity
+        if excess <= 0:
+            return 0.0
+        return excess / self._rate
+
+
+class TokenBucketArray(object):
+    '''
+    A set of token buckets (e.g., one per firewall rule or per flow)
+    that are all refilled at once by calling refill, rather than each
+    being brought up to date when it's used.  Refilling thousands of
+    buckets is a single pass over flat lists, and checking a packet
+    against a bucket is just a comparison and a subtraction.  Buckets
+    are identified by the index returned by add; they start out full.
+
+    Call refill regularly, e.g., each time through a program's main
+    loop, with recv_packet's timeout bounding the time between calls.
+    '''
+    def __init__(self, clock=time.monotonic):
+        self._rates = []
+        self._bursts = []
+        self._tokens = []
+        self._clock = clock
+        self._last = clock()
+
+    def add(self, rate, burst=None):
+        '''
+        Add a bucket that fills at rate tokens per second up to burst
+        tokens (default: one second's worth), and return its index.
+        '''
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if burst is None:
+            burst = rate
+        self._rates.append(rate)
+        self._bursts.append(burst)
+        self._tokens.append(burst)
+        return len(self._tokens) - 1
+
+    def refill(self, now=None):
+        '''
+        Add the tokens due to every bucket since the last refill.
+        '''
+        if now is None:
+            now = self._clock()
+        elapsed = now - self._last
+        if elapsed <= 0:
+            return
+        self._last = now
+        self._tokens = [ b if t + r * elapsed > b else t + r * elapsed
+                         for t, r, b in zip(self._tokens, self._rates,
+                                            self._bursts) ]
+
+    def tokens(self, index):
+        '''
+        Return the number of tokens in bucket index as of the last
+        refill.
+        '''
+        return self._tokens[index]
+
+    def conforms(self, index, amount=1):
+        '''
+        If bucket index has at least amount tokens, remove them and
+        return True; otherwise return False.
+        '''
+        tokens = self._tokens
+        if tokens[index] >= amount:
+            tokens[index] -= amount
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._tokens)
+
+
+class Shaper(object):
+    '''
+    A traffic shaper: a FIFO queue of items (e.g., packets) that are
+    released only as fast as a meter allows.  meter is a TokenBucket or
+    LeakyBucket (or anything with the same conforms and delay methods),
+    and each item is charged its size.  At most queue_limit items are
+    held (no limit if None); enqueue refuses items beyond that, and
+    items too big to ever conform.
+
+    A program's main loop can look like this::
+
+        while True:
+            try:
+                timestamp,dev,pkt = net.recv_packet(timeout=shaper.next_timeout())
+            except NoPackets:
+                pass
+            else:
+                shaper.enqueue(pkt, len(pkt))
+            for pkt in shaper.dequeue():
+                net.send_packet(outport, pkt)
+    '''
+    def __init__(self, meter, queue_limit=None):
+        self._meter = meter
+        self._queue_limit = queue_limit
+        self._queue = deque()
+        self._dropped = 0
+
+    @property
+    def meter(self):
+        return self._meter
+
+    @property
+    def dropped(self):
+        '''
+        The number of items enqueue has refused.
+        '''
+        return self._dropped
+
+    def enqueue(self, item, size=1, now=None):
+        '''
+        Add item to the end of the queue.  Returns False (and counts a
+        drop) if the queue is full or size is more than the meter can
+        ever allow, and True otherwise.
+        '''
+        if (self._queue_limit is not None and
+            len(self._queue) >= self._queue_limit) or \
+           self._meter.delay(size, now) is None:
+            self._dropped += 1
+            return False
+        self._queue.append((item, size))
+        return True
+
+    def dequeue(self, now=None):
+        '''
+        Remove and return a list of the items at the head of the queue
+        that the meter allows to be sent now.
+        '''
+        released = []
+        queue = self._queue
+        while queue and self._meter.conforms(queue[0][1], now):
+            released.append(queue.popleft()[0])
+        return released
+
+    def next_timeout(self, now=None):
+        '''
+        Return the number of seconds until the item at the head of the
+        queue can be sent, or None if the queue is empty.  This is meant
+        to be used as the timeout for net.recv_packet.
+        '''
+        if not self._queue:
+            return None
+        return self._meter.delay(self._queue[0][1], now)
+
+    def __len__(self):
+        return len(self._queue)
@@ -36,6 +36,36 @@ class TestScenarioFailure(SwitchyardException):
     pass
 
 
+# header attributes that aren't compared when matching packets: the
+# checksum, and alternate views of fields that are compared already
+_uncompared_attrs = frozenset(['checksum', 'src_int', 'dst_int',
+    'senderprotoaddr_int', 'targetprotoaddr_int'])
+
+
+class _StarredHeader(object):
+    '''
+    Stands in for a packet header when it's shown in a matcher's
+    output, so that the header's own __str__ formats the fields in
+    starred (a dict of attribute name to text) as that text instead
+    of their values.
+    '''
+    def __init__(self, header, starred):
+        self._wc_header = header
+        self._wc_starred = starred
+
+    @property
+    def __class__(self):
+        return self._wc_header.__class__
+
+    def __getattr__(self, attr):
+        if attr in self._wc_starred:
+            return self._wc_starred[attr]
+        return getattr(self._wc_header, attr)
+
+    def __str__(self):
+        return type(self._wc_header).__str__(self)
+
+
 class _PacketMatcher(object):
     '''
     Class whose job it is to define a packet template against which
@@ -126,7 +156,7 @@ class _PacketMatcher(object):
         def _collect_header_attrs(pkthdr):
             attrlist = []
             for attr in dir(pkthdr):
-                if attr.startswith('_') or attr == 'checksum':
+                if attr.startswith('_') or attr in _uncompared_attrs:
                     continue
                 aval = getattr(pkthdr, attr)
                 if callable(aval):
@@ -219,8 +249,7 @@ class _PacketMatcher(object):
         return _compare_header_types(packet) and _compare_header_attrs(packet)
 
     def _showpkt(self, pkt):
-        def star_out_attr(hdr, attr):
-            attrpriv = "_" + attr
+        def star_out_attr(hdr, attr, starred):
             if not hasattr(hdr, attr):
                 return
             oldattr = getattr(hdr, attr)
@@ -231,14 +260,20 @@ class _PacketMatcher(object):
                 newattr = '*::*'
             elif isinstance(oldattr, EthAddr):
                 newattr = '**:**:**:**:**:**'
-            setattr(hdr, attrpriv, newattr)
-
-        pktcopy = deepcopy(pkt)
-        for klass,attr in self._wildcards:
-            header = pktcopy.get_header(klass)
-            if header is not None:
-                star_out_attr(header, attr)
-        return str(pktcopy)
+            starred[attr] = newattr
+
+        hdrtext = []
+        for header in pkt:
+            if not isinstance(header, PacketHeaderBase):
+                continue
+            starred = {}
+            for klass,attr in self._wildcards:
+                if pkt.get_header(klass) is header:
+                    star_out_attr(header, attr, starred)
+            if starred:
+                header = _StarredHeader(header, starred)
+            hdrtext.append(str(header))
+        return ' | '.join(hdrtext)
 
     def fail_reason(self, packet):
         '''
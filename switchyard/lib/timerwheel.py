@@ -0,0 +1,100 @@
+from math import ceil, floor
+
+'''
+A hashed timing wheel for keeping track of large numbers of timers.
+
+Reference:
+    Varghese and Lauck.  "Hashed and Hierarchical Timing Wheels: Data
+        Structures for the Efficient Implementation of a Timer Facility",
+        ACM SOSP 1987.
+'''
+
+class TimerWheel(object):
+    '''
+    Keep track of deadlines for any number of keys.  Time is divided
+    into ticks of the given resolution, and each key is kept in the
+    bucket for the tick of its deadline (buckets are reused on each turn
+    of the wheel).  Scheduling and cancelling a timer take constant
+    time, and finding the timers that have expired only looks at the
+    buckets for the ticks that have passed, not at every timer.
+
+    Timers never fire early, but may fire up to one tick late.
+    '''
+    __slots__ = ['_resolution', '_buckets', '_deadlines', '_tick']
+
+    def __init__(self, resolution=0.1, slots=1024, start=0.0):
+        if resolution <= 0:
+            raise ValueError("Timer resolution must be positive")
+        self._resolution = float(resolution)
+        self._buckets = [ set() for _ in range(int(slots)) ]
+        self._deadlines = {}
+        # the last tick that has been processed
+        self._tick = int(floor(start / self._resolution))
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    def schedule(self, key, when):
+        '''
+        Set the timer for key to fire at time when, replacing any timer
+        already set for key.
+        '''
+        self.cancel(key)
+        tick = max(int(ceil(when / self._resolution)), self._tick + 1)
+        self._deadlines[key] = tick
+        self._buckets[tick % len(self._buckets)].add(key)
+
+    def cancel(self, key):
+        '''
+        Remove the timer for key, if there is one.
+        '''
+        tick = self._deadlines.pop(key, None)
+        if tick is not None:
+            self._buckets[tick % len(self._buckets)].discard(key)
+
+    def expire(self, now):
+        '''
+        Remove and return a list of the keys whose timers have fired by
+        time now.
+        '''
+        nowtick = int(floor(now / self._resolution))
+        if nowtick <= self._tick:
+            return []
+        nslots = len(self._buckets)
+        if nowtick - self._tick >= nslots:
+            ticks = range(nslots)
+        else:
+            ticks = range(self._tick + 1, nowtick + 1)
+        self._tick = nowtick
+        expired = []
+        deadlines = self._deadlines
+        for tick in ticks:
+            bucket = self._buckets[tick % nslots]
+            if not bucket:
+                continue
+            fired = [ key for key in bucket if deadlines[key] <= nowtick ]
+            for key in fired:
+                bucket.discard(key)
+                del deadlines[key]
+            expired.extend(fired)
+        return expired
+
+    def next_deadline(self):
+        '''
+        Return a time at or before the earliest timer deadline, or None
+        if no timers are set.
+        '''
+        if not self._deadlines:
+            return None
+        nslots = len(self._buckets)
+        for tick in range(self._tick + 1, self._tick + 1 + nslots):
+            if self._buckets[tick % nslots]:
+                return tick * self._resolution
+        return None
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def __len__(self):
+        return len(self._deadlines)
@@ -6,6 +6,11 @@ from .address import *
 from .exceptions import *
 from .logging import log_debug, log_info, log_failure, log_warn
 from .interface import Interface, InterfaceType
+from .forwarding import ForwardingTable, ForwardingEntry
+from .arpcache import ArpCache
+from .mactable import MacLearningTable
+from .packetfilter import PacketFilter, FilterRule
+from .ratelimit import TokenBucket, LeakyBucket, TokenBucketArray, Shaper
 from .testing import PacketInputEvent, PacketOutputEvent, PacketInputTimeoutEvent, TestScenario
 from .debugging import debugger
 from .socket.socketemu import ApplicationLayer
@@ -1,5 +1,6 @@
 from abc import ABCMeta,abstractmethod
 from collections import namedtuple
+from queue import Empty
 
 from .pcapffi import pcap_devices
 from .lib.logging import log_debug, log_warn
@@ -45,6 +46,23 @@ def _start_usercode(entryfunction, netobj, codeargdict):
     else:
         entryfunction(netobj)
 
+def _drain_queue(q, max_count, timeout=None):
+    '''
+    Remove and return a list of up to max_count items from the
+    queue.Queue q, waiting up to timeout seconds (forever if None) for
+    the first one to arrive.  The queue's lock is taken once for the
+    whole batch rather than once per item as with repeated calls to
+    q.get.  Raises queue.Empty if nothing arrives in time.
+    '''
+    with q.not_empty:
+        if not q.not_empty.wait_for(q._qsize, timeout):
+            raise Empty()
+        items = []
+        while q._qsize() and len(items) < max_count:
+            items.append(q._get())
+        q.not_full.notify(len(items))
+        return items
+
 class LLNetBase(metaclass=ABCMeta):
     '''
     Base class for the low-level networking library in Python.
@@ -169,6 +187,25 @@ class LLNetBase(metaclass=ABCMeta):
         '''
         raise NoPackets()
 
+    def recv_packets(self, max_count=64, timeout=None):
+        '''
+        Receive up to max_count packets at once from any port/interface.
+        Waits for the first packet in the same way as recv_packet (and
+        raises NoPackets or Shutdown in the same circumstances), then
+        collects any others that are already waiting, up to max_count
+        in all.  Returns a list of ReceivedPacket named tuples.
+
+        This implementation just calls recv_packet repeatedly; derived
+        classes collect packets more cheaply.
+        '''
+        received = [ self.recv_packet(timeout) ]
+        while len(received) < max_count:
+            try:
+                received.append(self.recv_packet(0))
+            except (NoPackets, Shutdown):
+                break
+        return received
+
     @abstractmethod
     def send_packet(self, output_port, packet):
         '''
@@ -177,6 +214,17 @@ class LLNetBase(metaclass=ABCMeta):
         '''
         pass
 
+    def send_packets(self, pairs):
+        '''
+        Send a batch of packets.  pairs is an iterable of (output_port,
+        packet) tuples.  Returns None.
+
+        This implementation just calls send_packet for each pair;
+        derived classes send batches more cheaply.
+        '''
+        for output_port, packet in pairs:
+            self.send_packet(output_port, packet)
+
     @abstractmethod
     def shutdown(self):
         pass
@@ -8,6 +8,8 @@ from time import time as now
 import threading
 import textwrap
 from queue import Queue,Empty
+from collections import deque
+import selectors
 import socket
 
 from psutil import net_if_addrs
@@ -16,23 +18,27 @@ from .lib.address import *
 from .lib.packet import *
 from .lib.exceptions import Shutdown, NoPackets
 from .lib.interface import Interface, InterfaceType
-from .lib.logging import setup_logging, log_info, log_debug, log_warn, log_failure
+from .lib.logging import setup_logging, log_info, log_debug, log_warn, log_failure, log_debug_enabled
 from .importcode import import_or_die
 from .textcolor import *
 
 from .pcapffi import *
-from .llnetbase import LLNetBase, ReceivedPacket, _start_usercode
+from .tpacket import TpacketDevice
+from .llnetbase import LLNetBase, ReceivedPacket, _start_usercode, _drain_queue
 
 _dlt_to_decoder = {}
-_dlt_to_decoder[Dlt.DLT_EN10MB] = lambda raw: Packet(raw, first_header=Ethernet)
-_dlt_to_decoder[Dlt.DLT_NULL] = lambda raw: Packet(raw, first_header=Null)
+_dlt_to_decoder[Dlt.DLT_EN10MB] = lambda raw, lazy=False: Packet(raw, first_header=Ethernet, lazy=lazy)
+_dlt_to_decoder[Dlt.DLT_NULL] = lambda raw, lazy=False: Packet(raw, first_header=Null, lazy=lazy)
 
 class LLNetReal(LLNetBase):
     '''
     A class that represents a collection of network devices
     on which packets can be received and sent.
     '''
-    def __init__(self, devlist, name=None):
+    _receiver = None
+
+    def __init__(self, devlist, name=None, lazy=False, engine='threads',
+                 pcap_options=None, backend='pcap'):
         LLNetBase.__init__(self)
         signal.signal(signal.SIGINT, self._sig_handler)
         signal.signal(signal.SIGTERM, self._sig_handler)
@@ -41,6 +47,14 @@ class LLNetReal(LLNetBase):
         signal.signal(signal.SIGUSR2, self._sig_handler)
 
         self._devs = devlist 
+        self._lazy = lazy
+        self._pcap_options = pcap_options or {}
+        if backend == 'pcap':
+            self._devclass = PcapLiveDevice
+        elif backend == 'tpacket':
+            self._devclass = TpacketDevice
+        else:
+            raise ValueError("Unknown capture backend {}".format(backend))
         self._devinfo = self._assemble_devinfo()
         self._pcaps = {}
         self._localsend = {}
@@ -52,7 +66,15 @@ class LLNetReal(LLNetBase):
             log_debug("{}: {}".format(devname, str(intf)))
 
         LLNetReal.running = True
-        self._spawn_threads()
+        if engine == 'select':
+            try:
+                self._receiver = _SelectReceiver(self._pcaps)
+            except ValueError as e:
+                log_warn("{}; using a receive thread per device".format(e))
+        elif engine != 'threads':
+            raise ValueError("Unknown receive engine {}".format(engine))
+        if self._receiver is None:
+            self._spawn_threads()
 
         if name:
             self._name = name
@@ -80,6 +102,8 @@ class LLNetReal(LLNetBase):
         log_debug("Joining threads for shutdown")
         for t in self._threads:
             t.join()
+        if self._receiver is not None:
+            self._receiver.close()
         log_debug("Closing pcap devices")
         for devname,pdev in self._pcaps.items():
             pdev.close()
@@ -150,14 +174,19 @@ class LLNetReal(LLNetBase):
         '''
         Internal method.  Create libpcap devices
         for every network interface we care about and
-        set them in non-blocking mode.
+        set them in non-blocking mode.  Devices are PcapLiveDevices, or
+        TpacketDevices with the tpacket backend.  Keyword arguments for
+        them come from pcap_options: those for all devices are under
+        None, and those for one device under its name.
         '''
         self._pcaps = {}
         for devname,intf in self._devinfo.items():
             if intf.iftype == InterfaceType.Loopback:
                 senddev = _RawSocket(devname, protocol=IPProtocol.UDP)
                 self._localsend[devname] = senddev
-            pdev = PcapLiveDevice(devname) 
+            kwargs = dict(self._pcap_options.get(None, {}))
+            kwargs.update(self._pcap_options.get(devname, {}))
+            pdev = self._devclass(devname, **kwargs) 
             self._pcaps[devname] = pdev
 
     def _sig_handler(self, signum, stack):
@@ -167,7 +196,9 @@ class LLNetReal(LLNetBase):
         log_debug("Got SIGINT.")
         if signum == signal.SIGINT:
             LLNetReal.running = False
-            if self._pktqueue.qsize() == 0:
+            if self._receiver is not None:
+                self._receiver.wakeup()
+            elif self._pktqueue.qsize() == 0:
                 # put dummy pkt in queue to unblock a 
                 # possibly stuck user thread
                 self._pktqueue.put( (None,None,None) )
@@ -181,13 +212,15 @@ class LLNetReal(LLNetBase):
         while LLNetReal.running:
             # a non-zero timeout value is ok here; this is an
             # independent thread that handles input for this
-            # one pcap device.  it throws any packets received
-            # into the shared queue (which is read by the actual
-            # user code)
-            pktinfo = pcapdev.recv_packet(timeout=0.2)
-            if pktinfo is None:
+            # one pcap device.  it throws all packets received
+            # in a burst into the shared queue (which is read by
+            # the actual user code)
+            pktinfos = pcapdev.recv_batch(timeout=0.2)
+            if not pktinfos:
                 continue
-            pktqueue.put( (devname,pcapdev.dlt,pktinfo) )
+            dlt = pcapdev.dlt
+            for pktinfo in pktinfos:
+                pktqueue.put( (devname,dlt,pktinfo) )
 
         log_debug("Receiver thread for {} exiting".format(devname))
         stats = pcapdev.stats()
@@ -205,7 +238,10 @@ class LLNetReal(LLNetBase):
         '''
         while True:
             try:
-                dev,dlt,pktinfo = self._pktqueue.get(timeout=timeout)
+                if self._receiver is not None:
+                    dev,dlt,pktinfo = self._receiver.get(1, timeout)[0]
+                else:
+                    dev,dlt,pktinfo = self._pktqueue.get(timeout=timeout)
                 if not LLNetReal.running:
                     break
 
@@ -214,7 +250,7 @@ class LLNetReal(LLNetBase):
                     log_warn("Received packet with unparseable encapsulation {}".format(dlt))
                     continue
 
-                pkt = decoder(pktinfo.raw) 
+                pkt = decoder(pktinfo.raw, self._lazy)
                 return ReceivedPacket(timestamp=pktinfo.timestamp, 
                     input_port=dev, packet=pkt)
             except Empty:
@@ -223,6 +259,43 @@ class LLNetReal(LLNetBase):
                 raise NoPackets()
         raise Shutdown()
 
+    def recv_packets(self, max_count=64, timeout=None):
+        '''
+        Receive up to max_count packets from any devices on which they
+        are available.  Blocks until at least one packet arrives, unless
+        a timeout value >=0 is given, then takes all packets that are
+        waiting (up to max_count) in one go.  Raises Shutdown and
+        NoPackets in the same circumstances as recv_packet.
+
+        Returns a list of ReceivedPacket named tuples (timestamp,
+        input_port, packet).
+        '''
+        while LLNetReal.running:
+            try:
+                if self._receiver is not None:
+                    items = self._receiver.get(max_count, timeout)
+                else:
+                    items = _drain_queue(self._pktqueue, max_count, timeout)
+            except Empty:
+                if not LLNetReal.running:
+                    break
+                raise NoPackets()
+
+            received = []
+            lazy = self._lazy
+            for dev,dlt,pktinfo in items:
+                if not LLNetReal.running:
+                    break
+                decoder = _dlt_to_decoder.get(dlt, None)
+                if decoder is None:
+                    log_warn("Received packet with unparseable encapsulation {}".format(dlt))
+                    continue
+                received.append(ReceivedPacket(pktinfo.timestamp, dev,
+                    decoder(pktinfo.raw, lazy)))
+            if received:
+                return received
+        raise Shutdown()
+
     def send_packet(self, dev, packet):
         '''
         Send a Switchyard Packet object on the given device 
@@ -231,31 +304,87 @@ class LLNetReal(LLNetBase):
         Raises ValueError if packet object isn't valid, or device
         name isn't recognized.
         '''
+        self._check_packet(packet)
+        dev, intf = self._resolve_dev(dev)
+
+        if intf.iftype == InterfaceType.Loopback:
+            pdev = self._localsend.get(dev, None)
+            pdev.send_packet(packet)
+        else:
+            pdev = self._pcaps.get(dev, None)
+            rawpkt = packet.to_bytes()
+            if log_debug_enabled():
+                log_debug("Sending packet on device {}: {}".format(dev, str(packet)))
+            pdev.send_packet(rawpkt)
+
+    def send_packets(self, pairs):
+        '''
+        Send a batch of packets.  pairs is an iterable of (device,
+        packet) tuples, where device is anything send_packet accepts.
+        Each device is looked up once, and each packet object is
+        serialized once no matter how many times it appears (e.g., when
+        flooding a packet out of every port), so a packet shouldn't be
+        modified between its appearances in pairs.  Packets are then
+        handed to each device as a batch, in the order given.
+
+        Raises ValueError under the same conditions as send_packet, in
+        which case nothing is sent.
+        '''
+        # device name -> (Interface, [packets or serialized packets])
+        batches = {}
+        order = []
+        resolved = {}
+        serialized = {}
+        for dev, packet in pairs:
+            self._check_packet(packet)
+            devinfo = resolved.get(dev, None)
+            if devinfo is None:
+                devinfo = resolved[dev] = self._resolve_dev(dev)
+            devname, intf = devinfo
+            batch = batches.get(devname, None)
+            if batch is None:
+                batch = batches[devname] = (intf, [])
+                order.append(devname)
+            if intf.iftype == InterfaceType.Loopback:
+                batch[1].append(packet)
+                continue
+            # keep a reference to packet so its id isn't reused
+            cached = serialized.get(id(packet), None)
+            if cached is None:
+                cached = serialized[id(packet)] = (packet, packet.to_bytes())
+            batch[1].append(cached[1])
+
+        for devname in order:
+            intf, items = batches[devname]
+            if intf.iftype == InterfaceType.Loopback:
+                pdev = self._localsend.get(devname, None)
+                for packet in items:
+                    pdev.send_packet(packet)
+            else:
+                if log_debug_enabled():
+                    log_debug("Sending {} packets on device {}".format(len(items), devname))
+                self._pcaps.get(devname, None).send_packets(items)
+
+    @staticmethod
+    def _check_packet(packet):
         if packet is None:
             raise ValueError("No packet object given to send_packet")
         if not isinstance(packet, Packet):
             raise ValueError("Object given to send_packet is not a Packet (it is: {})".format(type(packet)))
- 
-        intf = None
+
+    def _resolve_dev(self, dev):
+        '''
+        Return the name and Interface object for dev, which may be a
+        device name, interface number, or Interface object.
+        '''
         if isinstance(dev, int):
            dev = self._lookup_devname(dev)
 
         if isinstance(dev, Interface):
-            intf = dev
-            dev = dev.name
+            return dev.name, dev
         elif dev in self._devinfo:
-            intf = self.interface_by_name(dev)
-        else:
-            raise ValueError("Unrecognized device name for packet send: {}".format(dev))
-
-        if intf.iftype == InterfaceType.Loopback:
-            pdev = self._localsend.get(dev, None)
-            pdev.send_packet(packet)
-        else:
-            pdev = self._pcaps.get(dev, None)
-            rawpkt = packet.to_bytes()
-            log_debug("Sending packet on device {}: {}".format(dev, str(packet)))
-            pdev.send_packet(rawpkt)
+            return dev, self.interface_by_name(dev)
+        raise ValueError("Unrecognized device name for packet send: {}".format(dev))
 
 def main_real(usercode, netobj, options):
     '''
@@ -298,6 +427,102 @@ If you don't want pdb, use the --nopdb flag to avoid this fate.
         netobj.shutdown()
 
 
+class _SelectReceiver(object):
+    '''
+    Receive engine that waits on every pcap device's selectable file
+    descriptor with a single selector (epoll on Linux) and reads
+    packets from ready devices with pcap_dispatch.  All of this happens
+    in the thread that calls recv_packet, so there is no thread per
+    device and no cross-thread queue; packets are handed out in the
+    order they're read.  Devices must have a recv_batch method like
+    PcapLiveDevice's.  Raises ValueError if some device doesn't have
+    a selectable file descriptor.
+    '''
+    def __init__(self, pcaps, batch=64):
+        self._pcaps = pcaps
+        self._batch = batch
+        self._pending = deque()
+        self._selector = selectors.DefaultSelector()
+        # written to by wakeup to interrupt a blocking get, e.g., from
+        # a signal handler
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ, None)
+
+        for devname,pdev in pcaps.items():
+            fd = pdev.fd
+            if fd is None or fd < 0:
+                self.close()
+                raise ValueError("Device {} has no selectable file descriptor".format(devname))
+            self._selector.register(fd, selectors.EVENT_READ, (devname, pdev, pdev.dlt))
+
+    def get(self, max_count, timeout=None):
+        '''
+        Return a list of up to max_count (device, dlt, packet) tuples,
+        waiting up to timeout seconds (forever if None) for packets to
+        arrive.  Raises Empty if there are none, either because of the
+        timeout or because wakeup was called.
+        '''
+        pending = self._pending
+        if not pending:
+            self._poll(timeout)
+            if not pending:
+                raise Empty()
+        return [ pending.popleft() for i in range(min(max_count, len(pending))) ]
+
+    def _poll(self, timeout):
+        deadline = None if timeout is None else now() + timeout
+        while True:
+            for key,events in self._selector.select(timeout):
+                if key.data is None:
+                    self._drain_wakeup()
+                    return
+                devname,pdev,dlt = key.data
+                try:
+                    pktinfos = pdev.recv_batch(self._batch)
+                except PcapException as e:
+                    # stop reading from the device, as its receiver
+                    # thread would, rather than having the selector
+                    # report it ready again straight away
+                    log_warn("{}: {}; no longer receiving packets on it".format(devname, e))
+                    self._selector.unregister(key.fileobj)
+                    continue
+                self._pending.extend([ (devname,dlt,pktinfo) for pktinfo in pktinfos ])
+            if self._pending:
+                return
+            if deadline is not None:
+                timeout = deadline - now()
+                if timeout <= 0:
+                    return
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def wakeup(self):
+        '''
+        Make a get that's blocked (or the next one) return.
+        '''
+        try:
+            self._wakeup_send.send(b'\x00')
+        except OSError:
+            pass
+
+    def close(self):
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                devname,pdev,dlt = key.data
+                stats = pdev.stats()
+                log_debug("Final device statistics {}: {} received, {} dropped, {} dropped/if".format(devname, stats.ps_recv, stats.ps_drop, stats.ps_ifdrop))
+        self._selector.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
+
+
 class _RawSocket(object):
     '''
     Class to encapsulate a raw socket for use with the localhost interface.
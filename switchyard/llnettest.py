@@ -78,6 +78,22 @@ class LLNetTest(LLNetBase):
         else:
             raise TestScenarioFailure("recv_packet was called instead of {}".format(str(ev)))
 
+    def recv_packets(self, max_count=64, timeout=None):
+        '''
+        Receive up to max_count packets.  The first is handled exactly
+        as for recv_packet; after that, packets are taken from the input
+        events that immediately follow in the test scenario, stopping
+        at the first event that isn't a packet arrival.
+
+        Returns a list of ReceivedPacket namedtuples.
+        '''
+        received = [ self.recv_packet(timeout) ]
+        scenario = self.scenario
+        while len(received) < max_count and not scenario.done() and \
+                isinstance(scenario.next(), PacketInputEvent):
+            received.append(self.recv_packet(timeout))
+        return received
+
     def send_packet(self, devname, pkt):
         if self.scenario.done():
             raise TestScenarioFailure(
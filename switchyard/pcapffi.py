@@ -1,5 +1,7 @@
 from __future__ import print_function
 import sys
+import os
+import errno
 from cffi import FFI
 from collections import namedtuple
 from enum import Enum,IntEnum
@@ -10,7 +12,8 @@ from threading import Lock
 
 PcapInterface = namedtuple('PcapInterface', ['name','internal_name', 'description', 'isloop','isup','isrunning'])
 PcapStats = namedtuple('PcapStats', ['ps_recv','ps_drop','ps_ifdrop'])
-PcapPacket = namedtuple('PcapPacket', ['timestamp', 'capture_length', 'length', 'raw'])
+PcapPacket = namedtuple('PcapPacket', ['timestamp', 'capture_length', 'length', 'raw', 'timestamp_ns'])
+PcapPacket.__new__.__defaults__ = (None,)
 PcapDev = namedtuple('PcapDev', ['dlt','nonblock','snaplen','version','pcap'])
 
 
@@ -63,6 +66,19 @@ class PcapWarning(IntEnum):
     TstampTypeNotSupported = 3
 
 
+def _timestamp_ns(hdr, nano):
+    '''
+    Return the timestamp in a pcap_pkthdr as an integer number of
+    nanoseconds.  tv_usec holds nanoseconds rather than microseconds
+    if nano is True.  Only the low 32 bits of tv_usec are used, since
+    it's narrower than a long on some platforms (e.g., macOS).
+    '''
+    frac = hdr.tv_usec & 0xffffffff
+    if not nano:
+        frac *= 1000
+    return hdr.tv_sec * 1000000000 + frac
+
+
 class _PcapFfi(object):
     '''
     This class represents the low-level interface to the libpcap library.
@@ -72,7 +88,7 @@ class _PcapFfi(object):
     and PcapLiveDevice classes, below.
     '''
     _instance = None
-    __slots__ = ['_ffi', '_libpcap','_interfaces','_windoze']
+    __slots__ = ['_ffi', '_libpcap','_libc','_interfaces','_windoze']
 
     def __init__(self):
         '''
@@ -192,6 +208,36 @@ class _PcapFfi(object):
         except Exception as e:
             raise PcapException("Error opening libpcap: {}".format(e))
 
+        # on Linux, batches of packets can be sent with a single
+        # sendmmsg call on the socket underlying a pcap device
+        self._libc = None
+        if sys.platform.startswith('linux'):
+            self._ffi.cdef('''
+            struct iovec {
+                void *iov_base;
+                size_t iov_len;
+            };
+            struct msghdr {
+                void *msg_name;
+                unsigned int msg_namelen;
+                struct iovec *msg_iov;
+                size_t msg_iovlen;
+                void *msg_control;
+                size_t msg_controllen;
+                int msg_flags;
+            };
+            struct mmsghdr {
+                struct msghdr msg_hdr;
+                unsigned int msg_len;
+            };
+            int sendmmsg(int, struct mmsghdr *, unsigned int, int);
+            ''')
+            try:
+                self._libc = self._ffi.dlopen(None)
+                self._libc.sendmmsg
+            except (OSError, AttributeError):
+                self._libc = None
+
         self._interfaces = []
         self.discoverdevs()
 
@@ -265,17 +311,59 @@ class _PcapFfi(object):
     def ffi(self):
         return self._ffi
 
+    @property
+    def libc(self):
+        '''
+        The C library, if sendmmsg is available from it, or None.
+        '''
+        return self._libc
+
+    def _sendmmsg(self, fd, xbuffers):
+        '''
+        Send each bytes object in xbuffers as a packet on socket fd,
+        with as few sendmmsg calls as possible.  Only to be used if
+        libc isn't None.
+        '''
+        count = len(xbuffers)
+        ffi = self._ffi
+        msgs = ffi.new("struct mmsghdr[]", count)
+        iovs = ffi.new("struct iovec[]", count)
+        # the buffers need to stay referenced until they're sent
+        cbufs = [ ffi.from_buffer(xbuffer) for xbuffer in xbuffers ]
+        for i in range(count):
+            iovs[i].iov_base = cbufs[i]
+            iovs[i].iov_len = len(xbuffers[i])
+            msgs[i].msg_hdr.msg_iov = iovs + i
+            msgs[i].msg_hdr.msg_iovlen = 1
+
+        sent = 0
+        while sent < count:
+            rv = self._libc.sendmmsg(fd, msgs + sent, count - sent, 0)
+            if rv >= 0:
+                sent += rv
+                continue
+            err = ffi.errno
+            if err == errno.EINTR:
+                continue
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                # socket buffer is full; wait for room
+                select([], [fd], [], 0.1)
+                continue
+            if err == errno.ENOBUFS:
+                # device queue is full
+                sleep(0.001)
+                continue
+            raise PcapException("Error sending packets: {}".format(os.strerror(err)))
+
     def _recv_packet(self, xdev):
         phdr = self._ffi.new("struct pcap_pkthdr **")
         pdata = self._ffi.new("unsigned char **")
         rv = self._libpcap.pcap_next_ex(xdev, phdr, pdata)
         if rv == 1:
-            rawpkt = bytes(self._ffi.buffer(pdata[0], phdr[0].caplen))
-            #dt = datetime.fromtimestamp(phdr[0].tv_sec)
-            usec = int(xffi.cast("int", phdr[0].tv_usec))
-            #ts = dt.replace(microsecond=usec)
-            ts = float("{:d}.{:06d}".format(phdr[0].tv_sec, usec))
-            return PcapPacket(ts, phdr[0].caplen, phdr[0].len, rawpkt)
+            hdr = phdr[0]
+            rawpkt = bytes(self._ffi.buffer(pdata[0], hdr.caplen))
+            ns = _timestamp_ns(hdr, self._tstamp_nano(xdev))
+            return PcapPacket(ns / 1000000000, hdr.caplen, hdr.len, rawpkt, ns)
         elif rv == 0:
             # timeout; nothing to return
             return None
@@ -287,6 +375,17 @@ class _PcapFfi(object):
             # reading from savefile, but none left
             return None
 
+    def _tstamp_nano(self, xdev):
+        '''
+        Return True if packet timestamps from xdev have nanosecond
+        (rather than microsecond) precision.
+        '''
+        try:
+            return self._libpcap.pcap_get_tstamp_precision(xdev) == PcapTstampPrecision.Nano
+        except AttributeError:
+            # libpcap older than 1.5
+            return False
+
     def _set_filter(self, xdev, filterstr):
         bpf = self._ffi.new("struct bpf_program *")
         cfilter = self._ffi.new("char []", bytes(filterstr, 'ascii'))
@@ -303,6 +402,28 @@ class _PcapFfi(object):
             raise PcapException("Error setting filter on pcap handle: {}".format(s)) 
         self._libpcap.pcap_freecode(bpf)
 
+    def _compile_filter(self, filterstr, snaplen=65535, dlt=Dlt.DLT_EN10MB):
+        '''
+        Compile filterstr for a device with the given snaplen and link
+        type, and return the BPF program as bytes holding an array of
+        struct bpf_insn (which is the same as Linux's struct
+        sock_filter).
+        '''
+        xdev = self._libpcap.pcap_open_dead(dlt.value, snaplen)
+        if xdev == self._ffi.NULL:
+            raise PcapException("Error compiling filter expression: can't create pcap handle")
+        bpf = self._ffi.new("struct bpf_program *")
+        cfilter = self._ffi.new("char []", bytes(filterstr, 'ascii'))
+        try:
+            if self._libpcap.pcap_compile(xdev, bpf, cfilter, 1, 0xffffffff) < 0:
+                s = self._ffi.string(self._libpcap.pcap_geterr(xdev))
+                raise PcapException("Error compiling filter expression: {}".format(s))
+            prog = bytes(self._ffi.buffer(self._ffi.cast("char *", bpf.bf_insns), bpf.bf_len * 8))
+            self._libpcap.pcap_freecode(bpf)
+        finally:
+            self._libpcap.pcap_close(xdev)
+        return prog
+
 
 def pcap_devices():
     return _PcapFfi.instance().devices
@@ -345,13 +466,14 @@ class PcapReader(object):
     '''
     Class the represents a reader of an existing pcap capture file.
     '''
-    __slots__ = ['_ffi','_libpcap','_base','_pcapdev','_user_callback']
+    __slots__ = ['_ffi','_libpcap','_base','_pcapdev','_user_callback','_tsnano']
 
     def __init__(self, filename, filterstr=None):
         self._base = _PcapFfi.instance()
         self._ffi = self._base.ffi
         self._libpcap = self._base.lib
         self._user_callback = None
+        self._tsnano = False
 
         errbuf = self._ffi.new("char []", 128)
         pcap = self._libpcap.pcap_open_offline(bytes(filename, 'ascii'), errbuf)
@@ -379,12 +501,14 @@ class PcapReader(object):
 
     def dispatch(self, callback, count=-1):
         self._user_callback = callback
+        self._tsnano = self._base._tstamp_nano(self._pcapdev.pcap)
         handle = self._ffi.new_handle(self)
         rv = self._libpcap.pcap_dispatch(self._pcapdev.pcap, count, _pcap_callback, handle)
         return rv
 
     def loop(self, callback, count=-1):
         self._user_callback = callback
+        self._tsnano = self._base._tstamp_nano(self._pcapdev.pcap)
         handle = self._ffi.new_handle(self)
         rv = self._libpcap.pcap_loop(self._pcapdev.pcap, count, _pcap_callback, handle)
 
@@ -399,17 +523,31 @@ class PcapLiveDevice(object):
     '''
     Class the represents a live pcap capture/injection device.
     '''
-    _OpenDevices = {} # objectid -> low-level pcap dev
+    _OpenDevices = {} # objectid -> low-level pcap dev (or device object)
     _lock = Lock()
-    __slots__ = ['_ffi','_libpcap','_base','_pcapdev','_devname','_fd','_user_callback']
+    __slots__ = ['_ffi','_libpcap','_base','_pcapdev','_devname','_fd','_user_callback',
+                 '_handle','_batch','_tsnano']
 
     def __init__(self, device, snaplen=65535, promisc=1, to_ms=100, 
-                 filterstr=None, nonblock=True, only_create=False):
+                 filterstr=None, nonblock=True, only_create=False,
+                 buffer_size=None, immediate=False):
+        '''
+        Open a live capture device.  buffer_size (in bytes) sets the
+        size of the kernel capture buffer, rather than using the
+        platform default, and immediate turns on immediate mode, in
+        which packets are delivered as soon as they arrive instead of
+        being buffered for up to to_ms milliseconds.
+        '''
         self._base = _PcapFfi.instance()
         self._ffi = self._base.ffi
         self._libpcap = self._base.lib
         self._fd = None
         self._user_callback = None
+        # handle passed to pcap_dispatch by recv_batch, made once rather
+        # than on every call
+        self._handle = self._ffi.new_handle(self)
+        self._batch = None
+        self._tsnano = False
 
         errbuf = self._ffi.new("char []", 128)
         internal_name = None
@@ -431,9 +569,31 @@ class PcapLiveDevice(object):
                 raise PcapException("Failed to open live device {}: {}".format(internal_name, self._ffi.string(errbuf)))
             return
 
-        pcap = self._libpcap.pcap_open_live(bytes(internal_name, 'ascii'), snaplen, promisc, to_ms, errbuf)
-        if pcap == self._ffi.NULL:
-            raise PcapException("Failed to open live device {}: {}".format(internal_name, self._ffi.string(errbuf)))
+        if buffer_size is None and not immediate:
+            pcap = self._libpcap.pcap_open_live(bytes(internal_name, 'ascii'), snaplen, promisc, to_ms, errbuf)
+            if pcap == self._ffi.NULL:
+                raise PcapException("Failed to open live device {}: {}".format(internal_name, self._ffi.string(errbuf)))
+        else:
+            # pcap_open_live can't set these, so take the long way round
+            pcap = self._libpcap.pcap_create(bytes(internal_name, 'ascii'), errbuf)
+            if pcap == self._ffi.NULL:
+                raise PcapException("Failed to open live device {}: {}".format(internal_name, self._ffi.string(errbuf)))
+            self._pcapdev = PcapDev(0, 0, 0, _PcapFfi.instance().version, pcap)
+            try:
+                self.snaplen = snaplen
+                self.set_promiscuous(promisc)
+                self.set_timeout(to_ms)
+                if buffer_size is not None:
+                    self.set_buffer_size(buffer_size)
+                if immediate:
+                    self.set_immediate_mode(True)
+                rv = self._libpcap.pcap_activate(pcap)
+                if rv < 0:
+                    s = self._ffi.string(self._libpcap.pcap_geterr(pcap))
+                    raise PcapException("Failed to open live device {}: {} {}".format(internal_name, rv, s))
+            except PcapException:
+                self._libpcap.pcap_close(pcap)
+                raise
 
         if nonblock:
             rv = self._libpcap.pcap_setnonblock(pcap, 1, errbuf)
@@ -570,9 +730,15 @@ class PcapLiveDevice(object):
         Long method name, but self-explanatory.  Set the bpf
         filter on all devices that have been opened.
         '''
+        base = _PcapFfi.instance()
         with PcapLiveDevice._lock:
             for dev in PcapLiveDevice._OpenDevices.values():
-                _PcapFfi.instance()._set_filter(dev, filterstr)
+                if isinstance(dev, base.ffi.CData):
+                    base._set_filter(dev, filterstr)
+                else:
+                    # a device that doesn't use a pcap handle for
+                    # capture (e.g., a TpacketDevice)
+                    dev.set_filter(filterstr)
 
     @property
     def dlt(self):
@@ -609,17 +775,36 @@ class PcapLiveDevice(object):
         s = self._ffi.string(self._libpcap.pcap_geterr(self._pcapdev.pcap))
         raise PcapException("Error sending packet: {}".format(s))
 
+    def send_packets(self, xbuffers):
+        '''
+        Send a list of packets, each serialized as a bytes object, in
+        order.  On Linux, the whole list is handed to the kernel with
+        one sendmmsg call on the device's socket; elsewhere, packets
+        are sent one at a time with pcap_sendpacket.
+        '''
+        for xbuffer in xbuffers:
+            if not isinstance(xbuffer, bytes):
+                raise PcapException("Packets to be sent via libpcap must be serialized as a bytes object")
+        if self._base.libc is None or self._fd is None or self._fd < 0:
+            for xbuffer in xbuffers:
+                self.send_packet(xbuffer)
+            return True
+        self._base._sendmmsg(self._fd, xbuffers)
+        return True
+
     def recv_packet_or_none(self):
         return self._base._recv_packet(self._pcapdev.pcap)
 
     def dispatch(self, callback, count=-1):
         self._user_callback = callback
+        self._tsnano = self._base._tstamp_nano(self._pcapdev.pcap)
         handle = self._ffi.new_handle(self)
         rv = self._libpcap.pcap_dispatch(self._pcapdev.pcap, count, _pcap_callback, handle)
         return rv
 
     def loop(self, callback, count=-1):
         self._user_callback = callback
+        self._tsnano = self._base._tstamp_nano(self._pcapdev.pcap)
         handle = self._ffi.new_handle(self)
         rv = self._libpcap.pcap_loop(self._pcapdev.pcap, count, _pcap_callback, handle)
 
@@ -629,6 +814,49 @@ class PcapLiveDevice(object):
     def breakloop(self):
         self._libpcap.pcap_breakloop(self._pcapdev.pcap)
 
+    def recv_batch(self, max_count=-1, timeout=0):
+        '''
+        Return a list of PcapPackets holding up to max_count packets
+        (every packet that's buffered, if max_count is -1), read with a
+        single pcap_dispatch call.  If timeout isn't 0, first wait up to
+        timeout seconds (forever if None or negative) for packets to
+        arrive.  An empty list means that none did.
+        '''
+        if timeout is not None and timeout < 0:
+            timeout = None
+
+        if timeout != 0:
+            if self._fd is not None and self._fd >= 0:
+                try:
+                    xread,xwrite,xerr = select([self._fd], [], [self._fd], timeout)
+                except:
+                    return []
+                if not xread and not xerr:
+                    return []
+            elif self._pcapdev.nonblock:
+                # can't do select; poll up to 10 times, as recv_packet does
+                if timeout is None:
+                    timeout = 1.0
+                expiry = time() + timeout
+                while True:
+                    pkts = self._dispatch_batch(max_count)
+                    if pkts or time() >= expiry:
+                        return pkts
+                    sleep(timeout/10)
+        return self._dispatch_batch(max_count)
+
+    def _dispatch_batch(self, max_count):
+        batch = self._batch = []
+        self._tsnano = self._base._tstamp_nano(self._pcapdev.pcap)
+        try:
+            rv = self._libpcap.pcap_dispatch(self._pcapdev.pcap, max_count, _pcap_batch_callback, self._handle)
+        finally:
+            self._batch = None
+        if rv == -1:
+            s = self._ffi.string(self._libpcap.pcap_geterr(self._pcapdev.pcap))
+            raise PcapException("Error receiving packets: {}".format(s))
+        return batch
+
     def recv_packet(self, timeout):
         # FIXME: ugly and long
         if timeout is None or timeout < 0:
@@ -698,14 +926,21 @@ xffi = _PcapFfi.instance().ffi
 def _pcap_callback(handle, phdr, pdata):
     xhandle = xffi.cast("void *", handle)
     pcapobj = xffi.from_handle(xhandle)
-    rawpkt = bytes(xffi.buffer(pdata, phdr[0].caplen))
-    # dt = datetime.fromtimestamp(phdr[0].tv_sec)
-    usec = int(xffi.cast("int", phdr[0].tv_usec))
-    # ts = dt.replace(microsecond=usec)
-    ts = float("{}.{:06d}".format(phdr[0].tv_sec, usec))
-    pkt = PcapPacket(ts, phdr[0].caplen, phdr[0].len, rawpkt)
+    hdr = phdr[0]
+    rawpkt = bytes(xffi.buffer(pdata, hdr.caplen))
+    ns = _timestamp_ns(hdr, pcapobj._tsnano)
+    pkt = PcapPacket(ns / 1000000000, hdr.caplen, hdr.len, rawpkt, ns)
     pcapobj._callback(pkt)
 
+@xffi.callback("void(*)(unsigned char *, const struct pcap_pkthdr *, const unsigned char *)")
+def _pcap_batch_callback(handle, phdr, pdata):
+    hdr = phdr[0]
+    caplen = hdr.caplen
+    pcapobj = xffi.from_handle(xffi.cast("void *", handle))
+    ns = _timestamp_ns(hdr, pcapobj._tsnano)
+    pcapobj._batch.append(PcapPacket(ns / 1000000000, caplen, hdr.len,
+        bytes(xffi.buffer(pdata, caplen)), ns))
+
 
 if __name__ == '__main__':
     print ("Found devices: ")
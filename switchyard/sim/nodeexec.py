@@ -9,7 +9,7 @@ from cmd import Cmd
 import re
 from abc import ABCMeta,abstractmethod
 
-from ..llnetbase import LLNetBase
+from ..llnetbase import LLNetBase, _drain_queue
 from ..lib.exceptions import NoPackets,Shutdown
 from ..lib.logging import log_debug
 from .monitor import *
@@ -90,6 +90,31 @@ class NodeExecutor(LLNetBase):
 
         raise NoPackets()
 
+    def recv_packets(self, max_count=64, timeout=0.0, timestamp=False):
+        giveup_time = time.time() + timeout
+        inner_timeout = 0.05
+
+        while timeout == 0.0 or time.time() < giveup_time:
+            try:
+                items = _drain_queue(self.__ingress_queue, max_count, inner_timeout)
+            except Empty:
+                pass
+            else:
+                now = time.time()
+                received = []
+                for devname,packet in items:
+                    self.__recv_monitors[devname](devname,now,packet)
+                    if timestamp:
+                        received.append((devname,now,packet))
+                    else:
+                        received.append((devname,packet))
+                return received
+
+            if self.__done:
+                raise Shutdown()
+
+        raise NoPackets()
+
     def send_packet(self, dev, packet):
         egress_pipe = self.__egress_pipes[dev]
         now = time.time()
@@ -14,6 +14,22 @@ def version_check():
         log_failure("Invalid Python version for using Switchyard: need at least 3.4")
         sys.exit(-1)
 
+def intf_setting(value):
+    '''
+    Parse a live capture option of the form [INTF=]NUMBER into an
+    (interface name or None, int) tuple.
+    '''
+    intf = None
+    if '=' in value:
+        intf,value = value.rsplit('=', 1)
+    try:
+        value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected [INTF=]NUMBER, not {}".format(value))
+    if value < 0:
+        raise argparse.ArgumentTypeError("value can't be negative")
+    return intf,value
+
 def main():
     version_check()
 
@@ -71,6 +87,33 @@ def main():
         dest="topology", type=str, default=None)
     parser.add_argument("--listif", help="List available interfaces (then exit)",
         dest="listif", action="store_true", default=False)
+    parser.add_argument("--lazy", help="Only decode packet headers as they are"
+        " accessed (for real/live mode only).",
+        dest="lazy", action="store_true", default=False)
+    parser.add_argument("--engine", help="How to receive packets in real/live"
+        " mode: a thread per interface (threads, the default), or a single"
+        " select/epoll loop run by your code's thread (select).",
+        dest="engine", choices=['threads', 'select'], default='threads')
+    parser.add_argument("--backend", help="How to capture packets in real/live"
+        " mode: with libpcap (pcap, the default), or through a memory-mapped"
+        " TPACKET_V3 ring (tpacket; Linux only).",
+        dest="backend", choices=['pcap', 'tpacket'], default='pcap')
+    parser.add_argument("--snaplen", help="Maximum number of bytes to capture"
+        " from each packet (for real/live mode only).  Prefix with INTF= to"
+        " apply to one interface; can be given multiple times.",
+        dest="snaplen", metavar="[INTF=]BYTES", type=intf_setting, action="append")
+    parser.add_argument("--bufsize", help="Size of the kernel capture buffer"
+        " (for real/live mode only).  Prefix with INTF= to apply to one"
+        " interface; can be given multiple times.",
+        dest="bufsize", metavar="[INTF=]BYTES", type=intf_setting, action="append")
+    parser.add_argument("--capture-timeout", help="Milliseconds for which"
+        " captured packets may be buffered before being delivered (for"
+        " real/live mode only; default 100).  Prefix with INTF= to apply to"
+        " one interface; can be given multiple times.",
+        dest="capture_timeout", metavar="[INTF=]MS", type=intf_setting, action="append")
+    parser.add_argument("--immediate", help="Deliver captured packets"
+        " immediately rather than buffering them (for real/live mode only).",
+        dest="immediate", action="store_true", default=False)
     args = parser.parse_args()
 
     if (args.usercode is None and not args.compile) and not args.listif:
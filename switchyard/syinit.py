@@ -46,6 +46,21 @@ def _assemble_device_list(args):
     devlist = make_device_list(includes=args.intf, excludes=args.exclude)
     return devlist
 
+def _assemble_pcap_options(args):
+    '''
+    Collect the live capture options given to swyard into keyword
+    arguments for PcapLiveDevice, keyed by interface name (or None for
+    options that apply to every interface).
+    '''
+    pcap_options = {}
+    for attr,kwarg in (('snaplen', 'snaplen'), ('bufsize', 'buffer_size'),
+                       ('capture_timeout', 'to_ms')):
+        for intf,value in getattr(args, attr, None) or []:
+            pcap_options.setdefault(intf, {})[kwarg] = value
+    if getattr(args, 'immediate', False):
+        pcap_options.setdefault(None, {})['immediate'] = True
+    return pcap_options
+
 def start_framework(args):
     global _netobj, _setup_ok
     setup_logging(args.debug, args.logfile)
@@ -132,7 +147,10 @@ def start_framework(args):
         with Firewall(devlist, args.fwconfig):
             _setup_ok = True
             barrier.wait()
-            _netobj = LLNetReal(devlist)
+            _netobj = LLNetReal(devlist, lazy=getattr(args, 'lazy', False),
+                                engine=getattr(args, 'engine', 'threads'),
+                                pcap_options=_assemble_pcap_options(args),
+                                backend=getattr(args, 'backend', 'pcap'))
             main_real(args.usercode, _netobj, args)
 
 
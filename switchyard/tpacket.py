@@ -0,0 +1,260 @@
+import sys
+import socket
+import mmap
+import struct
+from select import select
+
+from .pcapffi import _PcapFfi, PcapLiveDevice, PcapException, PcapPacket, \
+    PcapStats, Dlt
+
+'''
+A Linux capture device that receives through a PACKET_MMAP TPACKET_V3
+ring shared with the kernel, rather than through libpcap.
+
+The kernel fills fixed-size blocks of the ring with packets and hands
+each block over once it's full or a timeout expires.  Reading a burst
+of packets is a walk over a block in the mapped memory followed by a
+single write to give the block back; no system call is made while
+packets are waiting.
+
+References:
+    Linux kernel documentation, Documentation/networking/packet_mmap.rst
+    (TPACKET_V3 section).
+'''
+
+# from linux/if_packet.h and linux/if_ether.h
+_SOL_PACKET = 263
+_SO_ATTACH_FILTER = 26
+_PACKET_ADD_MEMBERSHIP = 1
+_PACKET_RX_RING = 5
+_PACKET_STATISTICS = 6
+_PACKET_VERSION = 10
+_PACKET_MR_PROMISC = 1
+_TPACKET_V3 = 2
+_ETH_P_ALL = 0x0003
+
+_TP_STATUS_KERNEL = 0
+_TP_STATUS_USER = 1 << 0
+_TP_STATUS_VLAN_VALID = 1 << 4
+_TP_STATUS_VLAN_TPID_VALID = 1 << 6
+
+# struct tpacket_req3
+_tpacket_req3 = struct.Struct('=7I')
+# block_status, num_pkts and offset_to_first_pkt in struct
+# tpacket_block_desc
+_block_status = struct.Struct('=I')
+_BLOCK_STATUS_OFFSET = 8
+_block_pkts = struct.Struct('=II')
+_BLOCK_PKTS_OFFSET = 12
+# struct tpacket3_hdr, up to tp_vlan_tpid
+_tpacket3_hdr = struct.Struct('=6I2H2IH')
+# struct tpacket_stats_v3
+_tpacket_stats_v3 = struct.Struct('=3I')
+# struct packet_mreq
+_packet_mreq = struct.Struct('=iHH8s')
+# struct sock_fprog
+_sock_fprog = struct.Struct('HP')
+
+_FRAME_SIZE = 2048
+
+
+class TpacketDevice(object):
+    '''
+    A live capture device (Linux only) that receives packets through a
+    TPACKET_V3 memory-mapped ring on an AF_PACKET socket, and sends on
+    the same socket.  It has the same constructor arguments and
+    methods as PcapLiveDevice, so that LLNetReal can use either one.
+
+    buffer_size is the size of the ring in bytes (default 4 MiB), and
+    to_ms the longest the kernel holds on to a partly-filled block
+    before handing it over (1 ms if immediate is True).  As with
+    libpcap, a snaplen of 0 means the default (65535 here).  Each
+    packet is copied out of the ring once, as bytes, since Packet
+    objects can outlive the part of the ring they were received into.
+    '''
+    def __init__(self, device, snaplen=65535, promisc=1, to_ms=100,
+                 filterstr=None, nonblock=True, buffer_size=None,
+                 immediate=False):
+        if not sys.platform.startswith('linux'):
+            raise PcapException("TPACKET_V3 rings are only available on Linux")
+        if snaplen <= 0:
+            snaplen = 65535
+        self._devname = device
+        self._snaplen = snaplen
+        self._recv = self._drop = 0
+        self._ring = None
+
+        block_size = 1 << 18
+        while block_size < snaplen + 128:
+            block_size <<= 1
+        if buffer_size is None:
+            buffer_size = 1 << 22
+        block_nr = max(2, -(-buffer_size // block_size))
+        if immediate or to_ms <= 0:
+            to_ms = 1
+        self._block_size = block_size
+        self._block_nr = block_nr
+        self._block = 0
+        self._pkt_left = 0
+        self._pkt_offset = 0
+
+        self._sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+        try:
+            self._sock.setsockopt(_SOL_PACKET, _PACKET_VERSION, _TPACKET_V3)
+            self._sock.setsockopt(_SOL_PACKET, _PACKET_RX_RING,
+                _tpacket_req3.pack(block_size, block_nr, _FRAME_SIZE,
+                    block_size // _FRAME_SIZE * block_nr, to_ms, 0, 0))
+            self._ring = mmap.mmap(self._sock.fileno(), block_size * block_nr,
+                mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            if filterstr is not None:
+                self.set_filter(filterstr)
+            self._sock.bind((device, _ETH_P_ALL))
+            if promisc:
+                self._sock.setsockopt(_SOL_PACKET, _PACKET_ADD_MEMBERSHIP,
+                    _packet_mreq.pack(socket.if_nametoindex(device),
+                                      _PACKET_MR_PROMISC, 0, b''))
+        except OSError as e:
+            self._close()
+            raise PcapException("Failed to open TPACKET_V3 ring on {}: {}".format(device, e))
+
+        with PcapLiveDevice._lock:
+            PcapLiveDevice._OpenDevices[id(self)] = self
+
+    @property
+    def name(self):
+        return self._devname
+
+    @property
+    def dlt(self):
+        return Dlt.DLT_EN10MB
+
+    @property
+    def fd(self):
+        return self._sock.fileno()
+
+    @property
+    def snaplen(self):
+        return self._snaplen
+
+    def set_filter(self, filterstr):
+        prog = _PcapFfi.instance()._compile_filter(filterstr, self._snaplen)
+        ffi = _PcapFfi.instance().ffi
+        cprog = ffi.from_buffer(prog)
+        fprog = _sock_fprog.pack(len(prog) // 8, int(ffi.cast("uintptr_t", cprog)))
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, _SO_ATTACH_FILTER, fprog)
+        except OSError as e:
+            raise PcapException("Error setting filter on {}: {}".format(self._devname, e))
+
+    def recv_packet(self, timeout):
+        pkts = self.recv_batch(1, timeout)
+        if pkts:
+            return pkts[0]
+        return None
+
+    def recv_batch(self, max_count=-1, timeout=0):
+        '''
+        Return a list of PcapPackets holding up to max_count packets
+        (every packet in blocks the kernel has handed over, if max_count
+        is -1).  If timeout isn't 0, first wait up to timeout seconds
+        (forever if None or negative) for packets to arrive.  An empty
+        list means that none did.
+        '''
+        if timeout is not None and timeout < 0:
+            timeout = None
+        pkts = self._read_ring(max_count)
+        if pkts or timeout == 0:
+            return pkts
+        try:
+            xread,xwrite,xerr = select([self._sock], [], [self._sock], timeout)
+        except:
+            return []
+        return self._read_ring(max_count)
+
+    def _read_ring(self, max_count):
+        ring = self._ring
+        block_size = self._block_size
+        snaplen = self._snaplen
+        pkts = []
+        append = pkts.append
+        while len(pkts) != max_count:
+            block = self._block * block_size
+            if not self._pkt_left:
+                if not _block_status.unpack_from(ring, block + _BLOCK_STATUS_OFFSET)[0] & _TP_STATUS_USER:
+                    break
+                num_pkts, first = _block_pkts.unpack_from(ring, block + _BLOCK_PKTS_OFFSET)
+                self._pkt_left = num_pkts
+                self._pkt_offset = block + first
+
+            if self._pkt_left:
+                offset = self._pkt_offset
+                nextoffset, sec, nsec, caplen, length, status, mac, net, \
+                    rxhash, tci, tpid = _tpacket3_hdr.unpack_from(ring, offset)
+                if caplen > snaplen:
+                    caplen = snaplen
+                start = offset + mac
+                raw = ring[start:start + caplen]
+                if status & _TP_STATUS_VLAN_VALID:
+                    # the kernel strips 802.1Q tags; put them back, as
+                    # libpcap does
+                    if not status & _TP_STATUS_VLAN_TPID_VALID:
+                        tpid = 0x8100
+                    raw = raw[:12] + struct.pack('!HH', tpid, tci) + raw[12:]
+                    caplen += 4
+                    length += 4
+                ns = sec * 1000000000 + nsec
+                append(PcapPacket(ns / 1000000000, caplen, length, raw, ns))
+                self._pkt_left -= 1
+                self._pkt_offset = offset + nextoffset
+
+            if not self._pkt_left:
+                # done with this block; give it back to the kernel
+                _block_status.pack_into(ring, block + _BLOCK_STATUS_OFFSET, _TP_STATUS_KERNEL)
+                self._block = (self._block + 1) % self._block_nr
+        return pkts
+
+    def send_packet(self, xbuffer):
+        if not isinstance(xbuffer, bytes):
+            raise PcapException("Packets to be sent via libpcap must be serialized as a bytes object")
+        try:
+            self._sock.send(xbuffer)
+        except OSError as e:
+            raise PcapException("Error sending packet: {}".format(e))
+        return True
+
+    def send_packets(self, xbuffers):
+        '''
+        Send a list of packets, each serialized as a bytes object, in
+        order, with sendmmsg if it's available.
+        '''
+        for xbuffer in xbuffers:
+            if not isinstance(xbuffer, bytes):
+                raise PcapException("Packets to be sent via libpcap must be serialized as a bytes object")
+        base = _PcapFfi.instance()
+        if base.libc is None:
+            for xbuffer in xbuffers:
+                self.send_packet(xbuffer)
+        else:
+            base._sendmmsg(self.fd, xbuffers)
+        return True
+
+    def stats(self):
+        # the kernel resets its counters each time they're read, and
+        # counts drops as received
+        packets, drops, freezes = _tpacket_stats_v3.unpack(
+            self._sock.getsockopt(_SOL_PACKET, _PACKET_STATISTICS,
+                                  _tpacket_stats_v3.size))
+        self._recv += packets
+        self._drop += drops
+        return PcapStats(self._recv, self._drop, 0)
+
+    def close(self):
+        with PcapLiveDevice._lock:
+            PcapLiveDevice._OpenDevices.pop(id(self), None)
+        self._close()
+
+    def _close(self):
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        self._sock.close()
@@ -21,6 +21,32 @@ class AddressTests(unittest.TestCase):
         self.assertEqual(e2.toTuple(), (0xe2, 0x0, 0x0, 0x0, 0x0, 0x0))
         self.assertTrue(e1 < e2)
 
+    def testEthAddrFastPaths(self):
+        raw = b'\x00\x11\x22\x33\x44\x55'
+        e = EthAddr.from_raw(raw)
+        self.assertIsInstance(e, EthAddr)
+        self.assertIs(EthAddr.from_raw(bytes(bytearray(raw))), e)
+        self.assertEqual(e, EthAddr("00:11:22:33:44:55"))
+        self.assertEqual(e, raw)
+        self.assertEqual(e, "00-11-22-33-44-55")
+        self.assertNotEqual(e, b'\x00'*6)
+        self.assertNotEqual(e, EthAddr())
+        self.assertEqual(hash(e), hash(EthAddr(raw)))
+        self.assertIs(EthAddr.coerce(e), e)
+        self.assertIs(EthAddr.coerce(raw), e)
+        self.assertEqual(EthAddr.coerce("00:11:22:33:44:55"), e)
+        self.assertTrue(EthAddr() < e)
+        self.assertTrue(e < b'\xff'*6)
+        with self.assertRaises(RuntimeError):
+            EthAddr.coerce("00:11")
+
+        p = Packet(raw=(Ethernet(src=raw, dst="ff:ff:ff:ff:ff:ff",
+            ethertype=EtherType.ARP) + 
+            Arp(senderhwaddr=raw)).to_bytes())
+        self.assertIs(p[Ethernet].src, e)
+        self.assertIs(p[Arp].senderhwaddr, e)
+        self.assertEqual(p[Ethernet].dst, SpecialEthAddr.ETHER_BROADCAST.value)
+
     def testSpecialEth(self):
         self.assertEqual(SpecialEthAddr.ETHER_ANY.value.raw, b'\x00'*6)
         self.assertTrue(SpecialEthAddr.LLDP_MULTICAST.value.is_multicast)
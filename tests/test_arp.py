@@ -55,5 +55,13 @@ class ArpTests(unittest.TestCase):
         self.assertEqual(arp, other)
         self.assertEqual(len(arp), 28)
 
+    def testOldPickleState(self):
+        # protocol addresses used to be stored as IPv4Address objects
+        a = Arp.__new__(Arp)
+        a.__setstate__((None, {'_senderprotoaddr': IPAddr("10.0.0.1"),
+            '_targetprotoaddr': IPAddr("10.0.0.2")}))
+        self.assertEqual(a.senderprotoaddr, IPAddr("10.0.0.1"))
+        self.assertEqual(a.targetprotoaddr, IPAddr("10.0.0.2"))
+
 if __name__ == '__main__':
     unittest.main()
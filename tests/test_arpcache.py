@@ -0,0 +1,140 @@
+import unittest
+from ipaddress import IPv4Address, IPv6Address
+
+from switchyard.lib.arpcache import ArpCache
+from switchyard.lib.timerwheel import TimerWheel
+from switchyard.lib.address import EthAddr
+from switchyard.lib.packet import *
+
+
+class TimerWheelTests(unittest.TestCase):
+    def testExpire(self):
+        wheel = TimerWheel(resolution=0.5, slots=8)
+        self.assertIsNone(wheel.next_deadline())
+        wheel.schedule('a', 1.0)
+        wheel.schedule('b', 2.2)
+        wheel.schedule('c', 10.0)  # beyond one turn of the wheel
+        self.assertEqual(len(wheel), 3)
+        self.assertEqual(wheel.next_deadline(), 1.0)
+        self.assertEqual(wheel.expire(0.9), [])
+        self.assertEqual(wheel.expire(1.0), ['a'])
+        self.assertEqual(wheel.expire(2.4), [])
+        self.assertEqual(wheel.expire(2.5), ['b'])
+        self.assertIn('c', wheel)
+        self.assertEqual(wheel.expire(9.9), [])
+        self.assertEqual(wheel.expire(10.0), ['c'])
+        self.assertEqual(len(wheel), 0)
+
+    def testCancel(self):
+        wheel = TimerWheel(resolution=1.0, slots=4)
+        wheel.schedule('a', 1.0)
+        wheel.schedule('a', 3.0)
+        wheel.schedule('b', 2.0)
+        wheel.cancel('b')
+        wheel.cancel('nonexistent')
+        self.assertEqual(wheel.expire(2.0), [])
+        self.assertEqual(wheel.expire(100.0), ['a'])
+        # deadlines in the past fire on the next call to expire
+        wheel.schedule('c', 50.0)
+        self.assertEqual(wheel.expire(100.0), [])
+        self.assertEqual(wheel.expire(101.0), ['c'])
+
+    def testMany(self):
+        wheel = TimerWheel(resolution=0.1, slots=64)
+        for i in range(10000):
+            wheel.schedule(i, i * 0.01)
+        fired = []
+        t = 0.0
+        while len(wheel):
+            t += 0.25
+            fired.extend(wheel.expire(t))
+            self.assertTrue(all(i * 0.01 <= t for i in fired[-10:]))
+        self.assertEqual(sorted(fired), list(range(10000)))
+
+
+class ArpCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = ArpCache(timeout=10.0, request_interval=1.0,
+            max_requests=3, backoff=2.0, queue_limit=2, clock=lambda: 0.0)
+
+    def testLookup(self):
+        cache = self.cache
+        self.assertIsNone(cache.lookup("10.0.0.1", now=0.0))
+        self.assertEqual(cache.update("10.0.0.1", "11:22:33:44:55:66",
+            now=0.0), [])
+        mac = EthAddr("11:22:33:44:55:66")
+        self.assertEqual(cache.lookup("10.0.0.1", now=1.0), mac)
+        self.assertEqual(cache.lookup(IPv4Address("10.0.0.1"), now=1.0), mac)
+        self.assertEqual(cache.lookup(0x0a000001, now=1.0), mac)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(list(cache), [(IPv4Address("10.0.0.1"), mac)])
+
+        cache.update("fe80::1", "00:00:00:00:00:01", now=0.0)
+        self.assertEqual(cache.lookup(IPv6Address("fe80::1"), now=0.0),
+            EthAddr("00:00:00:00:00:01"))
+
+        # refreshed entries last longer
+        cache.update("10.0.0.1", mac, now=5.0)
+        self.assertEqual(cache.expire(now=12.0), ([], []))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.lookup("10.0.0.1", now=12.0), mac)
+        self.assertIsNone(cache.lookup("10.0.0.1", now=15.0))
+        cache.expire(now=15.1)
+        self.assertEqual(len(cache), 0)
+
+        cache.update("10.0.0.2", mac, now=20.0)
+        cache.remove("10.0.0.2")
+        with self.assertRaises(KeyError):
+            cache.remove("10.0.0.2")
+        self.assertEqual(cache.expire(now=40.0), ([], []))
+
+    def testResolution(self):
+        cache = self.cache
+        self.assertIsNone(cache.next_timeout(now=0.0))
+        self.assertTrue(cache.enqueue("10.0.0.1", 'p1', 'eth0', now=0.0))
+        self.assertTrue(cache.pending("10.0.0.1"))
+        self.assertFalse(cache.enqueue("10.0.0.1", 'p2', 'eth1', now=0.2))
+        self.assertAlmostEqual(cache.next_timeout(now=0.5), 0.5)
+        self.assertEqual(cache.expire(now=0.9), ([], []))
+        retransmit, failed = cache.expire(now=1.0)
+        self.assertEqual(retransmit, [(IPv4Address("10.0.0.1"), 'eth0')])
+        self.assertEqual(failed, [])
+
+        # a reply releases the queued packets
+        arp = create_ip_arp_reply("11:22:33:44:55:66", "00:00:00:00:00:01",
+            "10.0.0.1", "10.0.0.254")[Arp]
+        self.assertEqual(cache.process_arp(arp, now=1.5),
+            [('p1', 'eth0'), ('p2', 'eth1')])
+        self.assertFalse(cache.pending("10.0.0.1"))
+        self.assertEqual(cache.lookup("10.0.0.1", now=1.5),
+            EthAddr("11:22:33:44:55:66"))
+        self.assertEqual(cache.expire(now=5.0), ([], []))
+
+    def testBackoffAndFailure(self):
+        cache = self.cache
+        cache.enqueue("10.0.0.9", 'p1', 'eth0', now=0.0)
+        cache.enqueue("10.0.0.9", 'p2', 'eth0', now=0.0)
+        cache.enqueue("10.0.0.9", 'p3', 'eth0', now=0.0)
+        self.assertEqual(cache.dropped, 1)
+        # requests at 0 (by the caller), 1 and 3, then failure at 7
+        times = []
+        failures = []
+        t = 0.0
+        while t < 10.0:
+            t = round(t + 0.1, 1)
+            retransmit, failed = cache.expire(now=t)
+            if retransmit:
+                times.append(t)
+            failures.extend(failed)
+        self.assertEqual(times, [1.0, 3.0])
+        self.assertEqual(failures, [(IPv4Address("10.0.0.9"),
+            [('p2', 'eth0'), ('p3', 'eth0')])])
+        self.assertFalse(cache.pending("10.0.0.9"))
+        self.assertIsNone(cache.next_timeout(now=10.0))
+
+        # a new packet starts resolution over again
+        self.assertTrue(cache.enqueue("10.0.0.9", 'p4', now=10.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+import random
+import struct
+import sys
+from socket import ntohs
+
+import switchyard.lib.packet.common as common
+from switchyard.lib.packet.common import checksum
+from switchyard.lib.packet import *
+from switchyard.lib.address import IPv6Address
+
+
+def reference_checksum(data, start=0, skip_word=None, byteorder=sys.byteorder):
+    # word-at-a-time version of checksum, as originally implemented
+    fmt = '<' if byteorder == 'little' else '>'
+    data = bytes(data)
+    nwords = len(data) // 2
+    words = struct.unpack('{}{}H'.format(fmt, nwords), data[:nwords*2])
+    for i in range(nwords):
+        if i == skip_word:
+            continue
+        start += words[i]
+    if len(data) % 2 != 0:
+        start += struct.unpack(fmt+'H', data[-1:]+b'\x00')[0]
+    start  = (start >> 16) + (start & 0xffff)
+    start += (start >> 16)
+    result = ~start & 0xffff
+    if byteorder == 'little':
+        result = ntohs(result)
+    return result
+
+
+class ChecksumTests(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(42)
+
+    def _samples(self):
+        yield b''
+        yield b'\x00'
+        yield b'\xff'
+        yield b'\x00\x00'
+        yield b'\xff\xff'
+        yield b'\x00' * 21
+        yield b'\xff' * 20
+        yield b'\xff' * 21
+        yield b'\x00\x00\xff\xff\x00\x00'
+        yield b'\x01\x00\xfe\xff'
+        for length in list(range(1, 70)) + [1499, 1500, 9000, 9001]:
+            yield bytes(self.rand.getrandbits(8) for _ in range(length))
+
+    def _compare(self, byteorder):
+        for data in self._samples():
+            nwords = len(data) // 2
+            for skip in [None, -1, 0, 1, 5, nwords-1, nwords, nwords+1]:
+                for start in [0, 1, 0xffff, 0x12345]:
+                    expected = reference_checksum(data, start, skip, byteorder)
+                    self.assertEqual(checksum(data, start, skip), expected,
+                        "{} start {} skip {}".format(data, start, skip))
+            self.assertEqual(checksum(bytearray(data)),
+                reference_checksum(data, byteorder=byteorder))
+            self.assertEqual(checksum(memoryview(data)),
+                reference_checksum(data, byteorder=byteorder))
+
+    def testEquivalence(self):
+        self._compare(sys.byteorder)
+
+    def testEquivalenceOtherByteOrder(self):
+        other = 'big' if sys.byteorder == 'little' else 'little'
+        saved = common._byteorder, common.ntohs
+        common._byteorder = other
+        if sys.byteorder == 'little':
+            common.ntohs = lambda x: x
+        else:
+            common.ntohs = lambda x: ((x & 0xff) << 8) | (x >> 8)
+        try:
+            self._compare(other)
+        finally:
+            common._byteorder, common.ntohs = saved
+
+    def testVerify(self):
+        # an IPv4 header with its checksum in place sums to zero
+        hdr = bytes.fromhex('450000730000400040110000c0a80001c0a800c7')
+        csum = checksum(hdr)
+        self.assertEqual(csum, 0xb861)
+        full = hdr[:10] + struct.pack('!H', csum) + hdr[12:]
+        self.assertEqual(checksum(full), 0)
+        self.assertEqual(checksum(full, skip_word=5), csum)
+
+    def testVerifyChecksums(self):
+        def ip4(proto, *rest):
+            p = Ethernet() + IPv4(src="10.0.0.1", dst="10.0.0.2", 
+                protocol=proto, ttl=64)
+            for hdr in rest:
+                p += hdr
+            return p
+
+        udp = ip4(IPProtocol.UDP, UDP(src=1234, dst=53), b'query')
+        tcp = ip4(IPProtocol.TCP, TCP(src=80, dst=4321, seq=99), b'data')
+        icmp = ip4(IPProtocol.ICMP, ICMP())
+        icmp6 = Ethernet(ethertype=EtherType.IPv6) + \
+            IPv6(src=IPv6Address("fe80::1"), dst=IPv6Address("fe80::2"),
+                nextheader=IPProtocol.ICMPv6) + ICMPv6()
+        arp = create_ip_arp_request("11:22:33:44:55:66", "10.0.0.1", "10.0.0.2")
+        for p in [udp, tcp, icmp, icmp6, arp]:
+            self.assertTrue(verify_checksums(p))
+            self.assertTrue(verify_checksums(Packet(p.to_bytes())))
+        self.assertTrue(verify_checksums(Packet()))
+
+        frames = [p.to_bytes() for p in [udp, tcp, icmp, icmp6]]
+        self.assertEqual(verify_checksums_batch(frames), [True]*4)
+
+        # flip a bit in each header/payload byte; every one is caught
+        raw = udp.to_bytes()
+        corrupt = []
+        for i in range(14, len(raw)):
+            frame = bytearray(raw)
+            frame[i] ^= 0x10
+            corrupt.append(frame)
+        self.assertEqual(verify_checksums_batch(corrupt), [False]*len(corrupt))
+        self.assertFalse(verify_checksums(Packet(corrupt[-1])))
+
+        # ethernet padding is ignored, truncation isn't
+        self.assertEqual(verify_checksums_batch([raw + b'\x00'*10, raw[:-1], 
+            raw[:20]]), [True, False, False])
+
+        # no UDP checksum
+        frame = bytearray(raw)
+        frame[40:42] = b'\x00\x00'
+        self.assertTrue(verify_checksums_batch([frame])[0])
+
+        # a bad IPv4 header checksum isn't carried over when the header
+        # is changed and serialized again
+        p = Packet(corrupt[8])
+        p[IPv4].ttl -= 1
+        self.assertTrue(verify_checksums_batch([p.to_bytes()])[0])
+
+        # vlan tags, and other first headers
+        ipudp = IPv4(src="10.0.0.1", dst="10.0.0.2", protocol=IPProtocol.UDP,
+            ttl=64) + UDP(src=1234, dst=53) + b'query'
+        vlan = Ethernet(ethertype=EtherType.x8021Q) + \
+            Vlan(vlanid=10, ethertype=EtherType.IPv4) + ipudp
+        self.assertTrue(verify_checksums(vlan))
+        self.assertTrue(verify_checksums(Packet(vlan.to_bytes())))
+        self.assertEqual(verify_checksums_batch([raw[14:], 
+            corrupt[8][14:]], IPv4), [True, False])
+        nullhdr = Packet() + Null() + ipudp
+        self.assertTrue(verify_checksums(nullhdr))
+        self.assertEqual(verify_checksums_batch([nullhdr.to_bytes()], Null), 
+            [True])
+        with self.assertRaises(ValueError):
+            verify_checksums_batch([raw], UDP)
+
+        # nothing to check for packets starting with other headers
+        self.assertTrue(verify_checksums(Packet() + arp[1]))
+        self.assertTrue(verify_checksums(Packet(arp.to_bytes()[14:], 
+            first_header=Arp)))
+
+        # once a packet is changed, its original bytes aren't checked
+        p = Packet(raw)
+        del p[0]
+        self.assertTrue(verify_checksums(p))
+        p = Packet(corrupt[-1])
+        self.assertFalse(verify_checksums(p))
+        p[UDP].dst = 54
+        self.assertTrue(verify_checksums(p))
+
+
+if __name__ == '__main__':
+    unittest.main()
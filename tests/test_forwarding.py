@@ -0,0 +1,142 @@
+import unittest
+import random
+from io import StringIO
+from ipaddress import ip_address, ip_network, IPv4Address, IPv6Address, \
+    IPv4Network, IPv6Network
+
+from switchyard.lib.forwarding import ForwardingTable, ForwardingEntry
+from switchyard.lib.packet import IPv4
+
+
+class ForwardingTableTests(unittest.TestCase):
+    def testLookup(self):
+        fwd = ForwardingTable()
+        self.assertIsNone(fwd.lookup("10.0.0.1"))
+        fwd.insert("10.0.0.0/8", 'a')
+        fwd.insert(IPv4Network("10.1.0.0/16"), 'b')
+        fwd.insert("10.1.2.0/255.255.255.0", 'c')
+        fwd.insert("10.1.2.128/25", 'd')
+        fwd.insert("10.1.2.200/32", 'e')
+        self.assertEqual(len(fwd), 5)
+        self.assertEqual(fwd.lookup("10.200.0.1"), 'a')
+        self.assertEqual(fwd.lookup(ip_address("10.1.200.1")), 'b')
+        self.assertEqual(fwd.lookup("10.1.2.1"), 'c')
+        self.assertEqual(fwd.lookup("10.1.2.129"), 'd')
+        self.assertEqual(fwd.lookup(int(ip_address("10.1.2.200"))), 'e')
+        self.assertIsNone(fwd.lookup("11.0.0.1"))
+        self.assertEqual(fwd.longest_match("10.1.2.129"),
+            (IPv4Network("10.1.2.128/25"), 'd'))
+        self.assertIsNone(fwd.longest_match("192.168.0.1"))
+
+        ip = IPv4(dst="10.1.2.3")
+        self.assertEqual(fwd.lookup(ip.dst_int), 'c')
+
+        # host bits are ignored, and inserting again replaces the value
+        fwd.insert("10.1.2.3/24", 'C')
+        self.assertEqual(len(fwd), 5)
+        self.assertEqual(fwd.lookup("10.1.2.1"), 'C')
+
+        fwd.insert("0.0.0.0/0", 'default')
+        self.assertEqual(fwd.lookup("11.0.0.1"), 'default')
+        self.assertEqual(fwd.longest_match("11.0.0.1"),
+            (IPv4Network("0.0.0.0/0"), 'default'))
+
+    def testDelete(self):
+        fwd = ForwardingTable([("10.0.0.0/8", 'a'), ("10.1.0.0/16", 'b'),
+            ("10.1.2.0/23", 'c'), ("10.1.2.0/24", 'd'), ("0.0.0.0/0", 'x')])
+        self.assertIn("10.1.0.0/16", fwd)
+        self.assertNotIn("10.1.0.0/17", fwd)
+        self.assertEqual(fwd["10.1.2.0/23"], 'c')
+        fwd.delete("10.1.2.0/24")
+        self.assertEqual(fwd.lookup("10.1.2.1"), 'c')
+        del fwd["10.1.2.0/23"]
+        self.assertEqual(fwd.lookup("10.1.2.1"), 'b')
+        fwd.delete("10.1.0.0/16")
+        self.assertEqual(fwd.lookup("10.1.2.1"), 'a')
+        fwd.delete("0.0.0.0/0")
+        self.assertIsNone(fwd.lookup("11.0.0.1"))
+        with self.assertRaises(KeyError):
+            fwd.delete("10.1.0.0/16")
+        with self.assertRaises(KeyError):
+            fwd.delete("10.0.0.0/9")
+        with self.assertRaises(KeyError):
+            fwd["10.1.2.0/24"]
+        self.assertEqual(list(fwd), [(IPv4Network("10.0.0.0/8"), 'a')])
+        fwd.delete("10.0.0.0/8")
+        self.assertEqual(len(fwd), 0)
+        self.assertEqual(fwd._roots[4].slots, {})
+
+    def testIPv6(self):
+        fwd = ForwardingTable()
+        fwd.insert("2001:db8::/32", 'a')
+        fwd.insert("2001:db8:1::/48", 'b')
+        fwd.insert("::/0", 'default6')
+        fwd.insert("10.0.0.0/8", 'v4')
+        self.assertEqual(fwd.lookup("2001:db8:1::1"), 'b')
+        self.assertEqual(fwd.lookup("2001:db8:2::1"), 'a')
+        self.assertEqual(fwd.lookup("2001:db9::1"), 'default6')
+        self.assertEqual(fwd.lookup(int(ip_address("2001:db8:1::1")),
+            version=6), 'b')
+        # integers are IPv4 addresses unless told otherwise
+        self.assertEqual(fwd.lookup(int(ip_address("10.0.0.1"))), 'v4')
+        self.assertEqual(fwd.longest_match("2001:db8:1::1"),
+            (IPv6Network("2001:db8:1::/48"), 'b'))
+        self.assertEqual([net for net,_ in fwd], [IPv4Network("10.0.0.0/8"),
+            IPv6Network("::/0"), IPv6Network("2001:db8::/32"),
+            IPv6Network("2001:db8:1::/48")])
+
+    def testLoad(self):
+        table = StringIO('''172.16.0.0 255.255.0.0 192.168.1.2 router-eth0
+172.16.128.0 255.255.192.0 10.10.0.254 router-eth1
+
+# comment
+172.16.64.0 255.255.192.0 10.10.1.254 router-eth1
+10.100.0.0 255.255.0.0 172.16.42.2 router-eth2''')
+        fwd = ForwardingTable()
+        fwd.load(table)
+        self.assertEqual(len(fwd), 4)
+        self.assertEqual(fwd.lookup("172.16.130.1"),
+            ForwardingEntry(ip_address("10.10.0.254"), "router-eth1"))
+        self.assertEqual(fwd.lookup("172.16.0.1").interface, "router-eth0")
+        self.assertEqual(fwd.lookup("10.100.1.1").nexthop,
+            ip_address("172.16.42.2"))
+        with self.assertRaises(ValueError):
+            fwd.load(["10.0.0.0 255.0.0.0 eth0"])
+
+    def testRandomized(self):
+        # compare against a linear scan over the same routes
+        rand = random.Random(0)
+        for addrcls, width in ((IPv4Address, 32), (IPv6Address, 128)):
+            def network(bits, length):
+                return ip_network("{}/{}".format(addrcls(bits), length))
+            fwd = ForwardingTable()
+            routes = {}
+            for i in range(400):
+                if routes and rand.random() < 0.5:
+                    bits, length = rand.choice(list(routes))
+                    length = min(width, length + rand.choice([1, 3, 8, 20]))
+                    bits |= rand.getrandbits(width) & ((1 << (width-length)) - 1)
+                else:
+                    length = rand.randint(0, width)
+                    bits = rand.getrandbits(width)
+                bits = bits >> (width - length) << (width - length) if length else 0
+                fwd.insert(network(bits, length), i)
+                routes[(bits, length)] = i
+                if rand.random() < 0.3:
+                    key = rand.choice(list(routes))
+                    del routes[key]
+                    fwd.delete(network(*key))
+            self.assertEqual(len(fwd), len(routes))
+            for _ in range(2000):
+                bits, length = rand.choice(list(routes))
+                addr = bits | (rand.getrandbits(width) & ((1 << (width-length)) - 1))
+                best = max([ (l,v) for (b,l),v in routes.items()
+                    if (addr ^ b) >> (width - l) == 0 ])
+                self.assertEqual(fwd.lookup(addrcls(addr)), best[1])
+            for key in list(routes):
+                fwd.delete(network(*key))
+            self.assertEqual(len(fwd), 0)
+            self.assertEqual(fwd._roots[addrcls(0).version].slots, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ from copy import deepcopy, copy
 
 from switchyard.lib.packet import *
 from switchyard.lib.address import EthAddr, IPv4Address, SpecialIPv4Addr
+from switchyard.lib.packet.common import checksum
 
 class IPv4PacketTests(unittest.TestCase):
     def setUp(self):
@@ -38,6 +39,33 @@ class IPv4PacketTests(unittest.TestCase):
         self.assertEqual(self.ip.src, SpecialIPv4Addr.IP_ANY.value)
         self.assertEqual(self.ip.dst, SpecialIPv4Addr.IP_ANY.value)
 
+    def testIntAddrs(self):
+        ip = IPv4(src="10.0.0.1", dst=IPv4Address("192.168.1.254"))
+        self.assertEqual(ip.src_int, 0x0a000001)
+        self.assertEqual(ip.dst_int, 0xc0a801fe)
+        self.assertEqual(ip.src, IPv4Address("10.0.0.1"))
+        self.assertIsInstance(ip.dst, IPv4Address)
+        ip.src = 0x01020304
+        self.assertEqual(str(ip.src), "1.2.3.4")
+        ip.dst = b'\x05\x06\x07\x08'
+        self.assertEqual(ip.dst_int, 0x05060708)
+        with self.assertRaises(ValueError):
+            ip.src = 2**32
+        with self.assertRaises(ValueError):
+            ip.dst = "1.2.3"
+
+        ip2 = IPv4()
+        ip2.from_bytes(ip.to_bytes())
+        self.assertEqual(ip2.src_int, 0x01020304)
+        self.assertEqual(ip2, ip)
+
+        # headers pickled when addresses were IPv4Address objects
+        ip3 = IPv4.__new__(IPv4)
+        ip3.__setstate__((None, {'_src': IPv4Address("1.2.3.4"),
+            '_dst': IPv4Address("5.6.7.8"), '_tos': 0, '_ttl': 0}))
+        self.assertEqual(ip3.src_int, 0x01020304)
+        self.assertEqual(ip3.dst, ip.dst)
+
     def testBadSet(self):
         with self.assertRaises(Exception):
             self.ip.ipdest = IPv4Address('0.0.0.0')
@@ -81,6 +109,58 @@ class IPv4PacketTests(unittest.TestCase):
         self.assertEqual(iphdr.ecn, 1)
         self.assertEqual(iphdr.tos, (0x2E<<2) | 0x1)
 
+    def testIncrementalChecksum(self):
+        def fullsum(iphdr):
+            raw = iphdr.to_bytes()
+            return checksum(raw[:10] + b'\x00\x00' + raw[12:])
+
+        pkt = Ethernet() + IPv4(src="10.0.0.1", dst="10.0.0.2", ttl=64,
+            protocol=IPProtocol.UDP) + UDP() + b'data'
+        raw = pkt.to_bytes()
+        for ttl in range(63, -1, -1):
+            pkt[IPv4].ttl = ttl
+            self.assertEqual(checksum(pkt.to_bytes()[14:34]), 0)
+        iphdr = pkt[IPv4]
+        iphdr.tos = 0xb8
+        iphdr.ipid = 0xffff
+        iphdr.src = "192.168.100.200"
+        iphdr.dst = "255.255.255.255"
+        iphdr.flags = IPFragmentFlag.DontFragment
+        iphdr.protocol = IPProtocol.TCP
+        self.assertEqual(iphdr.checksum, fullsum(iphdr))
+        self.assertEqual(checksum(iphdr.to_bytes()), 0)
+
+        # start from the checksum of a parsed header
+        pkt = Packet(raw)
+        pkt[IPv4].ttl -= 1
+        pkt[IPv4].dst = "10.1.2.3"
+        self.assertEqual(checksum(pkt.to_bytes()[14:34]), 0)
+
+        # options changes force a full recompute
+        iphdr = pkt[IPv4]
+        iphdr.options.append(IPOptionRouterAlert())
+        self.assertEqual(checksum(pkt.to_bytes()[14:38]), 0)
+        iphdr.ttl = 1
+        self.assertEqual(iphdr.checksum, fullsum(iphdr))
+        del iphdr.options[0]
+        self.assertEqual(checksum(pkt.to_bytes()[14:34]), 0)
+
+        # copies are independent
+        xcopy = deepcopy(iphdr)
+        xcopy.ttl = 2
+        self.assertEqual(xcopy.checksum, fullsum(xcopy))
+        self.assertEqual(iphdr.checksum, fullsum(iphdr))
+
+        # a wrong (or missing) checksum on the wire isn't carried over
+        for csum in (b'\x00\x00', b'\x01\x00'):
+            bad = raw[:24] + csum + raw[26:]
+            pkt = Packet(bad)
+            self.assertEqual(checksum(pkt.to_bytes()[14:34]), 0)
+            self.assertEqual(pkt.to_bytes()[14:34], raw[14:34])
+            pkt = Packet(bad)
+            pkt[IPv4].ttl -= 1
+            self.assertEqual(checksum(pkt.to_bytes()[14:34]), 0)
+
     def testOptionContainer(self):
         opts = IPOptionList()
         self.assertEqual(opts.to_bytes(), b'')
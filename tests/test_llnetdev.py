@@ -92,6 +92,31 @@ class LLNetDevTests(unittest.TestCase):
             self.real.send_packet(intf, p)
             self.real._pcaps.get.assert_called_with(intf.name, None)
 
+    def testRealSendPackets(self):
+        self.real._devinfo = {
+            'eth0': Interface('eth0', EthAddr('00:00:00:00:00:01'), ifnum=0,
+                              iftype=InterfaceType.Wired),
+            'eth1': Interface('eth1', EthAddr('00:00:00:00:00:02'), ifnum=1,
+                              iftype=InterfaceType.Wired),
+        }
+        self.real._pcaps = { 'eth0': Mock(), 'eth1': Mock() }
+        self.real._localsend = {}
+        p1 = Ethernet() + IPv4(protocol=IPProtocol.UDP) + UDP()
+        p2 = Ethernet(src='00:00:00:00:00:01') + IPv4(protocol=IPProtocol.UDP) + UDP()
+        self.real.send_packets([('eth0', p1), (1, p1),
+            (self.real._devinfo['eth0'], p2), ('eth1', p2)])
+        self.real._pcaps['eth0'].send_packets.assert_called_once_with(
+            [p1.to_bytes(), p2.to_bytes()])
+        self.real._pcaps['eth1'].send_packets.assert_called_once_with(
+            [p1.to_bytes(), p2.to_bytes()])
+
+        # nothing is sent if any pair is bad
+        with self.assertRaises(ValueError):
+            self.real.send_packets([('eth0', p1), ('eth9', p1)])
+        with self.assertRaises(ValueError):
+            self.real.send_packets([('eth0', p1), ('eth1', None)])
+        self.assertEqual(self.real._pcaps['eth0'].send_packets.call_count, 1)
+
     def testFakeCallback(self):
         called = (None,None)
 
@@ -193,6 +218,161 @@ class LLNetDevTests(unittest.TestCase):
         lr.shutdown()
         self.assertFalse(LLNetReal.running)
 
+        lr = LLNetReal(['en0'], "testy", pcap_options={
+            None: {'snaplen': 128, 'buffer_size': 1 << 20},
+            'en0': {'buffer_size': 1 << 24, 'immediate': True},
+            'en1': {'to_ms': 10}})
+        lr.shutdown()
+        mock_pcap.assert_called_with('en0', snaplen=128,
+            buffer_size=1 << 24, immediate=True)
+
+        mock_ring = MagicMock()
+        setattr(llreal, "TpacketDevice", mock_ring)
+        lr = LLNetReal(['en0'], "testy", backend='tpacket')
+        lr.shutdown()
+        mock_ring.assert_called_with('en0')
+        with self.assertRaises(ValueError):
+            LLNetReal(['en0'], "testy", backend='bogus')
+
+    def testRealRecvPackets(self):
+        from queue import Queue
+        from switchyard.pcapffi import PcapPacket
+        self.real._pktqueue = Queue()
+        self.real._lazy = False
+        running = LLNetReal.running if hasattr(LLNetReal, 'running') else False
+        LLNetReal.running = True
+        try:
+            with self.assertRaises(NoPackets):
+                self.real.recv_packets(timeout=0.0)
+            raw = (Ethernet() + IPv4(protocol=IPProtocol.UDP) + UDP()).to_bytes()
+            for i in range(5):
+                self.real._pktqueue.put(('eth{}'.format(i), Dlt.DLT_EN10MB,
+                    PcapPacket(float(i), len(raw), len(raw), raw)))
+            self.real._pktqueue.put(('eth0', None, PcapPacket(5.0, 0, 0, b'')))
+            pkts = self.real.recv_packets(3)
+            self.assertEqual([ p.input_port for p in pkts ], ['eth0', 'eth1', 'eth2'])
+            self.assertEqual(pkts[0].packet.to_bytes(), raw)
+            # the packet with an unknown link type is skipped
+            with self.assertLogs() as cm:
+                pkts = self.real.recv_packets(timeout=0.0)
+            self.assertEqual([ p.timestamp for p in pkts ], [3.0, 4.0])
+            self.assertIn("unparseable", cm.output[0])
+            self.assertTrue(self.real._pktqueue.empty())
+
+            LLNetReal.running = False
+            self.real._pktqueue.put((None,None,None))
+            with self.assertRaises(Shutdown):
+                self.real.recv_packets()
+        finally:
+            LLNetReal.running = running
+
+    def testLowLevelDispatch(self):
+        from queue import Queue
+        running = LLNetReal.running if hasattr(LLNetReal, 'running') else False
+        batches = [ [1, 2, 3], [], [4] ]
+        def recv_batch(max_count=-1, timeout=0):
+            if len(batches) == 1:
+                LLNetReal.running = False
+            return batches.pop(0)
+        pdev = Mock(dlt=Dlt.DLT_EN10MB, recv_batch=recv_batch)
+        pdev.stats = Mock(return_value=PcapStats(4, 0, 0))
+        q = Queue()
+        LLNetReal.running = True
+        try:
+            LLNetReal._low_level_dispatch(pdev, 'eth0', q)
+        finally:
+            LLNetReal.running = running
+        self.assertEqual([ q.get_nowait() for i in range(q.qsize()) ],
+            [ ('eth0', Dlt.DLT_EN10MB, i) for i in range(1, 5) ])
+
+    def testSelectRecvPackets(self):
+        import socket
+        from switchyard.pcapffi import PcapPacket
+        from switchyard.llnetreal import _SelectReceiver
+
+        class FakeDev(object):
+            dlt = Dlt.DLT_EN10MB
+            def __init__(self):
+                self.sock, self.peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self.sock.setblocking(False)
+                self.fd = self.sock.fileno()
+            def recv_batch(self, max_count=-1, timeout=0):
+                pkts = []
+                while len(pkts) != max_count:
+                    try:
+                        raw = self.sock.recv(2048)
+                    except OSError:
+                        break
+                    pkts.append(PcapPacket(0.0, len(raw), len(raw), raw))
+                return pkts
+            def stats(self):
+                return PcapStats(0, 0, 0)
+
+        devs = { 'eth0': FakeDev(), 'eth1': FakeDev() }
+        self.real._lazy = False
+        self.real._receiver = _SelectReceiver(devs, batch=2)
+        running = LLNetReal.running if hasattr(LLNetReal, 'running') else False
+        LLNetReal.running = True
+        try:
+            with self.assertRaises(NoPackets):
+                self.real.recv_packets(timeout=0.0)
+            raw = (Ethernet() + IPv4(protocol=IPProtocol.UDP) + UDP()).to_bytes()
+            for i in range(3):
+                devs['eth0'].peer.send(raw)
+            devs['eth1'].peer.send(raw)
+            pkts = self.real.recv_packets(10, timeout=1.0)
+            self.assertEqual(sorted(p.input_port for p in pkts),
+                             ['eth0', 'eth0', 'eth1'])
+            self.assertEqual(pkts[0].packet.to_bytes(), raw)
+            # at most batch packets are read from a device at a time
+            p = self.real.recv_packet(timeout=1.0)
+            self.assertEqual(p.input_port, 'eth0')
+
+            # a device that fails is no longer read from
+            def fail(max_count=-1, timeout=0):
+                raise PcapException("device went down")
+            devs['eth1'].recv_batch = fail
+            devs['eth1'].peer.send(raw)
+            with self.assertLogs(level='WARNING') as cm:
+                with self.assertRaises(NoPackets):
+                    self.real.recv_packet(timeout=0.1)
+            self.assertEqual(len(cm.output), 1)
+            self.assertIn("device went down", cm.output[0])
+            devs['eth0'].peer.send(raw)
+            p = self.real.recv_packet(timeout=1.0)
+            self.assertEqual(p.input_port, 'eth0')
+
+            LLNetReal.running = False
+            self.real._receiver.wakeup()
+            with self.assertRaises(Shutdown):
+                self.real.recv_packet()
+        finally:
+            LLNetReal.running = running
+            self.real._receiver.close()
+            for dev in devs.values():
+                dev.sock.close()
+                dev.peer.close()
+
+    def testFakeRecvPackets(self):
+        from switchyard.lib.testing import PacketInputEvent, PacketInputTimeoutEvent
+        s = TestScenario('batch')
+        s.add_interface('eth0', '00:00:00:00:00:01')
+        s.add_interface('eth1', '00:00:00:00:00:02')
+        for i in range(3):
+            s.expect(PacketInputEvent('eth{}'.format(i % 2),
+                Ethernet() + IPv4(ttl=i+1) + ICMP()), "packet {}".format(i))
+        s.expect(PacketInputTimeoutEvent(0.0), "timeout")
+        s.expect(PacketInputEvent('eth0', Ethernet() + IPv4() + ICMP()), "packet 3")
+        net = LLNetTest(s)
+        pkts = net.recv_packets(2)
+        self.assertEqual([ p.packet[1].ttl for p in pkts ], [1, 2])
+        pkts = net.recv_packets(timeout=1.0)
+        self.assertEqual([ p.input_port for p in pkts ], ['eth0'])
+        with self.assertRaises(NoPackets):
+            net.recv_packets()
+        self.assertEqual(len(net.recv_packets()), 1)
+        self.assertTrue(s.done())
+
     def testRawSock(self):
         with self.assertRaises(socket.error):
             r = _RawSocket('loop')
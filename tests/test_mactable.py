@@ -0,0 +1,71 @@
+import unittest
+
+from switchyard.lib.mactable import MacLearningTable, MacTableStats
+from switchyard.lib.address import EthAddr
+
+
+class MacLearningTableTests(unittest.TestCase):
+    def testLearnAndLookup(self):
+        table = MacLearningTable(capacity=8, timeout=10.0, clock=lambda: 0.0)
+        self.assertIsNone(table.lookup("11:22:33:44:55:66"))
+        table.learn("11:22:33:44:55:66", 'eth0', now=0.0)
+        mac = EthAddr("11:22:33:44:55:66")
+        self.assertEqual(table.lookup(mac, now=1.0), 'eth0')
+        self.assertEqual(table.lookup(mac.raw, now=1.0), 'eth0')
+        self.assertIn(mac, table)
+        # hosts move
+        table.learn(mac, 'eth1', now=2.0)
+        self.assertEqual(table.lookup(mac, now=2.0), 'eth1')
+        self.assertEqual(len(table), 1)
+
+        # the same address on different VLANs are separate entries
+        table.learn(mac, 'eth2', vlan=10, now=2.0)
+        self.assertEqual(table.lookup(mac, vlan=10, now=2.0), 'eth2')
+        self.assertIsNone(table.lookup(mac, vlan=20, now=2.0))
+        self.assertEqual(list(table), [(mac, None, 'eth1'), (mac, 10, 'eth2')])
+
+        table.remove(mac, vlan=10)
+        with self.assertRaises(KeyError):
+            table.remove(mac, vlan=10)
+        self.assertEqual(table.stats, MacTableStats(hits=4, misses=2,
+            evictions=0, expirations=0))
+        table.reset_stats()
+        self.assertEqual(table.stats, (0, 0, 0, 0))
+
+    def testEviction(self):
+        table = MacLearningTable(capacity=3, timeout=None)
+        macs = [ EthAddr("00:00:00:00:00:{:02x}".format(i)) for i in range(5) ]
+        for i in range(3):
+            table.learn(macs[i], i, now=float(i))
+        # learning an address again makes it the most recent
+        table.learn(macs[0], 0, now=3.0)
+        table.learn(macs[3], 3, now=4.0)
+        self.assertNotIn(macs[1], table)
+        table.learn(macs[4], 4, now=5.0)
+        self.assertNotIn(macs[2], table)
+        self.assertEqual([ port for _,_,port in table ], [0, 3, 4])
+        self.assertEqual(table.stats.evictions, 2)
+        # no timeout: entries never age out
+        self.assertEqual(table.lookup(macs[0], now=1e9), 0)
+        self.assertEqual(table.age(now=1e9), 0)
+        with self.assertRaises(ValueError):
+            MacLearningTable(capacity=0)
+
+    def testAging(self):
+        table = MacLearningTable(capacity=100, timeout=5.0)
+        for i in range(10):
+            table.learn(EthAddr(i.to_bytes(6, 'big')), i % 3, now=float(i))
+        # expired entries aren't returned even before they're removed
+        self.assertIsNone(table.lookup(EthAddr(b'\x00'*6), now=5.0))
+        self.assertEqual(table.age(now=7.0), 3)
+        self.assertEqual(len(table), 7)
+        table.learn(EthAddr((3).to_bytes(6, 'big')), 0, now=9.0)
+        self.assertEqual(table.age(now=12.5), 4)
+        self.assertEqual(sorted(port for _,_,port in table), [0, 0, 2])
+        self.assertEqual(table.stats.expirations, 7)
+        self.assertEqual(table.remove_port(0), 2)
+        self.assertEqual(len(table), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -247,6 +247,36 @@ def x():
         x = wm.fail_reason(xcopy)
         self.assertIn("Ethernet 00:00:00:00:00:00->00:00:00:00:00:00 IP | IPv4 1.2.3.4->5.6.7.8 UDP | UDP *->4444", x)
 
+        # addresses are starred out by field, not wherever their text
+        # shows up
+        p = Ethernet() + \
+             IPv4(protocol=IPProtocol.UDP,src="10.0.0.1",dst="10.0.0.12") + \
+             UDP(src=9999, dst=4444)
+        wm = PacketMatcher(p, wildcards=[(IPv4, 'src')])
+        self.assertTrue(wm.match(p))
+        self.assertIn("IPv4 *.*.*.*->10.0.0.12 UDP", wm.fail_reason(p))
+        wm = PacketMatcher(p, wildcards=[(IPv4, 'src'), (IPv4, 'dst')])
+        self.assertTrue(wm.match(p))
+        self.assertIn("IPv4 *.*.*.*->*.*.*.* UDP", wm.fail_reason(p))
+        p[1].dst = "10.0.0.1"
+        wm = PacketMatcher(p, wildcards=[(IPv4, 'dst')])
+        self.assertTrue(wm.match(p))
+        self.assertIn("IPv4 10.0.0.1->*.*.*.* UDP", wm.fail_reason(p))
+        p[1].src = p[1].dst = "255.255.255.255"
+        wm = PacketMatcher(p, wildcards=[(IPv4, 'src'), (IPv4, 'dst')])
+        self.assertTrue(wm.match(p))
+        self.assertIn("IPv4 *.*.*.*->*.*.*.* UDP", wm.fail_reason(p))
+        self.assertEqual(str(p[1].src), "255.255.255.255")
+        p[1].dst = "255.255.255.254"
+        wm = PacketMatcher(p, wildcards=[(IPv4, 'src')])
+        self.assertTrue(wm.match(p))
+        self.assertIn("IPv4 *.*.*.*->255.255.255.254 UDP", wm.fail_reason(p))
+        arp = create_ip_arp_request("11:22:33:44:55:66", "10.0.0.1", "10.0.0.12")
+        wm = PacketMatcher(arp, wildcards=[(Arp, 'senderprotoaddr')])
+        self.assertTrue(wm.match(arp))
+        self.assertIn("Arp 11:22:33:44:55:66:*.*.*.* ff:ff:ff:ff:ff:ff:10.0.0.12",
+            wm.fail_reason(arp))
+
         with self.assertRaises(TypeError):
             # subtle: missing comma to make tuple
             wm = PacketMatcher(p, wildcards=('tp_src'))
@@ -15,7 +15,7 @@ from switchyard.lib.packet import *
 from switchyard.lib.exceptions import *
 import switchyard.lib.openflow.openflow13 as of13
 import switchyard.lib.openflow.openflow10 as of10
-from switchyard.lib.openflow.ofswitch import OpenflowSwitch, SwitchActionCallbacks, FlowTable
+from switchyard.lib.openflow.ofswitch import OpenflowSwitch, SwitchActionCallbacks, FlowTable, MeterTable
 from switchyard.llnetbase import LLNetBase
 from switchyard.lib.interface import Interface
 
@@ -134,6 +134,29 @@ class SwitchUnitTests(unittest.TestCase):
         self.switch._handle_datapath("eth0", Ethernet() + IPv4() + ICMP())
         self.assertTrue(self.lastrecv) # check that it's non-empty
 
+    def testMeterTable(self):
+        switch = OpenflowSwitch(self.net, "abcdef00", self.cb)
+        self.assertEqual(len(switch._meter_table), 0)
+        meters = MeterTable(clock=lambda: 0.0)
+        pkt = Ethernet() + IPv4(protocol=IPProtocol.ICMP) + ICMP()
+        # 8 kb/s == 1000 bytes/sec; 2 packets/sec
+        meters.add(1, 8)
+        meters.add(2, 2, pktps=True)
+        self.assertIn(1, meters)
+        with self.assertRaises(ValueError):
+            meters.add(1, 16)
+        passed = [ meters.apply(1, pkt, now=0.0) for _ in range(50) ]
+        self.assertEqual(sum(passed), 1000 // len(pkt))
+        self.assertTrue(meters.apply(1, pkt, now=1.0))
+        self.assertEqual([ meters.apply(2, pkt, now=0.0) for _ in range(3) ],
+            [True, True, False])
+        meters.modify(2, 1, pktps=True)
+        meters.delete(2)
+        with self.assertRaises(KeyError):
+            meters.modify(2, 1)
+        with self.assertRaises(KeyError):
+            meters.apply(2, pkt)
+
 
     # def testTable1(self):
     #     table = FlowTable(self.cb)
@@ -5,7 +5,8 @@ from time import time
 from switchyard.lib.openflow.openflow10 import *
 from switchyard.lib.address import EthAddr, IPv4Address, SpecialIPv4Addr
 from switchyard.pcapffi import PcapDumper
-from switchyard.lib.packet import Ethernet, IPv4, TCP, TCPFlags, ICMP
+from switchyard.lib.packet import Ethernet, IPv4, TCP, TCPFlags, ICMP, \
+    Arp, IPv6, EtherType
 
 class OpenflowPacketTests(unittest.TestCase):
     def _storePkt(self, ofhdr, dst=6633):
@@ -174,6 +175,33 @@ class OpenflowPacketTests(unittest.TestCase):
 
         m.nwsrc_wildcard = 8
         self.assertTrue(m.matches_packet(pkt))
+        pkt[IPv4].src = "1.2.4.0"
+        self.assertFalse(m.matches_packet(pkt))
+        m.nwsrc_wildcard = 32
+        self.assertTrue(m.matches_packet(pkt))
+
+        # ARP protocol addresses are matched, too; IPv6 ones never are
+        def nwmatch(**kwargs):
+            m = OpenflowMatch(**kwargs)
+            for wc in (OpenflowWildcard.InPort, OpenflowWildcard.DlVlan,
+                       OpenflowWildcard.DlSrc, OpenflowWildcard.DlDst,
+                       OpenflowWildcard.DlType, OpenflowWildcard.NwProto,
+                       OpenflowWildcard.TpSrc, OpenflowWildcard.TpDst,
+                       OpenflowWildcard.DlVlanPcp, OpenflowWildcard.NwTos):
+                m.add_wildcard(wc)
+            return m
+
+        arp = Ethernet(ethertype=EtherType.ARP) + \
+              Arp(senderprotoaddr="10.1.2.3", targetprotoaddr="10.1.2.4")
+        m = nwmatch(nw_src="10.1.2.0", nw_dst="10.1.2.4")
+        m.nwsrc_wildcard = 8
+        self.assertTrue(m.matches_packet(arp))
+        arp[Arp].senderprotoaddr = "10.1.3.3"
+        self.assertFalse(m.matches_packet(arp))
+        ip6 = Ethernet(ethertype=EtherType.IPv6) + IPv6()
+        m = nwmatch()
+        m.nwsrc_wildcard = m.nwdst_wildcard = 32
+        self.assertFalse(m.matches_packet(ip6))
 
     def testPacketMatch2(self):
         pkt = Ethernet(src="30:00:00:00:00:03", dst="30:00:00:00:00:02") + \
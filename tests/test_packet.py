@@ -1,5 +1,7 @@
 from io import StringIO
 import sys
+import pickle
+from copy import deepcopy
 import unittest 
 
 from switchyard.lib.packet import *
@@ -162,6 +164,289 @@ class PacketTests(unittest.TestCase):
         p1.insert_header(0, IPv4())
         self.assertNotEqual(p1, p2)
 
+    def testSerialize(self):
+        class _TailRecorder(PacketHeaderBase):
+            def __init__(self, hdrbytes=b'', sizehint=None):
+                PacketHeaderBase.__init__(self)
+                self.hdrbytes = hdrbytes
+                self.sizehint = sizehint
+                self.tail = None
+
+            def size(self):
+                if self.sizehint is not None:
+                    return self.sizehint
+                return len(self.hdrbytes)
+
+            def pre_serialize(self, raw, pkt, i):
+                self.tail = bytes(raw)
+
+            def to_bytes(self):
+                return self.hdrbytes
+
+            def from_bytes(self, raw):
+                return raw
+
+        h1 = _TailRecorder(b'\x01\x02')
+        h2 = _TailRecorder(b'\x03\x04\x05', sizehint=0)
+        h3 = _TailRecorder(b'\x06', sizehint=4)
+        p = Packet()
+        p += h1
+        p += h2
+        p += h3
+        p += b'payload'
+        raw = p.to_bytes()
+        self.assertIsInstance(raw, bytes)
+        self.assertEqual(raw, b'\x01\x02\x03\x04\x05\x06payload')
+        self.assertEqual(h3.tail, b'payload')
+        self.assertEqual(h2.tail, b'\x06payload')
+        self.assertEqual(h1.tail, b'\x03\x04\x05\x06payload')
+
+        e = Ethernet(src="11:22:33:44:55:66", dst="66:55:44:33:22:11",
+                     ethertype=EtherType.IPv4)
+        ip = IPv4(src="10.0.0.1", dst="10.0.0.2", protocol=IPProtocol.UDP, ttl=32)
+        udp = UDP(src=1234, dst=4321)
+        p = e + ip + udp + b'hello, world'
+        raw = p.to_bytes()
+        self.assertEqual(len(raw), 14 + 20 + 8 + 12)
+        self.assertEqual(raw, b''.join([ph.to_bytes() for ph in p]))
+        p2 = Packet(raw=raw)
+        self.assertEqual(p, p2)
+        self.assertEqual(p2[IPv4].total_length, 40)
+        self.assertEqual(p2[UDP].length, 20)
+
+    def testLazyParse(self):
+        e = Ethernet(src="11:22:33:44:55:66", dst="66:55:44:33:22:11",
+                     ethertype=EtherType.IPv4)
+        ip = IPv4(src="10.0.0.1", dst="10.0.0.2", protocol=IPProtocol.UDP, ttl=32)
+        udp = UDP(src=1234, dst=4321)
+        full = e + ip + udp + b'hello, world'
+        raw = full.to_bytes()
+
+        p = Packet(raw, lazy=True)
+        self.assertEqual(p[0].dst, "66:55:44:33:22:11")
+        self.assertEqual(len(p._headers), 1)
+        self.assertEqual(p.get_header(IPv4).ttl, 32)
+        self.assertEqual(len(p._headers), 2)
+        self.assertEqual(p.num_headers(), 4)
+        self.assertEqual(p, full)
+
+        p = Packet.from_bytes(raw, Ethernet, lazy=True)
+        self.assertEqual([ph.__class__ for ph in p], 
+                         [Ethernet, IPv4, UDP, RawPacketContents])
+        self.assertEqual(p.to_bytes(), raw)
+
+        p = Packet(raw, lazy=True)
+        self.assertIsInstance(p[-1], RawPacketContents)
+        p = Packet(raw, lazy=True)
+        self.assertTrue(p.has_header("UDP"))
+        self.assertFalse(p.has_header(TCP))
+        p = Packet(raw, lazy=True)
+        self.assertIn("UDP 1234->4321", str(p))
+
+        p = Packet(raw, lazy=True)
+        self.assertEqual(p[Ethernet].src, "11:22:33:44:55:66")
+        p += b'more'
+        self.assertEqual(p.num_headers(), 5)
+        self.assertEqual(p.to_bytes()[-16:], b'hello, worldmore')
+
+        # decoding errors only show up once the bad header is reached
+        p = Packet(raw[:30], lazy=True)
+        self.assertEqual(p[0].ethertype, EtherType.IPv4)
+        with self.assertRaises(Exception):
+            p[1]
+
+    def testZeroCopyParse(self):
+        raw = (Ethernet(ethertype=EtherType.IPv4) + 
+               IPv4(protocol=IPProtocol.UDP) + UDP() + b'x'*100).to_bytes()
+        buf = bytearray(raw)
+        p = Packet(raw=buf)
+        payload = p[-1]
+        self.assertIsInstance(payload._raw, memoryview)
+        self.assertEqual(payload.size(), 100)
+        self.assertIn("(100 bytes) b'xxxxxxxxxx'...", str(payload))
+
+        # payload still refers to the capture buffer until asked for 
+        buf[-1] = ord('y')
+        self.assertEqual(payload.data, b'x'*99 + b'y')
+        self.assertIsInstance(payload._raw, bytes)
+
+        p = Packet(raw=raw)
+        self.assertEqual(p.to_bytes(), raw)
+        p2 = deepcopy(p)
+        self.assertEqual(p2, p)
+        p3 = pickle.loads(pickle.dumps(Packet(raw, lazy=True)))
+        self.assertEqual(p3, p)
+        self.assertEqual(RawPacketContents(memoryview(b'abc')), RawPacketContents(b'abc'))
+
+    def testHeaderIndex(self):
+        p = Packet()
+        p += IPv4()
+        self.assertEqual(p.get_header_index(IPv4), 0)
+        self.assertEqual(p.get_header_index(Ethernet), -1)
+        p.prepend_header(Ethernet())
+        self.assertEqual(p.get_header_index(IPv4), 1)
+        self.assertEqual(p.get_header_index(Ethernet), 0)
+        p += UDP()
+        self.assertEqual(p.get_header_index(UDP), 2)
+        self.assertIsInstance(p.get_header_by_name("UDP"), UDP)
+        p.insert_header(1, Vlan())
+        self.assertEqual(p.get_header_index(Vlan), 1)
+        self.assertEqual(p.get_header_index(IPv4), 2)
+        self.assertEqual(p.get_header_index(UDP), 3)
+        p[3] = TCP()
+        self.assertFalse(p.has_header(UDP))
+        self.assertFalse(p.has_header("UDP"))
+        self.assertTrue(p.has_header(TCP))
+        del p[Vlan]
+        self.assertEqual(p.get_header_index(IPv4), 1)
+        self.assertEqual(p.get_header_index(TCP), 2)
+        del p[0]
+        self.assertEqual(p.get_header_index(IPv4), 0)
+        self.assertIsNone(p.get_header(Ethernet))
+
+        # base classes and repeated headers
+        p = Ethernet() + Ethernet() + ICMPv6()
+        self.assertEqual(p.get_header_index(PacketHeaderBase), 0)
+        self.assertEqual(p.get_header_index(Ethernet, 1), 1)
+        self.assertEqual(p.get_header_index(ICMP), 2)
+        self.assertIsNone(p.get_header_by_name("ICMP"))
+        self.assertEqual(p.get_header_index((ICMPv6, IPv4)), 2)
+
+    def testClone(self):
+        p = Ethernet(src="11:22:33:44:55:66") + \
+            IPv4(src="10.0.0.1", dst="10.0.0.2", protocol=IPProtocol.UDP) + \
+            UDP(src=1, dst=2) + b'payload'
+        raw = p.to_bytes()
+        c = p.clone()
+        self.assertIsNot(c, p)
+        self.assertEqual(c, p)
+        self.assertIs(c._headers[1], p._headers[1])
+
+        c[Ethernet].src = "aa:bb:cc:dd:ee:ff"
+        c[1].ttl = 5
+        self.assertEqual(p[Ethernet].src, "11:22:33:44:55:66")
+        self.assertEqual(p[IPv4].ttl, 0)
+        self.assertEqual(p.to_bytes(), raw)
+        self.assertNotEqual(c.to_bytes(), raw)
+        self.assertIs(c._headers[2], p._headers[2])
+
+        # headers reached by iteration are copied, too
+        for ph in p:
+            if isinstance(ph, UDP):
+                ph.dst = 99
+        self.assertEqual(c[UDP].dst, 2)
+
+        c2 = c.clone()
+        c2 += b'more'
+        self.assertEqual(c.num_headers(), 4)
+        self.assertEqual(c2.num_headers(), 5)
+
+        lazy = Packet(raw, lazy=True)
+        lc = lazy.clone()
+        lc[IPv4].ttl = 99
+        self.assertEqual(lazy[IPv4].ttl, 0)
+        self.assertEqual(lazy.to_bytes(), raw)
+
+        # a header added in place of a removed one isn't taken for the
+        # shared one, even if it ends up with the same id
+        for i in range(10):
+            c = p.clone()
+            del p[UDP]
+            del c[UDP]
+            u = UDP(src=3, dst=4)
+            p.insert_header(2, u)
+            u.dst = 5
+            self.assertIs(p[UDP], u)
+            self.assertEqual(p[UDP].dst, 5)
+            p[2] = UDP(src=1, dst=2)
+
+    def testAddCopies(self):
+        e = Ethernet()
+        ip = IPv4(protocol=IPProtocol.UDP)
+        p = e + ip + UDP()
+        ip.ttl = 7
+        e.src = "11:22:33:44:55:66"
+        self.assertEqual(p[IPv4].ttl, 0)
+        self.assertEqual(p[Ethernet].src, "00:00:00:00:00:00")
+
+    def testSerializeCache(self):
+        p = Ethernet(src="11:22:33:44:55:66") + \
+            IPv4(src="10.0.0.1", dst="10.0.0.2", protocol=IPProtocol.UDP, ttl=64) + \
+            UDP(src=1, dst=2) + b'payload'
+        raw = p.to_bytes()
+        self.assertIs(p.to_bytes(), raw)
+
+        # a ttl change only redoes the IPv4 header (and its checksum)
+        udpstamp = p[UDP]._serialized
+        p[IPv4].ttl -= 1
+        raw2 = p.to_bytes()
+        self.assertEqual(p[UDP]._serialized, udpstamp)
+        self.assertEqual(raw2[:14], raw[:14])
+        self.assertEqual(raw2[34:], raw[34:])
+        self.assertNotEqual(raw2[14:34], raw[14:34])
+        self.assertEqual(Packet(raw2)[IPv4].ttl, 63)
+        self.assertEqual(Packet(raw2).to_bytes(), raw2)
+
+        # an address change also alters the UDP pseudo-header checksum
+        p[IPv4].dst = "10.0.0.3"
+        raw3 = p.to_bytes()
+        self.assertNotEqual(p[UDP]._serialized, udpstamp)
+        self.assertEqual(Packet(raw3).to_bytes(), raw3)
+
+        # as do changes to the payload
+        p[3] = RawPacketContents(b'longer payload')
+        raw4 = p.to_bytes()
+        self.assertEqual(len(raw4), 14+20+8+14)
+        self.assertEqual(Packet(raw4).to_bytes(), raw4)
+        self.assertEqual(Packet(raw4)[IPv4].total_length, 20+8+14)
+
+        # data objects changed through an ICMP header are noticed
+        p = Ethernet() + IPv4() + ICMP()
+        p.to_bytes()
+        p[ICMP].icmpdata.sequence = 42
+        self.assertEqual(Packet(p.to_bytes())[ICMP].icmpdata.sequence, 42)
+
+        # clones start out sharing the cached bytes
+        c = p.clone()
+        self.assertIs(c.to_bytes(), p.to_bytes())
+        c[Ethernet].dst = "aa:bb:cc:dd:ee:ff"
+        self.assertNotEqual(c.to_bytes(), p.to_bytes())
+
+        # headers that don't track changes are always serialized again
+        class Counting(PacketHeaderBase):
+            calls = 0
+            def to_bytes(self):
+                Counting.calls += 1
+                return b'\x00\x01'
+            def from_bytes(self, raw):
+                return raw[2:]
+        p = Ethernet() + Counting()
+        p.to_bytes()
+        calls = Counting.calls
+        p.to_bytes()
+        self.assertGreater(Counting.calls, calls)
+
+    def testEnumLookup(self):
+        from switchyard.lib.packet.common import _to_enum
+        for enumcls in [EtherType, IPProtocol, ArpOperation, ICMPType]:
+            for member in enumcls:
+                self.assertIs(_to_enum(enumcls, member.value), member)
+                self.assertIs(_to_enum(enumcls, member), member)
+        with self.assertRaises(ValueError):
+            _to_enum(IPProtocol, 0xfff)
+        with self.assertRaises(ValueError):
+            _to_enum(IPProtocol, "tcp")
+
+        p = Packet(raw=(Ethernet() + IPv4(protocol=IPProtocol.UDP) + 
+            UDP()).to_bytes())
+        self.assertIs(p[Ethernet].ethertype, EtherType.IPv4)
+        self.assertIs(p[IPv4].protocol, IPProtocol.UDP)
+        self.assertIs(p[IPv4].flags, IPFragmentFlag.NoFragments)
+        p[IPv4].protocol = 6
+        self.assertIs(p[IPv4].protocol, IPProtocol.TCP)
+        with self.assertRaises(ValueError):
+            p[Ethernet].ethertype = 0x1234
+
     def testNullPacketHeader(self):
         nph = NullPacketHeader()
         self.assertEqual(nph.to_bytes(), b'')
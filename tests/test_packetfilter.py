@@ -0,0 +1,150 @@
+import unittest
+import random
+from io import StringIO
+from ipaddress import IPv4Address, IPv4Network
+
+from switchyard.lib.packetfilter import PacketFilter, FilterRule, parse_rule
+from switchyard.lib.packet import *
+from switchyard.lib.address import *
+
+rules = '''
+# rule 1
+deny ip src 192.168.42.0/24 dst any
+# rule 2
+deny ip src any dst 192.168.42.0/24
+# rule 3
+permit tcp src 192.168.13.13 srcport 80 dst any dstport any
+# rule 4
+permit tcp src any srcport any dst 192.168.13.13 dstport 80
+# rule 5
+permit udp src 192.168.0.0/16 srcport any dst any dstport 53
+# rule 6
+permit udp src any srcport 53 dst 192.168.0.0/16 dstport any
+# rule 7
+permit tcp src 192.168.0.0/16 srcport any dst any dstport 80 ratelimit 12500
+# rule 8
+permit tcp src 192.168.0.0/24 srcport any dst any dstport 8000 impair
+# rule 9
+permit icmp src any dst any ratelimit 100
+# rule 10
+deny ip src any dst any
+'''
+
+
+def mkpkt(proto, src, dst, sport=0, dport=0):
+    e = Ethernet(src="11:22:33:44:55:66", dst="66:55:44:33:22:11")
+    ip = IPv4(src=src, dst=dst, protocol=proto, ttl=32)
+    if proto == IPProtocol.TCP:
+        l4 = TCP(src=sport, dst=dport)
+    elif proto == IPProtocol.UDP:
+        l4 = UDP(src=sport, dst=dport)
+    else:
+        l4 = ICMP()
+    return e + ip + l4
+
+
+def linear_match(rules, src, dst, proto, sport, dport):
+    for idx, rule in enumerate(rules):
+        if IPv4Address(src) not in rule.src or IPv4Address(dst) not in rule.dst:
+            continue
+        if rule.protocol is not None and rule.protocol != proto:
+            continue
+        if rule.srcport is not None and rule.srcport != sport:
+            continue
+        if rule.dstport is not None and rule.dstport != dport:
+            continue
+        return idx
+    return None
+
+
+class PacketFilterTests(unittest.TestCase):
+    def testParse(self):
+        rule = parse_rule("permit tcp src 192.168.0.0/16 srcport any "
+            "dst 10.0.0.1 dstport 80 ratelimit 12500")
+        self.assertEqual(rule, FilterRule('permit', IPProtocol.TCP,
+            IPv4Network("192.168.0.0/16"), None, IPv4Network("10.0.0.1/32"),
+            80, 12500, False))
+        rule = parse_rule("deny ip src any dst 1.2.3.4/24")
+        self.assertEqual(rule.dst, IPv4Network("1.2.3.0/24"))
+        self.assertIsNone(rule.protocol)
+        self.assertTrue(parse_rule("permit icmp src any dst any impair").impair)
+        for bad in ["allow ip src any dst any", "deny tcp src any dst any",
+                    "deny ip src any dst any impair",
+                    "permit udp src any srcport 70000 dst any dstport any",
+                    "permit ip src any dst any ratelimit",
+                    "permit ip src 10.0.0.256 dst any", "permit ip src any"]:
+            with self.assertRaises(ValueError):
+                parse_rule(bad)
+        with self.assertRaises(ValueError) as cm:
+            PacketFilter().load(["# comment", "", "deny ip dst any"])
+        self.assertTrue(str(cm.exception).startswith("Line 3:"))
+
+    def testClassify(self):
+        pf = PacketFilter()
+        pf.load(StringIO(rules))
+        self.assertEqual(len(pf), 10)
+        self.assertEqual(pf[8].ratelimit, 100)
+        tests = [
+            (mkpkt(IPProtocol.TCP, "192.168.42.1", "10.0.0.1", 1000, 80), 0),
+            (mkpkt(IPProtocol.ICMP, "10.0.0.1", "192.168.42.7"), 1),
+            (mkpkt(IPProtocol.TCP, "192.168.13.13", "1.2.3.4", 80, 5555), 2),
+            (mkpkt(IPProtocol.TCP, "1.2.3.4", "192.168.13.13", 5555, 80), 3),
+            (mkpkt(IPProtocol.TCP, "1.2.3.4", "192.168.13.13", 5555, 81), 9),
+            (mkpkt(IPProtocol.UDP, "192.168.1.1", "8.8.8.8", 5555, 53), 4),
+            (mkpkt(IPProtocol.UDP, "8.8.8.8", "192.168.1.1", 53, 5555), 5),
+            (mkpkt(IPProtocol.TCP, "192.168.1.1", "8.8.8.8", 5555, 80), 6),
+            (mkpkt(IPProtocol.TCP, "192.168.0.5", "8.8.8.8", 5555, 8000), 7),
+            (mkpkt(IPProtocol.TCP, "192.168.1.5", "8.8.8.8", 5555, 8000), 9),
+            (mkpkt(IPProtocol.ICMP, "8.8.8.8", "192.168.1.1"), 8),
+        ]
+        for pkt, expected in tests:
+            self.assertEqual(pf.classify(pkt), expected)
+            self.assertEqual(pf.classify_raw(pkt.to_bytes()), expected)
+
+        # a VLAN tag doesn't get in the way of raw classification
+        pkt = tests[3][0]
+        pkt.insert_header(1, Vlan(vlanid=10, ethertype=EtherType.IPv4))
+        pkt[0].ethertype = EtherType.x8021Q
+        self.assertEqual(pf.classify_raw(pkt.to_bytes()), 3)
+
+        # non-IPv4 packets aren't subject to the rules
+        arp = create_ip_arp_request("11:22:33:44:55:66", "10.0.0.1", "10.0.0.2")
+        self.assertIsNone(pf.classify(arp))
+        self.assertIsNone(pf.classify_raw(arp.to_bytes()))
+
+        self.assertEqual(pf.match("192.168.0.9", "1.1.1.1", IPProtocol.UDP,
+            1024, 53), 4)
+        self.assertIsNone(PacketFilter().match("1.1.1.1", "2.2.2.2", 6, 1, 2))
+
+    def testRandomized(self):
+        # compare against a linear first-match scan
+        rand = random.Random(1)
+        prefixes = [ IPv4Network((rand.getrandbits(32) >> (32-l) << (32-l), l))
+            for l in [0, 8, 8, 16, 16, 24, 24, 32] * 6 ]
+        ports = [None, None, 22, 53, 80, 443]
+        pf = PacketFilter()
+        for i in range(500):
+            proto = rand.choice([None, IPProtocol.ICMP, IPProtocol.TCP,
+                IPProtocol.UDP])
+            sport = dport = None
+            if proto in (IPProtocol.TCP, IPProtocol.UDP):
+                sport, dport = rand.choice(ports), rand.choice(ports)
+            pf.add(FilterRule(rand.choice(['permit', 'deny']), proto,
+                rand.choice(prefixes), sport, rand.choice(prefixes), dport,
+                None, False))
+        for _ in range(3000):
+            src = int(rand.choice(prefixes).network_address) | \
+                rand.randrange(1 << rand.choice([0, 8, 16]))
+            dst = int(rand.choice(prefixes).network_address) | \
+                rand.randrange(1 << rand.choice([0, 8, 16]))
+            proto = rand.choice([1, 6, 17])
+            sport = dport = None
+            if proto != 1:
+                sport = rand.choice(ports[2:] + [1234])
+                dport = rand.choice(ports[2:] + [1234])
+            self.assertEqual(pf.match(src, dst, proto, sport, dport),
+                linear_match(pf.rules, src, dst, proto, sport, dport))
+
+
+if __name__ == '__main__':
+    unittest.main()
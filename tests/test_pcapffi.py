@@ -50,6 +50,30 @@ class PcapFfiTests(unittest.TestCase):
         self.assertEqual(len(pkts), 0)
         os.unlink("testXX.pcap")
 
+    def testTimestamps(self):
+        dump = pf.PcapDumper("testXX.pcap")
+        dump.write_packet(b'\x00' * 60, ts=1500000000.25)
+        dump.write_packet(b'\x00' * 60, ts=1500000001.5)
+        dump.close()
+
+        reader = pf.PcapReader("testXX.pcap")
+        p = reader.recv_packet()
+        self.assertEqual(p.timestamp_ns, 1500000000250000000)
+        self.assertEqual(p.timestamp, 1500000000.25)
+        pkts = []
+        reader.dispatch(pkts.append)
+        reader.close()
+        os.unlink("testXX.pcap")
+        self.assertEqual(pkts[0].timestamp_ns, 1500000001500000000)
+        self.assertEqual(pkts[0].timestamp, 1500000001.5)
+
+        hdr = Mock(tv_sec=1500000000, tv_usec=123456789)
+        self.assertEqual(pf._timestamp_ns(hdr, True), 1500000000123456789)
+        hdr.tv_usec = 123456
+        self.assertEqual(pf._timestamp_ns(hdr, False), 1500000000123456000)
+        # timestamp_ns is optional
+        self.assertIsNone(pf.PcapPacket(0.0, 0, 0, b'').timestamp_ns)
+
     def testAnotherInstance(self):
         with self.assertRaises(Exception):
             pf._PcapFfi()
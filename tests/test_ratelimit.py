@@ -0,0 +1,82 @@
+import unittest
+
+from switchyard.lib.ratelimit import TokenBucket, LeakyBucket, \
+    TokenBucketArray, Shaper
+
+
+class RateLimitTests(unittest.TestCase):
+    def testTokenBucket(self):
+        bucket = TokenBucket(100, 200, clock=lambda: 0.0)
+        self.assertEqual(bucket.tokens(now=0.0), 200)
+        self.assertTrue(bucket.conforms(150, now=0.0))
+        self.assertFalse(bucket.conforms(60, now=0.0))
+        self.assertAlmostEqual(bucket.delay(60, now=0.0), 0.1)
+        self.assertTrue(bucket.conforms(60, now=0.1))
+        self.assertAlmostEqual(bucket.tokens(now=0.1), 0.0)
+        # never more than burst tokens, and time going backward is ignored
+        self.assertEqual(bucket.tokens(now=100.0), 200)
+        self.assertEqual(bucket.tokens(now=50.0), 200)
+        self.assertIsNone(bucket.delay(201))
+        self.assertEqual(bucket.delay(200, now=100.0), 0.0)
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+        # long-run rate is the configured rate
+        bucket = TokenBucket(1000, 1500, clock=lambda: 0.0)
+        sent = sum(100 for i in range(10000)
+                   if bucket.conforms(100, now=i * 0.001))
+        self.assertTrue(10000 <= sent <= 10000 + 1500)
+
+    def testLeakyBucket(self):
+        bucket = LeakyBucket(100, 200, clock=lambda: 0.0)
+        self.assertEqual(bucket.level(now=0.0), 0)
+        self.assertTrue(bucket.conforms(150, now=0.0))
+        self.assertFalse(bucket.conforms(60, now=0.0))
+        self.assertAlmostEqual(bucket.delay(60, now=0.0), 0.1)
+        self.assertTrue(bucket.conforms(60, now=0.1))
+        self.assertEqual(bucket.level(now=10.0), 0)
+        self.assertIsNone(bucket.delay(201))
+
+    def testTokenBucketArray(self):
+        buckets = TokenBucketArray(clock=lambda: 0.0)
+        a = buckets.add(100)
+        b = buckets.add(10, 50)
+        self.assertEqual(len(buckets), 2)
+        self.assertTrue(buckets.conforms(a, 100))
+        self.assertFalse(buckets.conforms(a, 1))
+        self.assertTrue(buckets.conforms(b, 50))
+        # nothing is added until refill is called
+        self.assertFalse(buckets.conforms(b, 1))
+        buckets.refill(now=0.5)
+        self.assertEqual(buckets.tokens(a), 50)
+        self.assertEqual(buckets.tokens(b), 5)
+        buckets.refill(now=100.0)
+        self.assertEqual(buckets.tokens(a), 100)
+        self.assertEqual(buckets.tokens(b), 50)
+
+    def testShaper(self):
+        shaper = Shaper(TokenBucket(100, 100, clock=lambda: 0.0),
+                        queue_limit=3)
+        self.assertIsNone(shaper.next_timeout(now=0.0))
+        for i in range(4):
+            shaper.enqueue(i, 60, now=0.0)
+        self.assertFalse(shaper.enqueue('big', 101, now=0.0))
+        self.assertEqual(shaper.dropped, 2)
+        self.assertEqual(len(shaper), 3)
+        self.assertEqual(shaper.dequeue(now=0.0), [0])
+        self.assertAlmostEqual(shaper.next_timeout(now=0.0), 0.2)
+        self.assertEqual(shaper.dequeue(now=0.1), [])
+        self.assertEqual(shaper.dequeue(now=0.2), [1])
+        self.assertEqual(shaper.dequeue(now=10.0), [2])
+        self.assertEqual(len(shaper), 0)
+
+        shaper = Shaper(LeakyBucket(10, 10, clock=lambda: 0.0))
+        for i in range(5):
+            shaper.enqueue(i, 5)
+        self.assertEqual(shaper.dequeue(now=0.0), [0, 1])
+        self.assertAlmostEqual(shaper.next_timeout(now=0.0), 0.5)
+        self.assertEqual(shaper.dequeue(now=1.0), [2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
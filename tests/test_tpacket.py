@@ -0,0 +1,105 @@
+import sys
+import os
+import struct
+import socket
+import unittest
+
+from switchyard.lib.packet import *
+from switchyard.pcapffi import PcapLiveDevice
+import switchyard.tpacket as tp
+
+
+def _make_block(block_size, frames, status=tp._TP_STATUS_USER):
+    '''
+    Build a ring block holding frames, a list of (raw, sec, nsec,
+    pktstatus, vlan_tci), as the kernel would.
+    '''
+    block = bytearray(block_size)
+    first = 48
+    offset = first
+    for i,(raw, sec, nsec, pktstatus, tci) in enumerate(frames):
+        mac = 68
+        size = (mac + len(raw) + 15) & ~15
+        nextoffset = size if i < len(frames) - 1 else 0
+        tp._tpacket3_hdr.pack_into(block, offset, nextoffset, sec, nsec,
+            len(raw), len(raw), pktstatus, mac, mac + 14, 0, tci, 0)
+        block[offset + mac:offset + mac + len(raw)] = raw
+        offset += size
+    struct.pack_into('=IIIII', block, 0, 3, 0, status, len(frames), first)
+    return block
+
+
+class TpacketTests(unittest.TestCase):
+    def _fake_device(self, blocks, block_size=4096):
+        dev = tp.TpacketDevice.__new__(tp.TpacketDevice)
+        dev._ring = bytearray(b''.join(blocks))
+        dev._block_size = block_size
+        dev._block_nr = len(blocks)
+        dev._block = dev._pkt_left = dev._pkt_offset = 0
+        dev._snaplen = 65535
+        return dev
+
+    def testReadRing(self):
+        p = Ethernet() + IPv4(protocol=IPProtocol.UDP) + UDP()
+        raw = p.to_bytes()
+        blocks = [ _make_block(4096, [ (raw, 1, 5, 0, 0), (raw, 2, 6, 0, 0),
+                                       (raw, 3, 7, tp._TP_STATUS_VLAN_VALID, 10) ]),
+                   _make_block(4096, [ (raw, 4, 8, 0, 0) ]),
+                   _make_block(4096, [ (raw, 5, 9, 0, 0) ], tp._TP_STATUS_KERNEL) ]
+        dev = self._fake_device(blocks)
+
+        pkts = dev._read_ring(2)
+        self.assertEqual([ p.timestamp_ns for p in pkts ],
+                         [ 1000000005, 2000000006 ])
+        self.assertEqual(pkts[0].raw, raw)
+        self.assertEqual(pkts[0].timestamp, 1.000000005)
+        # the first block isn't given back until all its packets are read
+        self.assertEqual(dev._ring[8], tp._TP_STATUS_USER)
+
+        pkts = dev._read_ring(-1)
+        self.assertEqual(len(pkts), 2)
+        # the 802.1Q tag stripped by the kernel is put back
+        self.assertEqual(pkts[0].capture_length, len(raw) + 4)
+        vlanpkt = Packet(pkts[0].raw, first_header=Ethernet)
+        self.assertEqual(vlanpkt[Vlan].vlanid, 10)
+        self.assertEqual(vlanpkt[UDP].dst, p[UDP].dst)
+        self.assertEqual(pkts[1].timestamp_ns, 4000000008)
+        self.assertEqual(dev._ring[8], tp._TP_STATUS_KERNEL)
+        self.assertEqual(dev._ring[4096 + 8], tp._TP_STATUS_KERNEL)
+
+        # the third block still belongs to the kernel
+        self.assertEqual(dev._read_ring(-1), [])
+        dev._ring[2 * 4096 + 8] = tp._TP_STATUS_USER
+        self.assertEqual(len(dev._read_ring(-1)), 1)
+        self.assertEqual(dev._block, 0)
+
+    @unittest.skipUnless(sys.platform.startswith('linux') and os.geteuid() == 0,
+                         "needs root on Linux")
+    def testLoopback(self):
+        dev = tp.TpacketDevice('lo', immediate=True, promisc=0,
+                               filterstr="udp dst port 54321", snaplen=0)
+        self.assertIn(id(dev), PcapLiveDevice._OpenDevices)
+        self.assertEqual(dev.snaplen, 65535)
+        try:
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for i in range(5):
+                s.sendto(b'switchyard', ('127.0.0.1', 54321))
+            s.sendto(b'filtered', ('127.0.0.1', 54320))
+            s.close()
+            pkts = []
+            for i in range(20):
+                pkts.extend(dev.recv_batch(timeout=0.1))
+                if len(pkts) >= 10:
+                    break
+            # each packet is seen going out and coming in
+            self.assertEqual(len(pkts), 10)
+            self.assertTrue(all(p.raw.endswith(b'switchyard') for p in pkts))
+            self.assertEqual(dev.stats().ps_recv, 10)
+            self.assertIsNone(dev.recv_packet(0))
+        finally:
+            dev.close()
+        self.assertNotIn(id(dev), PcapLiveDevice._OpenDevices)
+
+
+if __name__ == '__main__':
+    unittest.main()